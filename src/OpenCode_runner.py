@@ -2,13 +2,33 @@ import os
 import asyncio
 import re
 import ast
-from detect import extract_path_from_command
-from typing import Any
+import shlex
+import sys
+import time
+from contextlib import AsyncExitStack, aclosing
+from detect_static_analysis import extract_path_from_command
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
 
 
-FEW_SHOT_EXAMPLES = """
-Here are some examples of Windows path bug fixes:
+DEFAULT_MODEL = "opencode/minimax-m2.5-free"
+# Seconds an agent may spend on one prompt before its turn is cancelled
+DEFAULT_PROMPT_TIMEOUT = 300
+DEFAULT_POOL_SIZE = 4
+OPENCODE_COMMAND = ("opencode.cmd", "acp")
+# Bump PROMPT_TEMPLATE_VERSION whenever FEW_SHOT_EXAMPLES or the prompt wording
+# changes, so fixes made from an older prompt are not reused
+PROMPT_TEMPLATE_VERSION = "2"
+
 
+FEW_SHOT_HEADER = """
+Here are some examples of Windows path bug fixes:
+"""
+# Each example with the finding keywords it teaches; prompts for code slices
+# only carry the examples their findings call for
+FEW_SHOT_EXAMPLE_LIST = [
+    (
+        ("reserved",),
+        """
 Example 1:
 BUGGY CODE:
 import os
@@ -19,7 +39,11 @@ FIX:
 import os
 path = "C:\\\\Users\\\\molly\\\\data"
 os.listdir(path)
-
+""",
+    ),
+    (
+        ("input", "f-string", "join"),
+        """
 Example 2:
 BUGGY CODE:
 import os
@@ -33,14 +57,23 @@ if user_input:
     path = r"C:\\\\Users\\\\molly\\\\" + user_input
     if os.path.exists(path):
         os.listdir(path)
-
+""",
+    ),
+    (
+        ("illegal", "raw", "slash"),
+        """
 Example 3:
 BUGGY CODE:
 print("C:\\\\Users\\\\test\\\\>")
 
 FIX:
 print(r"C:\\\\Users\\\\test\\\\>")
-"""
+""",
+    ),
+]
+FEW_SHOT_EXAMPLES = FEW_SHOT_HEADER + "".join(
+    example for _, example in FEW_SHOT_EXAMPLE_LIST
+)
 
 
 def extract_code(response: str) -> str:
@@ -54,6 +87,10 @@ def extract_code(response: str) -> str:
     return response.strip()
 
 
+# A fenced block is complete once its closing fence has arrived
+_FENCED_BLOCK = re.compile(r"```(?:python)?\n(.*?)```", re.DOTALL)
+
+
 def validate_python_syntax(code: str) -> bool:
     """Check if the code has valid Python syntax."""
     try:
@@ -63,73 +100,304 @@ def validate_python_syntax(code: str) -> bool:
         return False
 
 
+def agent_command() -> list[str]:
+    """Get the ACP agent command line, overridable with WINCLEAN_ACP_AGENT."""
+    override = os.environ.get("WINCLEAN_ACP_AGENT")
+    if override:
+        return shlex.split(override, posix=os.name != "nt")
+    return list(OPENCODE_COMMAND)
+
+
 class OpenCodeClient:
-    """ACP client for OpenCode."""
+    """ACP client for OpenCode, keeping the updates of session_id only."""
 
     def __init__(self):
+        self.session_id = None
         self.messages = []
+        self.chunks = asyncio.Queue()
+        self.done = asyncio.Event()
+
+    def reset(self) -> None:
+        """Clear the previous reply before a pooled connection is reused."""
+        self.messages = []
+        self.chunks = asyncio.Queue()
         self.done = asyncio.Event()
 
     async def request_permission(self, options, session_id, tool_call, **kwargs):
         return {"outcome": {"outcome": "ALLOW"}}
 
     async def session_update(self, session_id, update, **kwargs):
+        # A session given up on can still be streaming its reply
+        if session_id != self.session_id:
+            return
+        # Only the agent's reply is kept; thoughts and tool calls would be
+        # mistaken for the fixed code by extract_code
+        kind = getattr(update, "session_update", "agent_message_chunk")
         content = getattr(update, "content", None)
-        if content and hasattr(content, "text") and content.text:
+        if (
+            kind == "agent_message_chunk"
+            and content
+            and hasattr(content, "text")
+            and content.text
+        ):
             self.messages.append(content.text)
+            self.chunks.put_nowait(content.text)
         if content and getattr(content, "is_final", False):
             self.done.set()
 
 
-async def run_opencode_acp(
-    prompt: str, model: str = "opencode/minimax-m2.5-free"
-) -> str:
-    """Run OpenCode via ACP with iterative querying handled by the server."""
-    try:
-        from acp import text_block, connect_to_agent
+class _AgentConnection:
+    """One running agent process with an initialized ACP connection."""
+
+    def __init__(self, conn, client: OpenCodeClient, proc):
+        self.conn = conn
+        self.client = client
+        self.proc = proc
+        self.session_id = None
+
+    def is_alive(self) -> bool:
+        return self.proc.returncode is None
+
+
+class OpenCodePool:
+    """
+    A fixed number of ACP agent processes kept alive for many prompts.
+
+    Each agent is spawned and initialized once when the pool is entered, and
+    every prompt borrows a free connection, so at most `size` prompts run at
+    a time and the rest wait their turn. A fresh session is opened per prompt
+    so one file's conversation never leaks into another's fix; pass
+    reuse_sessions=True to keep one session per connection instead. An agent
+    that exits is respawned the next time its connection is borrowed. A
+    turn that is still running cancel_grace seconds after being cancelled
+    has its session dropped, so its late updates are ignored.
+
+    Each new session is switched to `model` through the config option the
+    agent marks with the "model" category; model=None keeps the agent's own
+    default. An agent that offers no such option answers with its own
+    default instead: a warning is printed and model is set to None, so what
+    a caller caches is keyed by the model that really answered.
+
+        async with OpenCodePool(size=4) as pool:
+            replies = await asyncio.gather(*(pool.prompt(p) for p in prompts))
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        command: Optional[Sequence[str]] = None,
+        timeout: float = DEFAULT_PROMPT_TIMEOUT,
+        cwd: Optional[str] = None,
+        reuse_sessions: bool = False,
+        model: Optional[str] = DEFAULT_MODEL,
+        cancel_grace: float = 5.0,
+    ):
+        self.size = max(1, size)
+        self.command = list(command or agent_command())
+        self.timeout = timeout
+        self.cwd = cwd or os.getcwd()
+        self.reuse_sessions = reuse_sessions
+        self.model = model
+        self.cancel_grace = cancel_grace
+        self._stack = None
+        self._free = None
+
+    async def __aenter__(self) -> "OpenCodePool":
+        self._stack = AsyncExitStack()
+        self._free = asyncio.Queue()
+        # Agents start in parallel; all of them finish starting before any
+        # failure is raised, so the exit stack can shut every one down
+        started = await asyncio.gather(
+            *(self._connect() for _ in range(self.size)), return_exceptions=True
+        )
+        errors = [c for c in started if isinstance(c, BaseException)]
+        if errors:
+            await self._stack.aclose()
+            raise errors[0]
+        for connection in started:
+            self._free.put_nowait(connection)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self._stack.aclose()
+
+    async def _connect(self) -> _AgentConnection:
+        """Spawn one agent process and initialize its ACP connection."""
+        from acp import connect_to_agent
         from acp.transports import spawn_stdio_transport
 
+        reader, writer, proc = await self._stack.enter_async_context(
+            spawn_stdio_transport(*self.command)
+        )
         client = OpenCodeClient()
-
-        async with spawn_stdio_transport("opencode.cmd", "acp") as (
-            reader,
-            writer,
-            proc,
-        ):
-            conn = connect_to_agent(client, writer, reader)
-            await conn.initialize(protocol_version=1)
-
-            session = await conn.new_session(cwd=os.getcwd())
-            await conn.prompt(
-                session_id=session.session_id,
-                prompt=[text_block(prompt)],
+        conn = connect_to_agent(client, writer, reader)
+        self._stack.push_async_callback(conn.close)
+        await conn.initialize(protocol_version=1)
+        return _AgentConnection(conn, client, proc)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Send one prompt on a free connection and yield the reply as it arrives.
+
+        The stream ends when the agent ends its turn or the timeout passes.
+        Closing it early (see contextlib.aclosing) cancels the agent's turn,
+        so a caller that already has what it needs does not wait for the rest.
+        """
+        from acp import text_block
+
+        connection = await self._free.get()
+        turn = chunk = None
+        try:
+            if not connection.is_alive():
+                connection = await self._connect()
+            client = connection.client
+            client.reset()
+            if connection.session_id is None or not self.reuse_sessions:
+                session = await connection.conn.new_session(cwd=self.cwd)
+                connection.session_id = session.session_id
+                await self._select_model(connection, session)
+            client.session_id = connection.session_id
+
+            # The prompt request returns when the agent ends its turn
+            turn = asyncio.ensure_future(
+                connection.conn.prompt(
+                    session_id=connection.session_id,
+                    prompt=[text_block(prompt)],
+                )
             )
-
-            # Wait for completion with extended timeout for iterative querying
-            try:
-                await asyncio.wait_for(client.done.wait(), timeout=300)
-            except asyncio.TimeoutError:
-                pass
-
-            return "\n".join(client.messages)
-
+            deadline = asyncio.get_running_loop().time() + self.timeout
+            while True:
+                chunk = asyncio.ensure_future(client.chunks.get())
+                await asyncio.wait(
+                    {chunk, turn},
+                    timeout=deadline - asyncio.get_running_loop().time(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if chunk.done():
+                    yield chunk.result()
+                    continue
+                chunk.cancel()
+                if not turn.done():
+                    break
+                # Chunks that arrived just before the turn ended
+                while not client.chunks.empty():
+                    yield client.chunks.get_nowait()
+                turn.result()
+                break
+        finally:
+            if chunk is not None:
+                chunk.cancel()
+            if turn is not None and not turn.done():
+                await self._cancel_turn(connection, turn)
+            self._free.put_nowait(connection)
+
+    async def _select_model(self, connection: _AgentConnection, session) -> None:
+        """Switch a new session to self.model with the agent's model option."""
+        if self.model is None:
+            return
+        for option in session.config_options or []:
+            if getattr(option, "category", None) == "model":
+                await connection.conn.set_config_option(
+                    config_id=option.id,
+                    session_id=connection.session_id,
+                    value=self.model,
+                )
+                return
+        print(
+            f"Warning: the ACP agent has no model option to select {self.model}, "
+            "using its default model",
+            file=sys.stderr,
+        )
+        self.model = None
+
+    async def _cancel_turn(self, connection: _AgentConnection, turn) -> None:
+        """Cancel an unfinished turn and wait briefly for the agent to stop."""
+        try:
+            await connection.conn.cancel(session_id=connection.session_id)
+            await asyncio.wait_for(turn, timeout=self.cancel_grace)
+        except Exception:
+            turn.cancel()
+            # The next prompt opens a new session, whatever reuse_sessions says
+            connection.session_id = connection.client.session_id = None
+
+    async def prompt(self, prompt: str) -> str:
+        """Send one prompt on a free connection and return the agent's reply."""
+        # Reply chunks are pieces of one text, not separate lines
+        async with aclosing(self.stream(prompt)) as chunks:
+            return "".join([chunk async for chunk in chunks])
+
+
+async def stream_fix(
+    pool: OpenCodePool,
+    prompt: str,
+    accept: Callable[[str], bool] = validate_python_syntax,
+) -> dict:
+    """Stream a fix and stop the agent as soon as an acceptable code block arrives.
+
+    Each fenced code block is checked with accept (by default, that it is
+    valid Python) the moment its closing fence arrives, and the first one
+    accepted ends the turn early. Without one, the whole reply goes through
+    extract_code and accept as before.
+
+    Returns {"code", "valid", "ttft", "time_to_fix", "elapsed",
+    "stopped_early"}, where valid says whether accept passed, with times in
+    seconds from sending the prompt; ttft and time_to_fix are None when no
+    text or no accepted fix arrived.
+    """
+    start = time.perf_counter()
+    ttft = None
+    text = ""
+    # Where the next fenced block can start; earlier blocks were checked
+    scanned = 0
+    async with aclosing(pool.stream(prompt)) as chunks:
+        async for chunk in chunks:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            text += chunk
+            for block in _FENCED_BLOCK.finditer(text, scanned):
+                scanned = block.end()
+                if accept(block.group(1)):
+                    elapsed = time.perf_counter() - start
+                    return {
+                        "code": block.group(1),
+                        "valid": True,
+                        "ttft": ttft,
+                        "time_to_fix": elapsed,
+                        "elapsed": elapsed,
+                        "stopped_early": True,
+                    }
+
+    code = extract_code(text)
+    valid = accept(code)
+    elapsed = time.perf_counter() - start
+    return {
+        "code": code,
+        "valid": valid,
+        "ttft": ttft,
+        "time_to_fix": elapsed if valid else None,
+        "elapsed": elapsed,
+        "stopped_early": False,
+    }
+
+
+async def run_opencode_acp(prompt: str, model: str = DEFAULT_MODEL) -> str:
+    """Run OpenCode via ACP with iterative querying handled by the server."""
+    try:
+        async with OpenCodePool(size=1, model=model) as pool:
+            return await pool.prompt(prompt)
     except Exception as e:
         return f"Error: {e}"
 
 
-def run_opencode_prompt_sync(
-    broken_code: str,
-    potential_bug: str,
-    analysis_results: str = "",
-    model: str = "opencode/minimax-m2.5-free",
-) -> Any:
-    """Run OpenCode via ACP with iterative querying and few-shot approach."""
+def read_code_to_fix(broken_code: str) -> str:
+    """Get the code to fix from a script path, or the path from a command."""
     if os.path.isfile(broken_code):
         with open(broken_code, "r", encoding="utf-8") as f:
-            broken_code_content = f.read()
-    else:
-        broken_code_content = extract_path_from_command(broken_code)
+            return f.read()
+    return extract_path_from_command(broken_code)
 
+
+def build_fix_prompt(broken_code_content: str, analysis_results: str = "") -> str:
+    """Build the few-shot, iterative-refinement prompt for one piece of code."""
     analysis_section = ""
     if analysis_results:
         analysis_section = f"""ANALYSIS RESULTS:
@@ -159,13 +427,261 @@ REQUIREMENTS:
 
 FINAL CODE:
 """
+    return prompt
+
 
-    print(f"Running OpenCode via ACP with iterative querying...")
+# ----- Code slices -----
 
-    response = asyncio.run(run_opencode_acp(prompt, model))
 
-    extracted = extract_code(response)
-    is_valid = validate_python_syntax(extracted)
+def select_few_shot_examples(analysis_results: str) -> str:
+    """Get the few-shot examples the findings call for, or all of them."""
+    findings = analysis_results.lower()
+    examples = [
+        example
+        for keywords, example in FEW_SHOT_EXAMPLE_LIST
+        if any(keyword in findings for keyword in keywords)
+    ]
+    if not examples:
+        return FEW_SHOT_EXAMPLES
+    return FEW_SHOT_HEADER + "".join(examples)
+
+
+def build_slice_prompt(slices: str, analysis_results: str) -> str:
+    """Build the prompt for code slices from code_slicer.render_slices."""
+    prompt = f"""Fix Windows path bugs in these slices of a larger file. Use iterative refinement to improve the fix.
+
+ANALYSIS RESULTS:
+{analysis_results}
+
+{select_few_shot_examples(analysis_results)}
+
+The slices are the flagged functions and statements, plus the statements they depend on.
+Line numbers in the analysis results refer to the original file, as in each slice's marker.
+
+CODE TO FIX:
+{slices}
+
+TASK:
+1. First, identify all Windows path bugs in the slices
+2. Generate an initial fix
+3. Review the fix and refine it if needed (up to 3 refinement iterations)
+4. Return the FINAL corrected slices and an explanation of the changes made
+
+REQUIREMENTS:
+- Return every slice in one ```python block, in order, keeping every marker line
+  ("# --- slice ..." and "# --- end slice ...") exactly as it is
+- Only change code inside the slices; put any new import in the slice that needs it
+- Use raw strings (r"...") for paths with backslashes
+- Avoid reserved Windows names: COM1, COM2, LPT1, LPT2, LPT3, PRN, AUX, CON, NUL
+- Paths must start with drive letter (C:) and not be UNC paths
+
+FINAL CODE:
+"""
+    return prompt
+
+
+async def fix_code(pool: OpenCodePool, code: str, analysis_results: str) -> dict:
+    """Fix code on a pool, sending only the flagged slices when it can.
+
+    When the findings point at a few functions or statements, only those
+    and the statements they depend on are sent, and the fixed slices are
+    spliced back into the file. If the reply cannot be spliced, the whole
+    file is sent instead. Returns the stream_fix record for the whole file,
+    with "prompt_chars" and "sliced" added; its times include any attempt
+    that had to be retried with the whole file.
+    """
+    from code_slicer import render_slices, slice_code, splice_slices
+
+    offset = 0.0
+    ranges = slice_code(code, analysis_results)
+    slices = render_slices(code, ranges) if ranges else None
+    if slices is not None:
+        prompt = build_slice_prompt(slices, analysis_results)
+        # A reply is only taken, and the agent only stopped, once it splices
+        result = await stream_fix(
+            pool, prompt, lambda fix: splice_slices(code, ranges, fix) is not None
+        )
+        if result["valid"]:
+            spliced = splice_slices(code, ranges, result["code"])
+            result.update(code=spliced, prompt_chars=len(prompt), sliced=True)
+            return result
+        offset = result["elapsed"]
+
+    prompt = build_fix_prompt(code, analysis_results)
+    result = await stream_fix(pool, prompt)
+    for timing in ("ttft", "time_to_fix", "elapsed"):
+        if result[timing] is not None:
+            result[timing] += offset
+    result.update(prompt_chars=len(prompt), sliced=False)
+    return result
+
+
+async def run_opencode_fix(
+    code: str, analysis_results: str = "", model: str = DEFAULT_MODEL
+) -> dict:
+    """Run one fix on its own agent; see fix_code for the result.
+
+    "model" is added to the result: the model that answered, which is None
+    when the agent could only use its default.
+    """
+    async with OpenCodePool(size=1, model=model) as pool:
+        result = await fix_code(pool, code, analysis_results)
+        result["model"] = pool.model
+        return result
+
+
+# ----- Fix cache -----
+
+_fix_cache = None
+
+
+def get_fix_cache() -> Any:
+    """Gets the cache of OpenCode fixes shared by this process."""
+    global _fix_cache
+    if _fix_cache is None:
+        from result_cache import ResultCache, DEFAULT_CACHE_DIR
+
+        _fix_cache = ResultCache(os.path.join(DEFAULT_CACHE_DIR, "fixes.sqlite3"))
+    return _fix_cache
+
+
+def normalize_code(code: str) -> str:
+    """Normalize line endings and trailing whitespace, which never change a fix."""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def fix_cache_key(code: str, analysis_results: str, model: Optional[str]) -> str:
+    """Key a fix by everything that goes into its prompt, plus the model."""
+    import hashlib
+    from result_cache import make_key
+
+    return make_key(
+        hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest(),
+        analysis_results.strip(),
+        PROMPT_TEMPLATE_VERSION,
+        model or "",
+    )
+
+
+def cached_fix(key: str, refresh: bool = False) -> Optional[str]:
+    """Get a cached fix, unless refreshing; fixes that did not parse are retried."""
+    if refresh:
+        return None
+    entry = get_fix_cache().get(key)
+    if entry is None or not entry.get("valid"):
+        return None
+    return entry["code"]
+
+
+def store_fix(key: str, fix: str, is_valid: bool) -> None:
+    """Cache an extracted fix along with whether it parses."""
+    get_fix_cache().put(key, {"code": fix, "valid": is_valid})
+
+
+# ----- Rule-based fixes -----
+
+
+def apply_rule_fixes(
+    code: str, analysis_results: str, root: str = ""
+) -> tuple[str, str, list[str]]:
+    """Run the rule-based path fixer before OpenCode.
+
+    Returns the code and findings left for OpenCode, and a note for each
+    rule fix applied. A finding is only dropped when the static re-check of
+    the fixed code no longer reports it; the rest, such as runtime errors
+    from dynamic analysis, are kept, and so is any new finding the fixes
+    made, such as a missing folder under its fixed name. When no findings
+    are left, OpenCode is not needed at all.
+    """
+    if not analysis_results:
+        return code, analysis_results, []
+
+    from detect_static_analysis import collect_static_errors
+    from path_fixer import auto_fix
+
+    fixed, notes, remaining = auto_fix(code, root)
+    if not notes:
+        return code, analysis_results, []
+    before = collect_static_errors(code, root)
+    resolved = set(before) - set(remaining)
+    findings = [
+        line
+        for line in analysis_results.splitlines()
+        if line.strip() and line not in resolved
+    ]
+    findings += [error for error in remaining if error not in before]
+    return fixed, "\n".join(findings), notes
+
+
+def format_fix_timings(result: dict) -> str:
+    """Describe the time to first token and to a valid fix for one stream_fix run."""
+    ttft = "no reply" if result["ttft"] is None else f"{result['ttft']:.2f} s"
+    if result["time_to_fix"] is None:
+        fix = f"none after {result['elapsed']:.2f} s"
+    else:
+        fix = f"{result['time_to_fix']:.2f} s"
+        if result["stopped_early"]:
+            fix += " (agent stopped early)"
+    return f"Time to first token: {ttft}\nTime to valid fix: {fix}"
+
+
+def run_opencode_prompt_sync(
+    broken_code: str,
+    potential_bug: str,
+    analysis_results: str = "",
+    model: str = DEFAULT_MODEL,
+    refresh: bool = False,
+    root: str = "",
+) -> Any:
+    """Run OpenCode via ACP with iterative querying and few-shot approach.
+
+    Path bugs with a mechanical fix are fixed by rules first, and OpenCode
+    only sees the findings the rules could not fix. Fixes are cached by the
+    code, the analysis results, the prompt template version and the model,
+    so a repeated snippet is answered without OpenCode; refresh=True asks
+    OpenCode again and replaces the cached fix.
+    """
+    broken_code_content = read_code_to_fix(broken_code)
+
+    if os.path.isfile(broken_code):
+        broken_code_content, analysis_results, notes = apply_rule_fixes(
+            broken_code_content, analysis_results, root
+        )
+        if notes:
+            print("Fixed by rules:")
+            for note in notes:
+                print(" -", note)
+            if not analysis_results:
+                print("✓ All issues fixed without OpenCode")
+                return broken_code_content
+
+    key = fix_cache_key(broken_code_content, analysis_results, model)
+    extracted = cached_fix(key, refresh)
+
+    if extracted is not None:
+        print("Reusing cached OpenCode fix...")
+        is_valid = True
+    else:
+        print(f"Running OpenCode via ACP with iterative querying...")
+
+        try:
+            result = asyncio.run(
+                run_opencode_fix(broken_code_content, analysis_results, model)
+            )
+        except Exception as e:
+            # A failed run is not a fix, so it is never cached
+            print(f"Error: {e}")
+            return f"Error: {e}"
+
+        extracted = result["code"]
+        is_valid = result["valid"]
+        if result["model"] != model:
+            key = fix_cache_key(broken_code_content, analysis_results, result["model"])
+        store_fix(key, extracted, is_valid)
+        sent = "code slices" if result["sliced"] else "whole file"
+        print(f"Prompt size: {result['prompt_chars']:,} chars ({sent})")
+        print(format_fix_timings(result))
 
     print(f"Response length: {len(extracted)} chars")
     print(f"Valid syntax: {is_valid}")
@@ -182,7 +698,85 @@ def run_opencode_prompt(
     broken_code: str,
     potential_bug: str,
     analysis_results: str = "",
-    model: str = "opencode/minimax-m2.5-free",
+    model: str = DEFAULT_MODEL,
+    refresh: bool = False,
+    root: str = "",
 ) -> Any:
     """Synchronous wrapper."""
-    return run_opencode_prompt_sync(broken_code, potential_bug, analysis_results, model)
+    return run_opencode_prompt_sync(
+        broken_code, potential_bug, analysis_results, model, refresh, root
+    )
+
+
+async def fix_files_acp(
+    files: dict[str, str],
+    size: int = DEFAULT_POOL_SIZE,
+    model: str = DEFAULT_MODEL,
+    refresh: bool = False,
+    root: str = "",
+) -> dict[str, str]:
+    """Fix many files concurrently on one pool of agents.
+
+    files maps each script path to its analysis results. Returns the
+    extracted code for each path, or "Error: ..." for a file whose prompt
+    failed. Files the rule-based fixer fully fixes never reach OpenCode,
+    files with the same code and findings share one prompt, and fixes
+    already in the fix cache are reused unless refresh is set.
+    """
+    fixes = {}
+    keys = {}
+    # One prompt per distinct key, however many files share it
+    pending = {}
+    for path, analysis in files.items():
+        try:
+            code = read_code_to_fix(path)
+        except (OSError, UnicodeDecodeError) as e:
+            fixes[path] = f"Error: {e}"
+            continue
+        code, analysis, notes = apply_rule_fixes(code, analysis, root)
+        if notes and not analysis:
+            fixes[path] = code
+            continue
+        key = keys[path] = fix_cache_key(code, analysis, model)
+        if key in pending:
+            continue
+        fix = cached_fix(key, refresh)
+        if fix is not None:
+            fixes[path] = fix
+        else:
+            pending[key] = (code, analysis)
+
+    async def fix_one(pool: OpenCodePool, key: str, code: str, analysis: str) -> str:
+        try:
+            result = await fix_code(pool, code, analysis)
+        except Exception as e:
+            return f"Error: {e}"
+        if pool.model != model:
+            key = fix_cache_key(code, analysis, pool.model)
+        store_fix(key, result["code"], result["valid"])
+        return result["code"]
+
+    if pending:
+        try:
+            async with OpenCodePool(size=min(size, len(pending)), model=model) as pool:
+                answers = await asyncio.gather(
+                    *(fix_one(pool, key, *job) for key, job in pending.items())
+                )
+            answers = dict(zip(pending, answers))
+        except Exception as e:
+            answers = {key: f"Error: {e}" for key in pending}
+        for path, key in keys.items():
+            fixes.setdefault(path, answers.get(key))
+
+    return {path: fixes[path] for path in files}
+
+
+def fix_files_sync(
+    files: dict[str, str],
+    size: int = DEFAULT_POOL_SIZE,
+    model: str = DEFAULT_MODEL,
+    refresh: bool = False,
+    root: str = "",
+) -> dict[str, str]:
+    """Synchronous wrapper around fix_files_acp."""
+    return asyncio.run(fix_files_acp(files, size, model, refresh, root))
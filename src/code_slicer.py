@@ -0,0 +1,211 @@
+"""
+Code Slicer
+
+Sending a whole script to OpenCode to fix one flagged line wastes tokens and
+time on code the model does not need to see. The slicer uses the line
+numbers in the analysis findings and the AST to pick out only:
+
+- the function or method around each flagged line, or the top-level
+  statement when the line is not inside a function
+- the top-level statements those depend on, followed transitively, such as
+  the imports they use and the input() or sys.argv assignments that taint
+  the paths they build
+
+The slices are sent between marker comments, and the fixed slices that come
+back are spliced into the original file in place of the old ones.
+"""
+
+import ast
+import re
+import textwrap
+
+
+FINDING_LINE = re.compile(r"^Line (\d+):")
+# Slicing is skipped when the slices would cover most of the file anyway
+MAX_SLICED_FRACTION = 0.6
+SLICE_START = "# --- slice {n} (lines {start}-{end}) ---"
+SLICE_END = "# --- end slice {n} ---"
+_SLICE_BLOCK = re.compile(
+    r"^[ \t]*# --- slice (\d+) \(lines \d+-\d+\) ---[ \t]*\n"
+    r"(.*?)"
+    r"^[ \t]*# --- end slice \1 ---[ \t]*$",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+def finding_lines(analysis_results: str) -> list[int] | None:
+    """Gets the line number of every finding, or None if any finding has none."""
+    lines = []
+    for finding in analysis_results.splitlines():
+        finding = finding.strip().lstrip("- ")
+        if not finding:
+            continue
+        match = FINDING_LINE.match(finding)
+        if not match or int(match.group(1)) < 1:
+            return None
+        lines.append(int(match.group(1)))
+    return lines or None
+
+
+def _span(node: ast.stmt) -> tuple[int, int]:
+    """Gets the first and last line of a statement, decorators included."""
+    decorators = getattr(node, "decorator_list", [])
+    return min([node.lineno] + [d.lineno for d in decorators]), node.end_lineno
+
+
+def _bound_names(node: ast.stmt) -> set[str]:
+    """Gets the names a top-level statement binds for the rest of the module."""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return {node.name}
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return {(a.asname or a.name).split(".")[0] for a in node.names}
+    return {
+        n.id
+        for n in ast.walk(node)
+        if isinstance(n, ast.Name) and isinstance(n.ctx, (ast.Store, ast.Del))
+    }
+
+
+def _used_names(node: ast.stmt) -> set[str]:
+    """Gets the names a statement reads, which may come from elsewhere in the module."""
+    return {
+        n.id
+        for n in ast.walk(node)
+        if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)
+    }
+
+
+def _enclosing_unit(tree: ast.Module, line: int) -> ast.stmt | None:
+    """Finds the function or method around a line, else its top-level statement."""
+    unit = None
+    body = tree.body
+    while True:
+        node = next((n for n in body if _span(n)[0] <= line <= _span(n)[1]), None)
+        if node is None:
+            return unit
+        if unit is None or isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            unit = node
+        # Methods are sliced on their own rather than as the whole class
+        if not isinstance(node, ast.ClassDef):
+            return unit
+        body = node.body
+
+
+def slice_code(code: str, analysis_results: str) -> list[tuple[int, int]] | None:
+    """
+    Picks the line ranges to send for the findings in analysis_results.
+
+    Returns sorted, non-overlapping (first line, last line) ranges, or None
+    when the code should be sent whole: it does not parse, a finding has no
+    line number, or the slices would cover most of the file.
+    """
+    lines = finding_lines(analysis_results)
+    if lines is None:
+        return None
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    units = []
+    for line in lines:
+        unit = _enclosing_unit(tree, line)
+        if unit is None:
+            return None
+        if unit not in units:
+            units.append(unit)
+
+    # Follows the names the slices read back to the top-level statements
+    # that bind them, until nothing new is needed
+    bindings = [(node, _bound_names(node)) for node in tree.body]
+    needed = set().union(*(_used_names(unit) for unit in units))
+    seen = set()
+    while needed - seen:
+        name = (needed - seen).pop()
+        seen.add(name)
+        for node, bound in bindings:
+            if name in bound and node not in units:
+                units.append(node)
+                needed |= _used_names(node)
+
+    ranges = []
+    for start, end in sorted(_span(unit) for unit in units):
+        # Joins a method to a class already being sent, and touching slices
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], max(end, ranges[-1][1]))
+        else:
+            ranges.append((start, end))
+
+    total = len(code.splitlines()) or 1
+    if sum(end - start + 1 for start, end in ranges) > total * MAX_SLICED_FRACTION:
+        return None
+    return ranges
+
+
+def _indent(line: str) -> str:
+    return line[: len(line) - len(line.lstrip())]
+
+
+def render_slices(code: str, ranges: list[tuple[int, int]]) -> str | None:
+    """
+    Writes the slices out between marker comments, each dedented to column 0.
+
+    Returns None if a slice cannot be dedented cleanly, such as a method
+    holding a multi-line string that is less indented than the method.
+    """
+    lines = code.splitlines()
+    parts = []
+    for n, (start, end) in enumerate(ranges, 1):
+        body = lines[start - 1 : end]
+        indent = _indent(body[0])
+        if any(line.strip() and not line.startswith(indent) for line in body):
+            return None
+        parts.append(SLICE_START.format(n=n, start=start, end=end))
+        parts.extend(line[len(indent) :] for line in body)
+        parts.append(SLICE_END.format(n=n))
+    return "\n".join(parts) + "\n"
+
+
+def splice_slices(code: str, ranges: list[tuple[int, int]], fixed: str) -> str | None:
+    """
+    Replaces each slice in the original code with its fixed version.
+
+    Returns the new code, or None if a slice is missing from the fix, does
+    not parse on its own, or the spliced file does not parse.
+    """
+    blocks = {int(n): body for n, body in _SLICE_BLOCK.findall(fixed)}
+    if sorted(blocks) != list(range(1, len(ranges) + 1)):
+        return None
+
+    lines = code.splitlines(keepends=True)
+    # Splices from the bottom up so earlier line numbers stay valid
+    for n, (start, end) in reversed(list(enumerate(ranges, 1))):
+        # The model may hand a method back at its original indentation
+        body = textwrap.dedent(blocks[n])
+        try:
+            ast.parse(body)
+        except SyntaxError:
+            return None
+        indent = _indent(lines[start - 1])
+        new = [
+            indent + line if line.strip() else line for line in body.splitlines(True)
+        ]
+        if new and not new[-1].endswith("\n"):
+            new[-1] += "\n"
+        lines[start - 1 : end] = new
+
+    spliced = "".join(lines)
+    try:
+        ast.parse(spliced)
+    except SyntaxError:
+        return None
+    return spliced
+
+
+__all__ = [
+    "finding_lines",
+    "slice_code",
+    "render_slices",
+    "splice_slices",
+    "MAX_SLICED_FRACTION",
+]
@@ -1,84 +1,29 @@
 # ------ Import Block -------
-import ast
+import json
+import ntpath
+import queue
 import subprocess
 import sys
 import os
 import re
+import threading
 
-from typing import Any
-from detect_static import extract_path_from_command, FileSystem_Analyzer
+from typing import Any, Iterable, Iterator
+from detect_static_analysis import (
+    extract_path_from_command,
+    find_python_files,
+    get_existence_cache,
+    FileSystem_Analyzer,
+)
+from dynamic_scheduler import DEFAULT_TIMEOUT, DynamicScheduler
+from sandbox_worker import get_worker
+from venv_pool import get_default_pool, venv_python
 # ----------------------------
 
 
 # ----- Dynamic Analysis -----
-def dynamic_analyzer(
-    input_path: str, root: str = None, venv_path: str = None, *script_args: list[Any]
-) -> None:
-    """Sets up a virtual environment and runs the specified script or command within it."""
-
-    # Checks if input is a path command (like "cd C:\path") or a script file
-    path_commands = ["cd ", "dir ", "ls ", "mkdir "]
-    is_path_command = any(input_path.lower().startswith(cmd) for cmd in path_commands)
-
-    if is_path_command:
-        # Handles path commands - extracts path and validate it using venv
-        print(f"Analyzing path command: {input_path}")
-
-        # Extracts the path from the command (e.g., "cd C:\path" -> "C:\path")
-        path = extract_path_from_command(input_path)
-
-        # Determines python executable in the venv
-        if not os.path.exists(venv_path):
-            print(f"Creating virtual environment at {venv_path}...")
-            result = subprocess.run(
-                [sys.executable, "-m", "venv", venv_path],
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode != 0:
-                print(f"Failed to create venv: {result.stderr}")
-                return
-
-        if os.name == "nt":
-            python_executable = os.path.join(venv_path, "Scripts", "python.exe")
-        else:
-            python_executable = os.path.join(venv_path, "bin", "python")
-
-        # Creates a test script that tries to use the path
-        test_code = f'''
-import os
-target_path = r"{path}"
-try:
-    os.listdir(target_path)
-    print("SUCCESS: Path is accessible")
-except FileNotFoundError as e:
-    print(f"FileNotFoundError: {{e}}")
-except NotADirectoryError as e:
-    print(f"NotADirectoryError: {{e}}")
-except PermissionError as e:
-    print(f"PermissionError: {{e}}")
-except OSError as e:
-    print(f"OSError: {{e}}")
-except Exception as e:
-    print(f"Exception: {{type(e).__name__}}: {{e}}")
-'''
-
-        result = subprocess.run(
-            [python_executable, "-c", test_code],
-            capture_output=True,
-            text=True,
-        )
-
-        if result.returncode != 0 or "Error" in result.stdout:
-            print("Path validation errors:")
-            print(f" - {result.stdout.strip()}")
-        else:
-            print(f" - {result.stdout.strip()}")
-        return
-
-    # Otherwise, treats as Python script file
-    script_path = input_path
-
+def prepare_venv(venv_path: str) -> str | None:
+    """Creates the virtual environment if needed and returns its Python executable."""
     # Creates virtual environment if it doesn't exist
     if not os.path.exists(venv_path):
         print(f"Creating virtual environment at {venv_path}...")
@@ -90,155 +35,423 @@ except Exception as e:
             )
             if result.returncode != 0:
                 print(f"Failed to create venv: {result.stderr}")
-                return
+                return None
             print(f"Successfully created virtual environment at {venv_path}")
         except Exception as e:
             print(f"Error creating venv: {e}")
-            return
+            return None
     else:
         print(f"Using existing virtual environment at {venv_path}")
 
     # Determines the correct Python executable path based on the operating system
-    # Checks for Windows first
-    if os.name == "nt":
-        python_executable = os.path.join(venv_path, "Scripts", "python.exe")
-    # Unix, Linux, and Mac case
-    else:
-        python_executable = os.path.join(venv_path, "bin", "python")
+    python_executable = venv_python(venv_path)
 
     # Ensures the executable exists
     if not os.path.exists(python_executable):
         print(f"Error: Python executable not found at {python_executable}")
+        return None
+    return python_executable
+
+
+def dynamic_analyzer(
+    input_path: str,
+    root: str = None,
+    venv_path: str = None,
+    *script_args: list[Any],
+    timeout: float | None = DEFAULT_TIMEOUT,
+    virtual_fs: dict | None = None,
+    stdin_file: str = None,
+) -> None:
+    """Sets up a virtual environment and runs the specified script or command within it."""
+    stdin = ""
+    if stdin_file:
+        with open(stdin_file, "r", encoding="utf-8") as f:
+            stdin = f.read()
+
+    # Without a venv path, a pre-created sandbox is leased from the shared pool
+    if not venv_path:
+        with get_default_pool().lease() as sandbox:
+            print(f"Using pooled virtual environment at {sandbox.path}")
+            return run_in_venv(
+                input_path,
+                root,
+                sandbox.python,
+                *script_args,
+                timeout=timeout,
+                virtual_fs=virtual_fs,
+                stdin=stdin,
+            )
+
+    python_executable = prepare_venv(venv_path)
+    if python_executable is None:
+        return
+    return run_in_venv(
+        input_path,
+        root,
+        python_executable,
+        *script_args,
+        timeout=timeout,
+        virtual_fs=virtual_fs,
+        stdin=stdin,
+    )
+
+
+def run_in_venv(
+    input_path: str,
+    root: str,
+    python_executable: str,
+    *script_args: list[Any],
+    timeout: float | None = DEFAULT_TIMEOUT,
+    virtual_fs: dict | None = None,
+    stdin: str = "",
+) -> None:
+    """
+    Runs the specified script or command with an existing virtual environment's Python.
+
+    stdin is the text the script's input() calls read, then EOFError.
+    """
+
+    # Checks if input is a path command (like "cd C:\path") or a script file
+    path_commands = ["cd ", "dir ", "ls ", "mkdir "]
+    is_path_command = any(input_path.lower().startswith(cmd) for cmd in path_commands)
+
+    if is_path_command:
+        # Handles path commands - extracts path and validate it using venv
+        print(f"Analyzing path command: {input_path}")
+
+        # Tries os.listdir on the path in the venv (e.g., "cd C:\path" -> "C:\path")
+        [result] = validate_path_commands(
+            [input_path], python_executable, virtual_fs
+        )
+
+        if result["status"] != "SUCCESS":
+            print("Path validation errors:")
+        print(f" - {result['status']}: {result['message']}")
         return
 
+    # Otherwise, treats as Python script file
+    script_path = input_path
+
     # Checks if script_path is a directory
     if os.path.isdir(script_path):
         print(f"Error: {script_path} is a directory, not a Python file")
         return
 
-    # Determines if we should run as module or script
-    script_dir, script_name = os.path.split(script_path)
-    module_name = script_name.replace(".py", "")
-
-    # Builds the command list for subprocess.run()
-    # Uses -m to run as module if it has main() function
-    # Builds the command list for subprocess.run()
-    # Runs the Python file directly - it will execute main() if __name__ == "__main__"
-    path_command = [python_executable, script_path] + list(script_args)
-
     # Separates out the script name for error messages
     directory_name, script_name = os.path.split(script_path)
 
-    print(f"Running command: {path_command}")
+    print(f"Running command: {[python_executable, script_path] + list(script_args)}")
 
     try:
-        # Uses subprocess.run to execute the command and captures the output and errors
-        # capture_output=True captures stdout and stderr. text=True decodes bytes to strings.
-        # This is the base case without exceptions thrown
-        result = subprocess.run(
-            path_command, capture_output=True, text=True, check=True
-        )
-        print("STANDARD OUTPUT:", result.stdout)
-        print("STANDARD ERRORS:", result.stderr)
-    # This is the case for when a non-zero exit code is returned by subprocess
-    except subprocess.CalledProcessError as e:
-        print(f"Process failed with return code {e.returncode}")
-        print("STANDARD OUTPUT:", e.stdout)
-        print("STANDARD ERRORS:", e.stderr)
-
-        # Runs script in venv and catch all runtime exceptions
-        print("Analyzing script in real-time...")
-
-        # Creates a wrapper that catches all exceptions
-        wrapper_code = f'''
-import sys
-sys.path.insert(0, "{os.path.dirname(script_path)}")
-try:
-    with open("{script_path.replace("\\", "\\\\")}", "r") as f:
-        code = f.read()
-    exec(compile(code, "{script_path.replace("\\", "\\\\")}", "exec"))
-except FileNotFoundError as e:
-    print(f"FileNotFoundError: {{e}}")
-except NotADirectoryError as e:
-    print(f"NotADirectoryError: {{e}}")
-except PermissionError as e:
-    print(f"PermissionError: {{e}}")
-except OSError as e:
-    print(f"OSError: {{e}}")
-except ValueError as e:
-    print(f"ValueError: {{e}}")
-except Exception as e:
-    print(f"Exception: {{type(e).__name__}}: {{e}}")
-'''
-
-        result = subprocess.run(
-            [python_executable, "-c", wrapper_code], capture_output=True, text=True
+        # Runs the script once in the venv's persistent worker, which captures
+        # its output and any uncaught exception as one structured record
+        result = get_worker(python_executable).run(
+            script_path,
+            [str(arg) for arg in script_args],
+            stdin=stdin,
+            timeout=timeout,
+            cpu_limit=timeout,
+            virtual_fs=virtual_fs,
         )
+    # This is the case for when the venv's Python could not be started
+    except OSError as e:
+        print(f"Error: An OS error occurred while trying to run {script_name}: {e}")
+        return
+
+    print("STANDARD OUTPUT:", result["stdout"])
+    print("STANDARD ERRORS:", result["stderr"])
+
+    # Checks every path the script touched, not just the one it crashed on
+    path_errors = traced_path_errors(result, root)
+    if path_errors:
+        print("Path issues found while running:")
+        for err in path_errors:
+            print(f" - {err}")
 
-        if result.stdout:
-            print("Runtime errors found:")
-            for line in result.stdout.strip().split("\n"):
-                print(f" - {line}")
+    exception = result["exception"]
+    if exception is None:
+        if result["exit_code"]:
+            print(f"Process failed with return code {result['exit_code']}")
         else:
             print("No runtime errors detected.")
-    # This is the case for when the file or path specified could not be found
-    # This handles missing drive letter, device names, and a file that doesn't exist at the path specified
-    except FileNotFoundError:
-        if script_path == None:
-            print(f"Error: The path {path_command} was not found.")
-        else:
-            print(f"Error: The script {script_name} was not found.")
-    # This is the case for when the file or path specified contains a syntax error
-    # This handles illegal characters, mixed slashes, and UNC paths within the working directory
-    except SyntaxError as e:
-        if script_path == None:
-            print(f"Error: The path {path_command} contains a syntax error.")
-        else:
-            print(f"Error: The script {script_name} contains a syntax error.")
-            # Falls back to path analysis for Unicode escape errors
-            if "unicodeescape" in str(e):
-                print("Analyzing paths in file despite Unicode escape errors...")
-                try:
-                    with open(script_path, "r", encoding="utf-8") as f:
-                        code = f.read()
-
-                    # Reuses static analyzer for path validation
-                    analyzer = FileSystem_Analyzer(root)
-                    lines = code.split("\n")
-                    for line_num, line in enumerate(lines, 1):
-                        import re
-
-                        strings = re.findall(r'"([^"]*)"', line) + re.findall(
-                            r"'([^']*)'", line
-                        )
-                        for string_literal in strings:
-                            if string_literal:
-                                analyzer._check(string_literal, lineno=line_num)
-
-                    if analyzer.errors:
-                        print("Path issues found in file:")
-                        for err in analyzer.errors:
-                            print(" -", err)
-                    else:
-                        print("No path issues detected despite syntax error.")
-                except Exception as path_err:
-                    print(f"Could not analyze paths: {path_err}")
-    # This is the case for when the file of path specified is not able to perform the operation requested
-    # This handles illegal characters, mixed slashes, UNC paths in the working directory, and reserved device names
-    except ValueError:
-        if script_path == None:
-            print(f"Error: A value error occurred with path {path_command}.")
-        else:
-            print(f"Error: A value error occurred with script {script_name}.")
-    # This is the case for when there is an operating system related error when trying to access the file or path specified
-    except OSError:
-        if script_path == None:
-            print(f"Error: An OS error occurred while trying to access {path_command}.")
-        else:
-            print(f"Error: An OS error occurred while trying to access {script_name}.")
-    # This is the case for when there is a permission error when trying to access the file or path specified
-    except PermissionError:
-        if script_path == None:
-            print(f"Error: Permission denied when trying to access {path_command}.")
+        return
+
+    print(f"Process failed with return code {result['exit_code']}")
+    print("Runtime errors found:")
+    for err in runtime_errors(result):
+        print(f" - {err}")
+
+    # Falls back to path analysis for Unicode escape errors, which stop the
+    # script before any path is used
+    if exception["type"] == "SyntaxError" and "unicodeescape" in exception["message"]:
+        print("Analyzing paths in file despite Unicode escape errors...")
+        analyze_paths_in_source(script_path, root)
+
+
+def runtime_errors(result: dict) -> list[str]:
+    """Describes what went wrong in a sandbox worker result record."""
+    exception = result["exception"]
+    if exception is None:
+        if result["exit_code"]:
+            return [f"Process failed with return code {result['exit_code']}"]
+        return []
+    location = f"Line {exception['lineno']}: " if exception["lineno"] else ""
+    return [f"{location}{exception['type']}: {exception['message']}"]
+
+
+def traced_path_errors(result: dict, root: str = "") -> list[str]:
+    """Runs the filesystem rules on every path a script touched while running."""
+    analyzer = FileSystem_Analyzer(root)
+    accesses = result.get("accesses") or []
+    # The script may have created or removed the folders it touched since
+    # they were cached, which only changes their answers and their parents'
+    touched = {
+        os.path.abspath(os.path.join(analyzer.root, access["path"].strip()))
+        for access in accesses
+    }
+    cache = get_existence_cache()
+    for full in touched | {os.path.dirname(full) for full in touched}:
+        cache.invalidate(full)
+    for access in accesses:
+        path, lineno = access["path"], access["lineno"]
+        # Files and new folders need not exist yet, only their parent folder
+        folder = path
+        if access["event"] in ("open", "os.mkdir"):
+            folder = ntpath.dirname(path)
+
+        probe = FileSystem_Analyzer(root)
+        probe._check(path, lineno)
+        missing = [err for err in probe.errors if "Folder does not exist" in err]
+        analyzer.errors.extend(err for err in probe.errors if err not in missing)
+        if not missing:
+            continue
+
+        exists = access.get("exists")
+        if exists is None:
+            # Checks the real disk
+            if folder == path:
+                analyzer.errors.extend(missing)
+            elif folder:
+                analyzer._check(folder, lineno)
+        elif not exists:
+            # Trusts the emulated Windows filesystem the script ran against
+            analyzer.errors.append(f"Line {lineno}: Folder does not exist -> {folder}")
+    # The same path can be touched from one line many times
+    return list(dict.fromkeys(analyzer.errors))
+
+
+def analyze_directory_dynamic(
+    directory: str,
+    root: str = "",
+    venv_path: str = None,
+    jobs: int | None = None,
+    timeout: float | None = DEFAULT_TIMEOUT,
+    stdin_file: str = None,
+    virtual_fs: dict | None = None,
+) -> None:
+    """Runs every Python file in a directory tree in the sandbox and prints the failures."""
+    paths = find_python_files(directory)
+    stdin = ""
+    if stdin_file:
+        with open(stdin_file, "r", encoding="utf-8") as f:
+            stdin = f.read()
+
+    if not venv_path:
+        with get_default_pool().lease() as sandbox:
+            print(f"Using pooled virtual environment at {sandbox.path}")
+            scheduler = DynamicScheduler(
+                sandbox.python, jobs, timeout, stdin=stdin, virtual_fs=virtual_fs
+            )
+            return _print_directory_results(directory, root, scheduler.run(paths))
+
+    python_executable = prepare_venv(venv_path)
+    if python_executable is None:
+        return
+    scheduler = DynamicScheduler(
+        python_executable, jobs, timeout, stdin=stdin, virtual_fs=virtual_fs
+    )
+    return _print_directory_results(directory, root, scheduler.run(paths))
+
+
+def _print_directory_results(directory: str, root: str, results: Iterable) -> None:
+    """Prints each failing script as its result arrives, then a summary."""
+    scanned = flagged = timed_out = 0
+    for path, result in results:
+        scanned += 1
+        errors = runtime_errors(result) + traced_path_errors(result, root)
+        if not errors:
+            continue
+        flagged += 1
+        if result["exception"] and result["exception"]["type"] == "Timeout":
+            timed_out += 1
+        print(f"\nRuntime errors in {os.path.relpath(path, directory)}:", flush=True)
+        for err in errors:
+            print(" -", err, flush=True)
+
+    print(
+        f"\nRan {scanned} files, {flagged} with runtime or path errors "
+        f"({timed_out} killed after timing out)."
+    )
+
+
+def analyze_paths_in_source(script_path: str, root: str) -> None:
+    """Checks every string literal in a file that cannot be compiled."""
+    try:
+        with open(script_path, "r", encoding="utf-8") as f:
+            code = f.read()
+
+        # Reuses static analyzer for path validation
+        analyzer = FileSystem_Analyzer(root)
+        lines = code.split("\n")
+        for line_num, line in enumerate(lines, 1):
+            strings = re.findall(r'"([^"]*)"', line) + re.findall(r"'([^']*)'", line)
+            for string_literal in strings:
+                if string_literal:
+                    analyzer._check(string_literal, lineno=line_num)
+
+        if analyzer.errors:
+            print("Path issues found in file:")
+            for err in analyzer.errors:
+                print(" -", err)
         else:
-            print(f"Error: Permission denied when trying to access {script_name}.")
+            print("No path issues detected despite syntax error.")
+    except Exception as path_err:
+        print(f"Could not analyze paths: {path_err}")
+
+
+# ----- Batch Path Commands -----
+# Runs inside the venv: reads one JSON request per line, tries os.listdir on
+# its path, and writes back one JSON result per line as soon as it is known
+# Seconds to let the feeder finish after the worker stops answering; it may be
+# blocked waiting for the next command on an open stdin, which never ends
+FEEDER_GRACE = 1.0
+PATH_WORKER_CODE = r"""
+import json
+import os
+import sys
+
+listdir = os.listdir
+# Arguments: WinClean's folder and a manifest for the emulated Windows filesystem
+if len(sys.argv) > 2:
+    sys.path.insert(0, sys.argv[1])
+    from virtual_winfs import VirtualWindowsFS
+
+    listdir = VirtualWindowsFS.from_manifest(json.loads(sys.argv[2])).listdir
+
+for line in sys.stdin:
+    request = json.loads(line)
+    try:
+        listdir(request["path"])
+        status, message = "SUCCESS", "Path is accessible"
+    except Exception as e:
+        status, message = type(e).__name__, str(e)
+    reply = {"id": request["id"], "status": status, "message": message}
+    sys.stdout.write(json.dumps(reply) + "\n")
+    sys.stdout.flush()
+"""
+
+
+def read_path_commands(source: str) -> Iterator[str]:
+    """Yields path commands from a file, or from stdin when source is "-"."""
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            command = line.strip()
+            # Skips blank lines and comments
+            if command and not command.startswith("#"):
+                yield command
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def validate_path_commands(
+    commands: Iterable[str], python_executable: str, virtual_fs: dict | None = None
+) -> Iterator[dict]:
+    """
+    Checks many path commands in one worker interpreter inside the venv.
+
+    Yields one result per command, in order, as the worker answers:
+    {"command", "path", "status", "message"}, where status is "SUCCESS" or the
+    name of the exception os.listdir raised. With a virtual_fs manifest the
+    paths are listed in an emulated Windows filesystem instead.
+    """
+    command = [python_executable, "-c", PATH_WORKER_CODE]
+    if virtual_fs is not None:
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        command += [src_dir, json.dumps(virtual_fs)]
+    worker = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+    pending = queue.Queue()
+
+    # Feeds the worker from a thread so a full pipe never blocks reading results
+    def feed() -> None:
+        try:
+            for i, command in enumerate(commands):
+                path = extract_path_from_command(command)
+                pending.put((command, path))
+                worker.stdin.write(json.dumps({"id": i, "path": path}) + "\n")
+            worker.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        for line in worker.stdout:
+            reply = json.loads(line)
+            command, path = pending.get()
+            yield {
+                "command": command,
+                "path": path,
+                "status": reply["status"],
+                "message": reply["message"],
+            }
+
+        # Reports any commands left unanswered if the worker exited early
+        feeder.join(FEEDER_GRACE)
+        while not pending.empty():
+            command, path = pending.get()
+            yield {
+                "command": command,
+                "path": path,
+                "status": "WorkerError",
+                "message": f"Worker exited with code {worker.wait()}",
+            }
+    finally:
+        # The feeder is not joined here: it is a daemon thread, and it ends at
+        # its next write to the dead worker
+        worker.kill()
+        worker.wait()
+
+
+def dynamic_batch_analyzer(
+    source: str, venv_path: str = None, virtual_fs: dict | None = None
+) -> int:
+    """Prints one JSON result line per path command read from source."""
+    if not venv_path:
+        with get_default_pool().lease() as sandbox:
+            return _print_batch_results(source, sandbox.python, virtual_fs)
+
+    python_executable = prepare_venv(venv_path)
+    if python_executable is None:
+        return 0
+    return _print_batch_results(source, python_executable, virtual_fs)
+
+
+def _print_batch_results(
+    source: str, python_executable: str, virtual_fs: dict | None
+) -> int:
+    """Streams results to stdout and returns how many paths failed."""
+    failures = 0
+    commands = read_path_commands(source)
+    for result in validate_path_commands(commands, python_executable, virtual_fs):
+        if result["status"] != "SUCCESS":
+            failures += 1
+        print(json.dumps(result), flush=True)
+    return failures
@@ -1,160 +1,220 @@
 # ------ Import Block -------
 import ast
-import subprocess
-import sys
 import os
 import re
+import threading
+import time
 
-from typing import Any
+from typing import Any, Iterable, Iterator
 # ----------------------------
 
 
+# ----- Single-Pass AST Scanner -----
+# Calls that take a filesystem path as their argument
+PATH_OPERATIONS = (
+    "listdir",
+    "chdir",
+    "open",
+    "exists",
+    "isdir",
+    "isfile",
+    "walk",
+)
+
+
+def get_func_name(node) -> str:
+    """Gets a printable function name from the func part of an ast.Call."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        if isinstance(node.value, ast.Name):
+            return f"{node.value.id}.{node.attr}"
+        return node.attr
+    return ""
+
+
+class PathScanner:
+    """Runs several rule handlers over one AST in a single traversal.
+
+    A handler is any object with handle_<NodeType> methods (for example
+    handle_Call or handle_Assign), and optionally a finish() method that is
+    called once the whole tree has been visited. Nodes are visited in the
+    same depth-first order as ast.NodeVisitor.
+    """
+
+    def __init__(self, handlers: list[Any]):
+        """Creates an instance of the class."""
+        self.handlers = handlers
+        self._dispatch = {}  # node class -> bound handler methods
+
+    def _methods_for(self, node_type: type) -> list[Any]:
+        """Looks up (and caches) the handler methods for one node class."""
+        methods = self._dispatch.get(node_type)
+        if methods is None:
+            name = "handle_" + node_type.__name__
+            methods = [
+                getattr(handler, name)
+                for handler in self.handlers
+                if hasattr(handler, name)
+            ]
+            self._dispatch[node_type] = methods
+        return methods
+
+    def scan(self, tree: ast.AST) -> None:
+        """Visits every node of the tree once, then lets each handler finish."""
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            for method in self._methods_for(type(node)):
+                method(node)
+            stack.extend(reversed(list(ast.iter_child_nodes(node))))
+
+        for handler in self.handlers:
+            finish = getattr(handler, "finish", None)
+            if finish:
+                finish()
+
+
+# --------------------------------
+
+
 # ----- Symbolic Path Analysis with Z3 -----
-def check_with_z3(code: str) -> list[str]:
-    """Check code using Z3 symbolic path analysis - only path-related issues."""
-    try:
-        from z3 import Solver, String, Contains, StringVal, Or, sat
+class Z3PathCollector:
+    """Collects path expressions during a scan and checks them at the end."""
 
-        tree = ast.parse(code)
-        user_inputs = {}  # var_name -> True (tracks that this var gets user input)
-        errors = []
-
-        def get_func_name(node):
-            if isinstance(node, ast.Name):
-                return node.id
-            if isinstance(node, ast.Attribute):
-                if isinstance(node.value, ast.Name):
-                    return f"{node.value.id}.{node.attr}"
-                return node.attr
-            return ""
-
-        def looks_like_path(node):
-            """Check if AST node involves path operations."""
-            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
-                return looks_like_path(node.left) or looks_like_path(node.right)
-            if isinstance(node, ast.JoinedStr):
-                return any(
-                    (
-                        isinstance(v, ast.Constant)
-                        and isinstance(v.value, str)
-                        and ("/" in v.value or "\\" in v.value or ":" in v.value)
+    def __init__(self, use_solver: bool = False):
+        """Creates an instance of the class."""
+        self.use_solver = use_solver
+        self.user_inputs = {}  # var_name -> True (tracks that this var gets user input)
+        self.paths = []  # (path expression node, lineno) pairs to check with Z3
+        self.errors = []
+
+    def handle_Assign(self, node) -> None:
+        """Tracks input() assignments."""
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                if isinstance(node.value, ast.Call):
+                    func = get_func_name(node.value.func)
+                    if func == "input":
+                        self.user_inputs[target.id] = True
+
+    def handle_Call(self, node) -> None:
+        """Tracks sys.argv usage and collects path operations."""
+        func = get_func_name(node.func)
+        if func in PATH_OPERATIONS:
+            # sys.argv used - checked from the path operation down to its
+            # arguments, so no second walk is needed to find the parent call
+            for arg in node.args:
+                if self._is_sys_argv(arg):
+                    self.errors.append(
+                        f"Line {node.lineno}: sys.argv used in path operation"
                     )
-                    for v in node.values
-                )
-            if isinstance(node, ast.Call):
-                func = get_func_name(node.func)
-                return func in ("join", "path.join")
-            if isinstance(node, ast.Constant) and isinstance(node.value, str):
-                return "/" in node.value or "\\" in node.value or ":" in node.value
-            return False
 
-        def uses_user_input(node):
-            """Check if expression uses any user input variables."""
-            if isinstance(node, ast.Name):
-                return node.id in user_inputs
-            if isinstance(node, ast.Attribute):
-                return uses_user_input(node.value)
-            if isinstance(node, ast.BinOp):
-                return uses_user_input(node.left) or uses_user_input(node.right)
-            if isinstance(node, ast.Call):
-                return any(uses_user_input(arg) for arg in node.args)
-            return False
+            # Check path operations that use user input
+            for arg in node.args:
+                if self._uses_user_input(arg) or self._looks_like_path(arg):
+                    self.paths.append((arg, node.lineno))
+
+    def finish(self) -> None:
+        """Checks every collected path expression, using Z3 only if use_solver is set."""
+        if not self.paths:
+            return
+        try:
+            from symbolic_class import (
+                Z3SymbolicAnalyzer,
+                constant_path_violations,
+                memoized_path_violations,
+                segment_path_violations,
+            )
 
-        def check_path_dangers(path_expr, lineno, desc=""):
-            """Check if symbolic path could be dangerous."""
-            ILLEGAL = set('<>:"|?*')
-            RESERVED = {
-                "CON",
-                "PRN",
-                "AUX",
-                "NUL",
-                *{f"COM{i}" for i in range(1, 10)},
-                *{f"LPT{i}" for i in range(1, 10)},
-            }
-
-            for char in ILLEGAL:
-                solver = Solver()
-                solver.add(Contains(path_expr, StringVal(char)))
-                if solver.check() == sat:
-                    errors.append(f"Line {lineno}: Path MAY contain illegal '{char}'")
-
-            for name in RESERVED:
-                solver = Solver()
-                solver.add(
-                    Or(
-                        Contains(path_expr, StringVal(f"/{name}")),
-                        Contains(path_expr, StringVal(f"\\{name}")),
-                        Contains(path_expr, StringVal(f":\\{name}")),
+            symbolic = Z3SymbolicAnalyzer(self.use_solver)
+            for path_expr, lineno in self.paths:
+                # Fully constant paths are answered with string checks, so only
+                # expressions with real symbolic parts reach the decision procedure
+                constant = symbolic._fold_constant(path_expr)
+                if constant is not None:
+                    chars, names = constant_path_violations(constant)
+                elif self.use_solver:
+                    # Converts the AST expression so Z3 can reason about it
+                    symbolic_path = symbolic._expr_to_symbolic(path_expr, None)
+                    if symbolic_path is None:
+                        continue
+                    chars, names = memoized_path_violations(symbolic_path)
+                else:
+                    segments = symbolic._expr_to_segments(path_expr)
+                    if segments is None:
+                        continue
+                    chars, names = segment_path_violations(segments)
+
+                for char in chars:
+                    self.errors.append(
+                        f"Line {lineno}: Path MAY contain illegal '{char}'"
                     )
-                )
-                if solver.check() == sat:
-                    errors.append(f"Line {lineno}: Path MAY contain reserved '{name}'")
+                for name in names:
+                    self.errors.append(
+                        f"Line {lineno}: Path MAY contain reserved '{name}'"
+                    )
+        except ImportError:
+            self.errors = ["Z3 not installed - run: pip install z3-solver"]
+
+    def _is_sys_argv(self, node) -> bool:
+        """Check if this is a sys.argv.__getitem__(...) call."""
+        return (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "__getitem__"
+            and isinstance(node.func.value, ast.Attribute)
+            and isinstance(node.func.value.value, ast.Name)
+            and node.func.value.value.id == "sys"
+            and node.func.value.attr == "argv"
+        )
 
-        # Visit all nodes
-        for node in ast.walk(tree):
-            # Track input() assignments
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        if isinstance(node.value, ast.Call):
-                            func = get_func_name(node.value.func)
-                            if func == "input":
-                                user_inputs[target.id] = True
-
-            # Track sys.argv usage
-            if isinstance(node, ast.Call):
-                func = get_func_name(node.func)
-                if func == "__getitem__" and isinstance(node.func, ast.Attribute):
-                    if isinstance(node.func.value, ast.Attribute):
-                        if (
-                            isinstance(node.func.value.value, ast.Name)
-                            and node.func.value.value.id == "sys"
-                            and node.func.value.attr == "argv"
-                        ):
-                            # sys.argv used - check if it's in a path operation
-                            parent_call = node
-                            for parent in ast.walk(tree):
-                                if isinstance(parent, ast.Call):
-                                    for arg in parent.args:
-                                        if arg == node:
-                                            path_func = get_func_name(parent.func)
-                                            if path_func in (
-                                                "listdir",
-                                                "chdir",
-                                                "open",
-                                                "exists",
-                                                "isdir",
-                                                "isfile",
-                                                "walk",
-                                            ):
-                                                errors.append(
-                                                    f"Line {parent.lineno}: sys.argv used in path operation"
-                                                )
+    def _looks_like_path(self, node) -> bool:
+        """Check if AST node involves path operations."""
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            return self._looks_like_path(node.left) or self._looks_like_path(
+                node.right
+            )
+        if isinstance(node, ast.JoinedStr):
+            return any(
+                (
+                    isinstance(v, ast.Constant)
+                    and isinstance(v.value, str)
+                    and ("/" in v.value or "\\" in v.value or ":" in v.value)
+                )
+                for v in node.values
+            )
+        if isinstance(node, ast.Call):
+            func = get_func_name(node.func)
+            return func in ("join", "path.join")
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return "/" in node.value or "\\" in node.value or ":" in node.value
+        return False
 
-            # Check path operations that use user input
-            if isinstance(node, ast.Call):
-                func = get_func_name(node.func)
-                if func in (
-                    "listdir",
-                    "chdir",
-                    "open",
-                    "exists",
-                    "isdir",
-                    "isfile",
-                    "walk",
-                ):
-                    for arg in node.args:
-                        if uses_user_input(arg):
-                            check_path_dangers(arg, node.lineno)
-                        elif looks_like_path(arg):
-                            check_path_dangers(arg, node.lineno)
+    def _uses_user_input(self, node) -> bool:
+        """Check if expression uses any user input variables."""
+        if isinstance(node, ast.Name):
+            return node.id in self.user_inputs
+        if isinstance(node, ast.Attribute):
+            return self._uses_user_input(node.value)
+        if isinstance(node, ast.BinOp):
+            return self._uses_user_input(node.left) or self._uses_user_input(
+                node.right
+            )
+        if isinstance(node, ast.Call):
+            return any(self._uses_user_input(arg) for arg in node.args)
+        return False
 
-        return errors
 
-    except ImportError:
-        return ["Z3 not installed - run: pip install z3-solver"]
+def check_with_z3(code: str, use_solver: bool = False) -> list[str]:
+    """Check code using Z3 symbolic path analysis - only path-related issues."""
+    try:
+        tree = ast.parse(code)
     except SyntaxError:
         return []
+    collector = Z3PathCollector(use_solver)
+    PathScanner([collector]).scan(tree)
+    return collector.errors
 
 
 def check_path_concatenation(code: str) -> list[str]:
@@ -203,6 +263,14 @@ class DynamicPathAnalyzer(ast.NodeVisitor):
         self.user_input_vars = set()
 
     def visit_Assign(self, node) -> None:
+        self.handle_Assign(node)
+        self.generic_visit(node)
+
+    def visit_Call(self, node) -> None:
+        self.handle_Call(node)
+        self.generic_visit(node)
+
+    def handle_Assign(self, node) -> None:
         if isinstance(node.value, ast.Call):
             func_name = self._get_func_name(node.value.func)
             if func_name == "input":
@@ -234,20 +302,10 @@ class DynamicPathAnalyzer(ast.NodeVisitor):
                     f"Line {node.lineno}: f-string builds path with user input"
                 )
 
-        self.generic_visit(node)
-
-    def visit_Call(self, node) -> None:
+    def handle_Call(self, node) -> None:
         func_name = self._get_func_name(node.func)
 
-        if func_name in (
-            "listdir",
-            "chdir",
-            "open",
-            "exists",
-            "isdir",
-            "isfile",
-            "walk",
-        ):
+        if func_name in PATH_OPERATIONS:
             for arg in node.args:
                 if self._uses_user_input(arg):
                     self.errors.append(
@@ -263,8 +321,6 @@ class DynamicPathAnalyzer(ast.NodeVisitor):
                     )
                     break
 
-        self.generic_visit(node)
-
     def _get_func_name(self, node) -> str:
         if isinstance(node, ast.Name):
             return node.id
@@ -313,7 +369,7 @@ def check_dynamic_path(code: str) -> list[str]:
     try:
         tree = ast.parse(code)
         analyzer = DynamicPathAnalyzer()
-        analyzer.visit(tree)
+        PathScanner([analyzer]).scan(tree)
         return analyzer.errors
     except SyntaxError:
         return []
@@ -331,18 +387,200 @@ def analyze_dynamic_paths(code: str) -> list[str]:
 
 
 # ----- Static Analysis ------
+# The Windows path rules, compiled once. One regex pass finds every character
+# a rule cares about, and the rules are then decided from that small set.
+WINDOWS_ILLEGAL_CHARS = frozenset('<>"|?*')
+WINDOWS_RESERVED_NAMES = frozenset(
+    {"CON", "PRN", "AUX", "NUL"}
+    | {f"COM{i}" for i in range(1, 10)}
+    | {f"LPT{i}" for i in range(1, 10)}
+)
+_PATH_SIGNALS = re.compile(r'[<>"|?*/\\:]')
+_PATH_SEPARATORS = frozenset("/\\:")
+
+# Rule id -> message, in the order the rules are reported
+PATH_RULES = {
+    "unc": "UNC path '{raw}' cannot be used as a current directory in Windows CMD",
+    "illegal_chars": "Path '{raw}' contains illegal Windows characters",
+    "mixed_slashes": "Path '{raw}' mixes slash styles",
+    "missing_drive": "Path '{raw}' is missing a drive letter",
+    "reserved_name": "Path '{raw}' uses reserved Windows device name '{base}'",
+}
+
+
+def _reserved_base(path: str) -> str:
+    """Gets the last path component, split on either slash, in upper case."""
+    return path[max(path.rfind("/"), path.rfind("\\")) + 1 :].upper()
+
+
+def classify_windows_path(path: str, require_drive: bool = True) -> list[str] | None:
+    """
+    Finds every Windows rule a path breaks, in one pass over the string.
+
+    Returns None when the string has no slash or colon and so is not treated
+    as a path, otherwise the ids of the broken PATH_RULES, in rule order.
+    """
+    signals = set(_PATH_SIGNALS.findall(path))
+    if signals.isdisjoint(_PATH_SEPARATORS):
+        return None
+
+    path = path.strip()
+    violations = []
+    is_unc = path.startswith("\\\\")
+    if is_unc:
+        violations.append("unc")
+    if not signals.isdisjoint(WINDOWS_ILLEGAL_CHARS):
+        violations.append("illegal_chars")
+    if "/" in signals and "\\" in signals:
+        violations.append("mixed_slashes")
+    if require_drive and not is_unc and ":" not in signals and not path.startswith("/"):
+        violations.append("missing_drive")
+    if _reserved_base(path) in WINDOWS_RESERVED_NAMES:
+        violations.append("reserved_name")
+    return violations
+
+
+def format_path_violation(rule: str, raw: str) -> str:
+    """Builds the message for one broken rule."""
+    base = _reserved_base(raw.strip()) if rule == "reserved_name" else ""
+    return PATH_RULES[rule].format(raw=raw, base=base)
+
+
+class ExistenceCache:
+    """
+    Remembers which folders exist, so repeated paths are not stat'ed again.
+
+    Paths are keyed by their normalized absolute form. The first lookup in a
+    folder lists its parent once with os.scandir, which answers every sibling
+    lookup after it, a big saving on network shares. Answers expire after
+    ttl seconds, and invalidate() drops them early when the disk is known to
+    have changed. One instance can be shared by several threads.
+    """
+
+    MAX_LISTINGS = 4096
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self._answers = {}
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def isdir(self, path: str) -> bool:
+        """Checks if path is an existing folder, like os.path.isdir."""
+        now = time.monotonic()
+        # Tries the path exactly as given first, which skips normalizing it
+        with self._lock:
+            answer = self._answers.get(path)
+            if answer is not None and now - answer[1] < self.ttl:
+                return answer[0]
+
+        key = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is not None and now - answer[1] < self.ttl:
+                self._answers[path] = answer
+                return answer[0]
+
+        parent, name = os.path.split(key)
+        result = None
+        if name:
+            subfolders = self._subfolders(parent, now)
+            if subfolders is not None:
+                result = name in subfolders
+        if result is None:
+            # The parent could not be listed, so the path is checked directly
+            result = os.path.isdir(key)
+
+        with self._lock:
+            if len(self._answers) >= self.MAX_LISTINGS * 16:
+                self._answers.clear()
+            self._answers[key] = self._answers[path] = (result, now)
+        return result
+
+    def _subfolders(self, parent: str, now: float) -> frozenset | None:
+        """Gets the normalized names of parent's subfolders, listing it if stale."""
+        with self._lock:
+            listing = self._listings.get(parent)
+            if listing is not None and now - listing[1] < self.ttl:
+                return listing[0]
+
+        try:
+            with os.scandir(parent) as entries:
+                subfolders = frozenset(
+                    os.path.normcase(entry.name) for entry in entries if entry.is_dir()
+                )
+        except (FileNotFoundError, NotADirectoryError):
+            # Nothing can exist inside a missing folder
+            subfolders = frozenset()
+        except OSError:
+            return None
+
+        with self._lock:
+            if len(self._listings) >= self.MAX_LISTINGS:
+                self._listings.clear()
+            self._listings[parent] = (subfolders, now)
+        return subfolders
+
+    def invalidate(self, path: str | None = None) -> None:
+        """Forgets one path and its parent's listing, or everything without a path."""
+        with self._lock:
+            if path is None:
+                self._answers.clear()
+                self._listings.clear()
+                return
+            key = os.path.normcase(os.path.abspath(path))
+            # Answers may also be stored under the path as it was first given
+            for raw in [raw for raw in self._answers if raw != key]:
+                if os.path.normcase(os.path.abspath(raw)) == key:
+                    del self._answers[raw]
+            self._answers.pop(key, None)
+            self._listings.pop(key, None)
+            self._listings.pop(os.path.dirname(key), None)
+
+
+_existence_cache = None
+
+
+def get_existence_cache() -> ExistenceCache:
+    """Gets the existence cache shared by every analyzer in this process."""
+    global _existence_cache
+    if _existence_cache is None:
+        _existence_cache = ExistenceCache()
+    return _existence_cache
+
+
 class FileSystem_Analyzer(ast.NodeVisitor):
     """Analyzes Python code for filesystem directory usage."""
 
-    def __init__(self, root: Any = None):
+    def __init__(
+        self,
+        root: Any = None,
+        existence_cache: Any = None,
+        defer_existence: bool = False,
+    ):
         """Creates an instance of the class."""
         self.root = root if root else os.getcwd()
         self.errors = []
+        self.existence_cache = existence_cache or get_existence_cache()
+        # Records [position in errors, prefix, folder] in existence_checks
+        # instead of checking the disk, so cached findings never hold an
+        # answer that depends on the disk
+        self.defer_existence = defer_existence
+        self.existence_checks = []
 
     def visit_Call(self, node) -> None:
         """Visits a node in the code passed in for ast."""
+        self.handle_Call(node)
+        self.generic_visit(node)
+
+    def handle_Call(self, node) -> None:
+        """Checks a single call node, used directly by PathScanner."""
         # Detects os.listdir("folder")
-        if isinstance(node.func, ast.Attribute) and node.func.attr == "listdir":
+        if (
+            isinstance(node.func, ast.Attribute)
+            and node.func.attr == "listdir"
+            and node.args
+        ):
             folder = self._extract_string(node.args[0])
             if folder:
                 self._check(folder, node.lineno)
@@ -353,6 +591,7 @@ class FileSystem_Analyzer(ast.NodeVisitor):
                 if (
                     isinstance(node.func.value.func, ast.Name)
                     and node.func.value.func.id == "Path"
+                    and node.func.value.args
                 ):
                     folder = self._extract_string(node.func.value.args[0])
                     if folder:
@@ -365,8 +604,6 @@ class FileSystem_Analyzer(ast.NodeVisitor):
                 if folder:
                     self._check(folder, node.lineno)
 
-        self.generic_visit(node)
-
     def _extract_string(self, node) -> str | None:
         """Extracts a string value from and ast node."""
         if isinstance(node, ast.Constant) and isinstance(node.value, str):
@@ -375,98 +612,29 @@ class FileSystem_Analyzer(ast.NodeVisitor):
 
     def _check(self, folder: str, lineno: int) -> None:
         """Checks for inconsistencies with Windows path commands."""
-        if not any(c in folder for c in "/\\:"):
-            return
-
-        # Puts the original folder value into a variable for printing error messages
-        raw = folder
-        # Cleans up folder value to fit expected conditions for checking paths
-        folder = folder.strip()
-
-        # Detects UNC path using a string function and the pattern used to find UNC paths
-        if folder.startswith("\\\\"):
-            # This is used for path commands being checked as the fake line number being employed is 0
-            if lineno == 0:
-                self.errors.append(
-                    f"UNC path '{raw}' cannot be used as a current directory in Windows CMD"
-                )
-            else:
-                self.errors.append(
-                    f"Line {lineno}: UNC path '{raw}' cannot be used as a current directory in Windows CMD"
-                )
-            return
-
-        # Detects illegal characters using a set containing all illegal characters
-        illegal_chars = set('<>"|?*')
-        if any(c in illegal_chars for c in folder):
-            # This is used for path commands being checked as the fake line number being employed is 0
-            if lineno == 0:
-                self.errors.append(f"Path '{raw}' contains illegal Windows characters")
-            else:
-                self.errors.append(
-                    f"Line {lineno}: Path '{raw}' contains illegal Windows characters"
-                )
-            return
-
-        # Detects mixed slashes using a functionality of strings
-        if "/" in folder and "\\" in folder:
-            # This is used for path commands being checked as the fake line number being employed is 0
-            if lineno == 0:
-                self.errors.append(f"Path '{raw}' mixes slash styles")
-            else:
-                self.errors.append(f"Line {lineno}: Path '{raw}' mixes slash styles")
-            return
-
-        # Detects missing drive letter using a string function
         # For Python file analysis (lineno > 0), always require drive letters
         # For command line analysis (lineno == 0), allow relative paths if root is provided
-        if (
-            not folder.startswith("\\\\")
-            and ":" not in folder
-            and (lineno > 0 or (lineno == 0 and not self.root))
-            and not folder.startswith("/")
-        ):
-            # This is used for path commands being checked as the fake line number being employed is 0
-            if lineno == 0:
-                self.errors.append(f"Path '{raw}' is missing a drive letter")
-            else:
-                self.errors.append(
-                    f"Line {lineno}: Path '{raw}' is missing a drive letter"
-                )
+        violations = classify_windows_path(folder, lineno > 0 or not self.root)
+        if violations is None:
             return
 
-        # Detects reserved names using a dictionary containing all reserved device names
-        reserved = {
-            "CON",
-            "PRN",
-            "AUX",
-            "NUL",
-            *(f"COM{i}" for i in range(1, 10)),
-            *(f"LPT{i}" for i in range(1, 10)),
-        }
-        base = os.path.basename(folder).upper()
-        if base in reserved:
-            # This is used for path commands being checked as the fake line number being employed is 0
-            if lineno == 0:
-                self.errors.append(
-                    f"Path '{raw}' uses reserved Windows device name '{base}'"
-                )
-            else:
-                self.errors.append(
-                    f"Line {lineno}: Path '{raw}' uses reserved Windows device name '{base}'"
-                )
+        # This is used for path commands being checked as the fake line number being employed is 0
+        prefix = f"Line {lineno}: " if lineno else ""
+        if violations:
+            for rule in violations:
+                self.errors.append(prefix + format_path_violation(rule, folder))
             return
 
         # Resolves the path using os package
-        full = os.path.abspath(os.path.join(self.root, folder))
+        full = os.path.abspath(os.path.join(self.root, folder.strip()))
 
-        # Does an existence check using os
-        if not os.path.isdir(full):
-            # This is used for path commands being checked as the fake line number being employed is 0
-            if lineno == 0:
-                self.errors.append(f"Folder does not exist -> {full}")
-            else:
-                self.errors.append(f"Line {lineno}: Folder does not exist -> {full}")
+        if self.defer_existence:
+            self.existence_checks.append([len(self.errors), prefix, full])
+            return
+
+        # Does an existence check through the cache shared by every analyzer
+        if not self.existence_cache.isdir(full):
+            self.errors.append(f"{prefix}Folder does not exist -> {full}")
 
 
 def extract_path_from_command(cmd: str) -> str:
@@ -493,7 +661,537 @@ def validate_windows_path(path: str, root: str = "") -> list[str]:
     return analyzer.errors
 
 
-def analyze_folder_access(input_path: str, root: str = "") -> None:
+# ----- Streaming Path Ingestion -----
+PATH_RECORD_FORMATS = ("lines", "csv", "jsonl")
+
+
+def guess_path_format(source: str) -> str:
+    """Guesses a record format from a file extension, defaulting to plain lines."""
+    extension = os.path.splitext(source)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "lines"
+
+
+def read_path_records(
+    stream: Iterable[str], fmt: str = "lines", column: str | None = None
+) -> Iterator[dict]:
+    """
+    Yields {"record", "command"} or {"record", "error"} for each input record.
+
+    lines: one command per line, skipping blank lines.
+    csv: a header row, then the command in column, a header name or a 0-based
+    index (default: the first column).
+    jsonl: one JSON object per line, the command under key column (default:
+    "command").
+    Records are read one at a time, so memory use does not grow with input size.
+    """
+    if fmt == "lines":
+        for number, line in enumerate(stream, 1):
+            command = line.strip()
+            if command:
+                yield {"record": number, "command": command}
+
+    elif fmt == "csv":
+        import csv
+
+        rows = csv.reader(stream)
+        try:
+            header = next(rows, None)
+        except csv.Error as e:
+            raise ValueError(f"Invalid CSV header: {e}") from e
+        if header is None:
+            return
+        if column is None:
+            index = 0
+        elif column.isdigit():
+            index = int(column)
+        elif column in header:
+            index = header.index(column)
+        else:
+            raise ValueError(f"Column '{column}' is not in the CSV header")
+        number = 0
+        while True:
+            number += 1
+            # A bad row, such as one over csv.field_size_limit(), is skipped
+            # like an invalid JSONL line instead of ending the stream
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield {"record": number, "error": f"Invalid CSV: {e}"}
+                continue
+            if index < len(row):
+                yield {"record": number, "command": row[index]}
+            else:
+                yield {"record": number, "error": f"Row has no column {index}"}
+
+    elif fmt == "jsonl":
+        import json
+
+        key = column or "command"
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                yield {"record": number, "error": f"Invalid JSON: {e}"}
+                continue
+            if not isinstance(value, dict) or not isinstance(value.get(key), str):
+                yield {"record": number, "error": f"No string field '{key}'"}
+                continue
+            yield {"record": number, "command": value[key]}
+
+    else:
+        raise ValueError(f"Unknown path record format: {fmt}")
+
+
+def validate_path_records(records: Iterable[dict], root: str = "") -> Iterator[dict]:
+    """Adds the extracted path and its errors to each record, one at a time."""
+    for record in records:
+        if "command" in record:
+            record["path"] = extract_path_from_command(record["command"])
+            record["errors"] = validate_windows_path(record["path"], root)
+        yield record
+
+
+def analyze_paths_from(
+    source: str,
+    root: str = "",
+    fmt: str | None = None,
+    column: str | None = None,
+    out: Any = None,
+) -> int:
+    """
+    Streams path commands from a file, or stdin when source is "-", and
+    writes one JSON result line per record as soon as it is checked.
+
+    Returns the number of records with errors.
+    """
+    import json
+    import sys
+
+    out = out or sys.stdout
+    fmt = fmt or ("lines" if source == "-" else guess_path_format(source))
+    stream = (
+        sys.stdin
+        if source == "-"
+        else open(source, "r", encoding="utf-8", errors="replace", newline="")
+    )
+    flagged = 0
+    try:
+        for record in validate_path_records(
+            read_path_records(stream, fmt, column), root
+        ):
+            if record.get("errors") or "error" in record:
+                flagged += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return flagged
+
+
+# ----- Bulk Path Validation -----
+# Each rule in PATH_RULES gets one bit in a path's flags byte, in rule order
+RULE_BITS = {rule: 1 << i for i, rule in enumerate(PATH_RULES)}
+NOT_A_PATH = 1 << len(PATH_RULES)
+BULK_CHUNK_SIZE = 65_536
+# NumPy stores every string of a chunk at the width of the longest one, so
+# paths longer than this (Windows MAX_PATH), or than 4 times the chunk's
+# median, are classified one by one instead. So are paths holding a NUL,
+# which NumPy drops from the end of fixed-width strings
+BULK_LONG_PATH = 260
+
+
+class PathValidationResults:
+    """
+    Columnar results of validate_windows_paths, one flags byte per path.
+
+    Each broken rule sets its RULE_BITS bit, and strings with no slash or
+    colon (not treated as paths) have only NOT_A_PATH set. flags is a NumPy
+    uint8 array when NumPy did the work, otherwise an array.array("B").
+    """
+
+    def __init__(self, flags: Any):
+        self.flags = flags
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def column(self, rule: str) -> list[bool]:
+        """Gets one rule's column: whether each path breaks it."""
+        bit = RULE_BITS[rule]
+        return [bool(flag & bit) for flag in self.flags]
+
+    def violations(self, index: int) -> list[str]:
+        """Gets the ids of the rules one path breaks, in rule order."""
+        flag = int(self.flags[index])
+        return [rule for rule, bit in RULE_BITS.items() if flag & bit]
+
+    def counts(self) -> dict[str, int]:
+        """Counts the paths that break each rule."""
+        counts = dict.fromkeys(RULE_BITS, 0)
+        for flag, total in zip(*_flag_histogram(self.flags)):
+            for rule, bit in RULE_BITS.items():
+                if flag & bit:
+                    counts[rule] += total
+        return counts
+
+
+def _flag_histogram(flags: Any) -> tuple[list[int], list[int]]:
+    """Counts each distinct flags value, there being at most a few dozen."""
+    if hasattr(flags, "dtype"):
+        import numpy as np
+
+        values, totals = np.unique(flags, return_counts=True)
+        return values.tolist(), totals.tolist()
+    from collections import Counter
+
+    histogram = Counter(flags)
+    return list(histogram), list(histogram.values())
+
+
+def _chunks(paths: Iterable[str], size: int) -> Iterator[list[str]]:
+    """Splits any iterable of paths into lists of at most size paths."""
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _flags_python(chunk: list[str], require_drive: bool) -> Iterator[int]:
+    """Computes the flags for each path with the compiled classifier."""
+    for path in chunk:
+        violations = classify_windows_path(path, require_drive)
+        if violations is None:
+            yield NOT_A_PATH
+        else:
+            yield sum(RULE_BITS[rule] for rule in violations)
+
+
+def _flags_numpy(chunk: list[str], require_drive: bool) -> Any:
+    """Computes the flags for a whole chunk of paths with NumPy string operations."""
+    import numpy as np
+
+    lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+    limit = max(BULK_LONG_PATH, 4 * int(np.median(lengths))) if len(chunk) else 0
+    one_by_one = lengths > limit
+    one_by_one |= np.fromiter(
+        ("\0" in path for path in chunk), dtype=bool, count=len(chunk)
+    )
+    python_rows = np.flatnonzero(one_by_one)
+    if not len(python_rows):
+        return _flags_numpy_strings(chunk, require_drive)
+    numpy_rows = np.flatnonzero(~one_by_one)
+    flags = np.zeros(len(chunk), dtype=np.uint8)
+    flags[numpy_rows] = _flags_numpy_strings(
+        [chunk[i] for i in numpy_rows], require_drive
+    )
+    flags[python_rows] = list(
+        _flags_python([chunk[i] for i in python_rows], require_drive)
+    )
+    return flags
+
+
+def _flags_numpy_strings(chunk: list[str], require_drive: bool) -> Any:
+    """Computes the flags of paths of similar length in one fixed-width array."""
+    import numpy as np
+
+    paths = np.char.strip(np.array(chunk, dtype=np.str_))
+
+    def contains(text: str) -> Any:
+        return np.char.find(paths, text) >= 0
+
+    forward, back, colon = contains("/"), contains("\\"), contains(":")
+    unc = np.char.startswith(paths, "\\\\")
+    illegal = np.zeros(len(chunk), dtype=bool)
+    for char in WINDOWS_ILLEGAL_CHARS:
+        illegal |= contains(char)
+    missing_drive = ~unc & ~colon & ~np.char.startswith(paths, "/")
+    if not require_drive:
+        missing_drive[:] = False
+    # Reserved names are 3 or 4 characters long, so only paths whose last
+    # component has that length need their name looked up
+    last_slash = np.maximum(np.char.rfind(paths, "\\"), np.char.rfind(paths, "/"))
+    base_length = np.char.str_len(paths) - last_slash - 1
+    reserved = np.zeros(len(chunk), dtype=bool)
+    for i in np.flatnonzero((base_length == 3) | (base_length == 4)).tolist():
+        path = str(paths[i])
+        reserved[i] = path[int(last_slash[i]) + 1 :].upper() in WINDOWS_RESERVED_NAMES
+
+    flags = np.zeros(len(chunk), dtype=np.uint8)
+    flags[unc] |= RULE_BITS["unc"]
+    flags[illegal] |= RULE_BITS["illegal_chars"]
+    flags[forward & back] |= RULE_BITS["mixed_slashes"]
+    flags[missing_drive] |= RULE_BITS["missing_drive"]
+    flags[reserved] |= RULE_BITS["reserved_name"]
+    flags[~(forward | back | colon)] = NOT_A_PATH
+    return flags
+
+
+def validate_windows_paths(
+    paths: Iterable[str], require_drive: bool = True, use_numpy: bool | None = None
+) -> PathValidationResults:
+    """
+    Validates many raw Windows paths at once against the Windows path rules.
+
+    Only the text rules are checked; unlike validate_windows_path, folders
+    are not looked up on disk, which suits paths taken from logs. NumPy is
+    used when it is installed (or forced with use_numpy), and the compiled
+    classifier otherwise. Paths are processed in chunks, so any iterable,
+    such as the lines of a large file, can be passed in.
+    """
+    if use_numpy is None:
+        try:
+            import numpy  # noqa: F401
+
+            use_numpy = True
+        except ImportError:
+            use_numpy = False
+
+    if use_numpy:
+        import numpy as np
+
+        parts = [
+            _flags_numpy(chunk, require_drive)
+            for chunk in _chunks(paths, BULK_CHUNK_SIZE)
+        ]
+        flags = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+        return PathValidationResults(flags)
+
+    from array import array
+
+    flags = array("B")
+    for chunk in _chunks(paths, BULK_CHUNK_SIZE):
+        flags.extend(_flags_python(chunk, require_drive))
+    return PathValidationResults(flags)
+
+
+def collect_static_errors(
+    code: str, root: str = "", use_solver: bool = False
+) -> list[str]:
+    """
+    Runs every static rule on Python code with one parse and one AST traversal.
+
+    use_solver checks symbolic paths with Z3 instead of the segment rules,
+    which give the same answers without importing z3.
+    """
+    return resolve_existence_checks(collect_static_findings(code, root, use_solver))
+
+
+def collect_static_findings(
+    code: str, root: str = "", use_solver: bool = False
+) -> dict:
+    """
+    Runs every static rule like collect_static_errors, without touching the disk.
+
+    Returns {"errors", "existence_checks"}: the error messages, and each
+    folder existence check as a [position in errors, prefix, folder] list,
+    for resolve_existence_checks to answer. Only these are safe to cache, as
+    the answers change when folders are created.
+    """
+    # Creates an instance of the FileSystem_Analyzer class
+    analyzer = FileSystem_Analyzer(root, defer_existence=True)
+
+    # Trys to parse as AST first, if fails fall back to string analysis
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        # Falls back to line-by-line string analysis for path extraction
+        lines = code.split("\n")
+        for line_num, line in enumerate(lines, 1):
+            # Finds all string literals in this line
+            strings = re.findall(r'"([^"]*)"', line) + re.findall(r"'([^']*)'", line)
+            for string_literal in strings:
+                if string_literal:  # Only check non-empty strings
+                    analyzer._check(string_literal, lineno=line_num)
+        errors = analyzer.errors + check_path_concatenation(code)
+        return {"errors": errors, "existence_checks": analyzer.existence_checks}
+
+    # Visits the AST once, running the filesystem rules and collecting paths for Z3
+    collector = Z3PathCollector(use_solver)
+    PathScanner([analyzer, collector]).scan(tree)
+    errors = analyzer.errors + check_path_concatenation(code) + collector.errors
+    return {"errors": errors, "existence_checks": analyzer.existence_checks}
+
+
+def resolve_existence_checks(findings: dict) -> list[str]:
+    """Answers the existence checks from collect_static_findings into its errors."""
+    existence_cache = get_existence_cache()
+    errors = list(findings["errors"])
+    # Inserted from the last so earlier positions stay valid, which keeps
+    # the errors in the order the analyzer found them
+    for position, prefix, folder in reversed(findings["existence_checks"]):
+        if not existence_cache.isdir(folder):
+            errors.insert(position, f"{prefix}Folder does not exist -> {folder}")
+    return errors
+
+
+# Bump ANALYZER_VERSION whenever a rule changes what it reports, so cached
+# findings from older versions are not reused
+ANALYZER_VERSION = "4"
+STATIC_RULES = ("filesystem", "path_concatenation", "z3_paths")
+
+_result_cache = None
+_shape_cache = None
+
+
+def get_result_cache() -> Any:
+    """Gets the static analysis result cache shared by this process."""
+    global _result_cache
+    if _result_cache is None:
+        from result_cache import ResultCache, DEFAULT_CACHE_DIR
+
+        _result_cache = ResultCache(os.path.join(DEFAULT_CACHE_DIR, "static.sqlite3"))
+    return _result_cache
+
+
+def get_shape_cache() -> Any:
+    """Gets the on-disk store of Z3 verdicts by path shape, opened on first use."""
+    global _shape_cache
+    if _shape_cache is None:
+        from result_cache import ResultCache, DEFAULT_CACHE_DIR
+
+        from symbolic_class import persist_path_shapes
+
+        _shape_cache = ResultCache(
+            os.path.join(DEFAULT_CACHE_DIR, "z3_shapes.sqlite3")
+        )
+        persist_path_shapes(_shape_cache)
+    return _shape_cache
+
+
+def analyze_file(
+    script_path: str, root: str = "", use_cache: bool = True, use_solver: bool = False
+) -> list[str]:
+    """Runs static analysis on one Python file and returns the errors found."""
+    try:
+        with open(script_path, "r", encoding="utf-8") as f:
+            code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return [f"Could not read file: {e}"]
+
+    try:
+        return _analyze_code(code, root, use_cache, use_solver)
+    except Exception as e:
+        # One submission that trips up a rule must not abort a whole directory scan
+        return [f"Could not analyze file: {type(e).__name__}: {e}"]
+
+
+def _analyze_code(code: str, root: str, use_cache: bool, use_solver: bool) -> list[str]:
+    """Runs static analysis on the code of one file, through the result cache."""
+    if not use_cache:
+        return collect_static_errors(code, root, use_solver)
+
+    import hashlib
+    from result_cache import make_key
+
+    # The root is part of the key because missing-folder findings are resolved against it
+    key = make_key(
+        hashlib.sha256(code.encode("utf-8")).hexdigest(),
+        ANALYZER_VERSION,
+        ",".join(STATIC_RULES),
+        os.path.abspath(root or os.getcwd()),
+        "z3" if use_solver else "segments",
+    )
+    cache = get_result_cache()
+    findings = cache.get(key)
+    if findings is None:
+        if use_solver:
+            # Z3 verdicts for repeated path shapes are kept across runs too
+            get_shape_cache()
+        findings = collect_static_findings(code, root, use_solver)
+        cache.put(key, findings)
+    # Folder existence is checked again on every run, as it depends on the disk
+    return resolve_existence_checks(findings)
+
+
+def find_python_files(directory: str) -> list[str]:
+    """Finds every .py file under a directory in a stable, sorted order."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        # Skips hidden folders, caches and virtual environments
+        dirnames[:] = sorted(
+            d
+            for d in dirnames
+            if not d.startswith(".")
+            and d != "__pycache__"
+            and not os.path.exists(os.path.join(dirpath, d, "pyvenv.cfg"))
+        )
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                paths.append(os.path.join(dirpath, name))
+    return paths
+
+
+def scan_directory(
+    directory: str,
+    root: str = "",
+    jobs: int | None = None,
+    use_cache: bool = True,
+    use_solver: bool = False,
+) -> dict[str, list[str]]:
+    """Runs static analysis on every Python file under a directory across a process pool."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = find_python_files(directory)
+
+    # Small scans and --jobs 1 are not worth starting worker processes for
+    if jobs == 1 or len(paths) < 2:
+        return {
+            path: analyze_file(path, root, use_cache, use_solver) for path in paths
+        }
+
+    workers = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # executor.map keeps input order, so results come back in sorted path order
+        results = executor.map(
+            analyze_file,
+            paths,
+            [root] * len(paths),
+            [use_cache] * len(paths),
+            [use_solver] * len(paths),
+            chunksize=chunksize,
+        )
+        return dict(zip(paths, results))
+
+
+def analyze_directory_access(
+    directory: str,
+    root: str = "",
+    jobs: int | None = None,
+    use_cache: bool = True,
+    use_solver: bool = False,
+) -> dict[str, list[str]]:
+    """Runs static analysis on every Python file in a directory tree and prints the issues."""
+    results = scan_directory(directory, root, jobs, use_cache, use_solver)
+
+    flagged = 0
+    for path, errors in results.items():
+        if errors:
+            flagged += 1
+            print(f"\nIssues found in {os.path.relpath(path, directory)}:")
+            for err in errors:
+                print(" -", err)
+
+    print(f"\nScanned {len(results)} files, {flagged} with path issues.")
+    return results
+
+
+def analyze_folder_access(
+    input_path: str, root: str = "", use_cache: bool = True, use_solver: bool = False
+) -> list[str]:
     """Runs static analysis on either Python code or a path command for possible Windows pathing errors."""
     # Assigns input_path to a function specific variable user_input
     user_input = input_path
@@ -501,31 +1199,9 @@ def analyze_folder_access(input_path: str, root: str = "") -> None:
     # 1. If input is a file → it is treated as Python code and uses AST
     # If input is a file, it is open and read using utf-8 encoding
     if os.path.isfile(user_input):
-        with open(user_input, "r", encoding="utf-8") as f:
-            code = f.read()
-
-        # Creates an instance of the FileSystem_Analyzer class and visits the AST of the code
-        analyzer = FileSystem_Analyzer(root)
-
-        # Trys to parse as AST first, if fails fall back to string analysis
-        try:
-            analyzer.visit(ast.parse(code))
-        except SyntaxError:
-            # Falls back to line-by-line string analysis for path extraction
-            lines = code.split("\n")
-            for line_num, line in enumerate(lines, 1):
-                # Finds all string literals in this line
-                strings = re.findall(r'"([^"]*)"', line) + re.findall(
-                    r"'([^']*)'", line
-                )
-                for string_literal in strings:
-                    if string_literal:  # Only check non-empty strings
-                        analyzer._check(string_literal, lineno=line_num)
-
-        # Run symbolic/dynamic path analysis
+        # Runs the filesystem rules and the symbolic/dynamic path rules together
         print("\nRunning dynamic path analysis...")
-        dynamic_errors = analyze_dynamic_paths(code)
-        all_errors = analyzer.errors + dynamic_errors
+        all_errors = analyze_file(user_input, root, use_cache, use_solver)
 
         # If the analyzer, an instance of the FileSystem_Analyzer class, has any errors, they are printed out
         if all_errors:
@@ -534,7 +1210,7 @@ def analyze_folder_access(input_path: str, root: str = "") -> None:
                 print(" -", err)
         else:
             print("No folder path issues detected.")
-        return
+        return all_errors
 
     # 2. Otherwise → treats input as a path command and focuses on validating the path
     # The path is extracted from the command input
@@ -549,6 +1225,7 @@ def analyze_folder_access(input_path: str, root: str = "") -> None:
             print(" -", err)
     else:
         print("No path issues detected.")
+    return errors
 
 
 # ----------------------------
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Dynamic Analysis Scheduler
+
+Runs many scripts through dynamic analysis at once without letting any one
+of them stall the run. A bounded number of sandbox workers run scripts in
+parallel, and every script gets:
+
+- a wall-clock timeout, after which it is killed and reported as "Timeout"
+- a CPU-seconds budget (RLIMIT_CPU) and an address-space cap (RLIMIT_AS)
+  on POSIX systems
+- a closed stdin, or the text of a fixture file, so input() never blocks
+- optionally, an emulated Windows filesystem in place of the real disk
+"""
+
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from sandbox_worker import SandboxWorker
+
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MEMORY_LIMIT_MB = 1024
+
+
+class DynamicScheduler:
+    """Runs scripts concurrently on a bounded set of sandbox workers."""
+
+    def __init__(
+        self,
+        python_executable: str,
+        jobs: Optional[int] = None,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        cpu_limit: Optional[float] = None,
+        memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+        stdin: str = "",
+        virtual_fs: Optional[dict] = None,
+    ):
+        self.python_executable = python_executable
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.timeout = timeout
+        # A script cannot use more CPU than wall-clock time on one core
+        self.cpu_limit = cpu_limit if cpu_limit is not None else timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.stdin = stdin
+        self.virtual_fs = virtual_fs
+
+    def run(
+        self, scripts: Iterable[str], args: Iterable[str] = ()
+    ) -> Iterator[tuple[str, dict]]:
+        """Yields (script, result record) pairs in the order the scripts were given."""
+        args = list(args)
+        workers = queue.Queue()
+        for _ in range(self.jobs):
+            workers.put(
+                SandboxWorker(
+                    self.python_executable, memory_limit_mb=self.memory_limit_mb
+                )
+            )
+
+        def run_one(script: str) -> tuple[str, dict]:
+            worker = workers.get()
+            try:
+                return script, worker.run(
+                    script,
+                    args,
+                    stdin=self.stdin,
+                    timeout=self.timeout,
+                    cpu_limit=self.cpu_limit,
+                    virtual_fs=self.virtual_fs,
+                )
+            except OSError as e:
+                return script, {
+                    "stdout": "",
+                    "stderr": "",
+                    "exit_code": None,
+                    "exception": {
+                        "type": "WorkerError",
+                        "message": str(e),
+                        "filename": script,
+                        "lineno": None,
+                        "traceback": "",
+                    },
+                    "accesses": [],
+                    "max_rss_kb": None,
+                }
+            finally:
+                workers.put(worker)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                yield from executor.map(run_one, scripts)
+        finally:
+            while not workers.empty():
+                workers.get().close()
+
+
+__all__ = ["DynamicScheduler", "DEFAULT_TIMEOUT", "DEFAULT_MEMORY_LIMIT_MB"]
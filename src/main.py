@@ -1,13 +1,22 @@
 # main.py
 import argparse
 import os
+import sys
 from pathlib import Path
-from detect_static import analyze_folder_access
-from detect_dynamic import dynamic_analyzer
-from OpenCode_runner import run_opencode_prompt_sync
+
+# The analysis engines and OpenCode_runner (asyncio, acp) are imported inside
+# main() only on the branch that needs them, so quick path command checks
+# stay fast to start. test_suite/test_import_time.py enforces the budget.
 
 
 def main():
+    # `winclean serve` starts the long-running analysis server instead
+    if sys.argv[1:2] == ["serve"]:
+        from winclean_server import serve_main
+
+        serve_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="WinClean - Windows Path Cleaning Engine"
     )
@@ -23,7 +32,81 @@ def main():
     parser.add_argument("--script-path", help="Python script file")
     parser.add_argument("--path-command", help="Command path for static analysis")
     parser.add_argument(
-        "--venv", help="Virtual environment path (required for dynamic)"
+        "--paths-from",
+        metavar="FILE",
+        help="Stream path commands from a file, or - for stdin, and print JSON "
+        "results (static)",
+    )
+    parser.add_argument(
+        "--paths-format",
+        choices=["lines", "csv", "jsonl"],
+        help="Record format for --paths-from (default: from the file extension)",
+    )
+    parser.add_argument(
+        "--column",
+        help="CSV column name or index, or JSONL key, holding each command",
+    )
+    parser.add_argument(
+        "--path-commands",
+        help="File of path commands, one per line, or - for stdin (dynamic batch)",
+    )
+    parser.add_argument(
+        "--scan-dir", help="Directory to scan recursively for Python files"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes for --scan-dir (default: CPU count)",
+    )
+    parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="Send every file flagged by a static --scan-dir to OpenCode",
+    )
+    parser.add_argument(
+        "--fix-jobs",
+        type=int,
+        default=4,
+        help="Number of OpenCode agents fixing files at once with --fix",
+    )
+    parser.add_argument(
+        "--refresh-fixes",
+        action="store_true",
+        help="Ask OpenCode again instead of reusing cached fixes",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Seconds a script may run in dynamic mode before it is killed",
+    )
+    parser.add_argument(
+        "--stdin-file",
+        help="File whose text is fed to input() in dynamic mode (default: none)",
+    )
+    parser.add_argument(
+        "--solver",
+        choices=["segments", "z3"],
+        default="segments",
+        help="Decide symbolic path questions with the built-in segment rules or "
+        "with the Z3 solver (static; default: segments)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-analyze every file instead of reusing cached static results",
+    )
+    parser.add_argument(
+        "--windows-fs",
+        nargs="?",
+        const="",
+        metavar="MANIFEST",
+        help="Run dynamic checks against an emulated Windows filesystem, "
+        "optionally seeded from a JSON manifest",
+    )
+    parser.add_argument(
+        "--venv",
+        help="Virtual environment path for dynamic mode (default: a pooled sandbox)",
     )
 
     args = parser.parse_args()
@@ -41,6 +124,109 @@ def main():
         script_path = validate_and_normalize_path(args.script_path)
         path_command = args.path_command  # Don't validate - it's a command string
         venv = validate_and_normalize_path(args.venv)
+        scan_dir = validate_and_normalize_path(args.scan_dir)
+
+        use_solver = args.solver == "z3"
+        if use_solver and args.mode != "static":
+            raise ValueError("--solver z3 is only supported in static mode")
+
+        # Loads the emulated Windows filesystem; {} means the default tree
+        virtual_fs = None
+        if args.windows_fs is not None:
+            if args.mode != "dynamic":
+                raise ValueError("--windows-fs is only supported in dynamic mode")
+            virtual_fs = {}
+            if args.windows_fs:
+                import json
+
+                with open(validate_and_normalize_path(args.windows_fs)) as f:
+                    virtual_fs = json.load(f)
+
+        if args.jobs is not None and args.jobs < 1:
+            raise ValueError("--jobs must be at least 1")
+        if args.timeout <= 0:
+            raise ValueError("--timeout must be greater than 0")
+        if args.fix_jobs < 1:
+            raise ValueError("--fix-jobs must be at least 1")
+
+        # Scans a directory tree and reports per file; OpenCode only runs with --fix
+        if scan_dir:
+            if args.fix and args.mode != "static":
+                raise ValueError("--fix is only supported with a static --scan-dir")
+
+            if args.mode == "dynamic":
+                from detect_dynamic_analysis import analyze_directory_dynamic
+
+                print("Running dynamic analysis...")
+                analyze_directory_dynamic(
+                    scan_dir,
+                    root or "",
+                    venv or "",
+                    args.jobs,
+                    args.timeout,
+                    validate_and_normalize_path(args.stdin_file),
+                    virtual_fs,
+                )
+                print("Analysis complete.")
+                return
+
+            from detect_static_analysis import analyze_directory_access
+
+            print("Running static analysis...")
+            results = analyze_directory_access(
+                scan_dir, root or "", args.jobs, not args.no_cache, use_solver
+            )
+            print("Analysis complete.")
+
+            # Fixes every flagged file on one pool of long-lived agents
+            flagged = {path: errors for path, errors in results.items() if errors}
+            if args.fix and flagged:
+                from OpenCode_runner import fix_files_sync
+
+                print(f"Fixing {len(flagged)} files with OpenCode...")
+                fixes = fix_files_sync(
+                    {path: "\n".join(errors) for path, errors in flagged.items()},
+                    args.fix_jobs,
+                    refresh=args.refresh_fixes,
+                    root=root or "",
+                )
+                for path, fix in fixes.items():
+                    print(f"\nFix for {os.path.relpath(path, scan_dir)}:")
+                    print(fix.rstrip())
+            return
+
+        # Streams records through the static path rules, printing JSON as it goes
+        if args.paths_from:
+            if args.mode != "static":
+                raise ValueError("--paths-from is only supported in static mode")
+
+            from detect_static_analysis import analyze_paths_from
+
+            source = args.paths_from
+            if source != "-":
+                source = validate_and_normalize_path(source)
+            flagged = analyze_paths_from(
+                source, root or "", args.paths_format, args.column
+            )
+            # Lets scripts that pipe paths in tell when any of them broke a rule
+            if flagged:
+                sys.exit(1)
+            return
+
+        # Checks many path commands in one sandbox interpreter and streams results
+        if args.path_commands:
+            if args.mode != "dynamic":
+                raise ValueError("--path-commands is only supported in dynamic mode")
+
+            from detect_dynamic_analysis import dynamic_batch_analyzer
+
+            failures = dynamic_batch_analyzer(
+                args.path_commands, venv or "", virtual_fs
+            )
+            # Lets scripts that pipe commands in tell when any of them failed
+            if failures:
+                sys.exit(1)
+            return
 
         input_path = (
             script_path or path_command
@@ -52,28 +238,52 @@ def main():
                     "--script-path or --path-command required for static mode"
                 )
 
+            from detect_static_analysis import analyze_folder_access
+
             print("Running static analysis...")
             # Pass the original path_command string for command analysis
             if path_command and not script_path:
-                analysis = analyze_folder_access(path_command, root or "")
+                errors = analyze_folder_access(path_command, root or "")
             else:
-                analysis = analyze_folder_access(input_path, root or "")
+                errors = analyze_folder_access(
+                    input_path, root or "", not args.no_cache, use_solver
+                )
+
+            # Nothing to clean, so OpenCode is never started
+            if not errors:
+                print("Analysis complete.")
+                return
+            analysis = "\n".join(errors)
 
         elif args.mode == "dynamic":
             if not input_path:
                 raise ValueError(
                     "--script-path or --path-command required for dynamic mode"
                 )
-            if not venv:
-                raise ValueError("--venv is required for dynamic mode")
+
+            from detect_dynamic_analysis import dynamic_analyzer
 
             print("Running dynamic analysis...")
-            analysis = dynamic_analyzer(input_path, root or "", venv or "")
+            analysis = dynamic_analyzer(
+                input_path,
+                root or "",
+                venv or "",
+                timeout=args.timeout,
+                virtual_fs=virtual_fs,
+                stdin_file=validate_and_normalize_path(args.stdin_file),
+            )
 
         print("Analysis complete.")
+
+        from OpenCode_runner import run_opencode_prompt_sync
+
         print(
             run_opencode_prompt_sync(
-                broken_code=input_path or "", potential_bug=analysis or ""
+                broken_code=input_path or "",
+                potential_bug=analysis or "",
+                analysis_results=analysis or "",
+                refresh=args.refresh_fixes,
+                root=root or "",
             )
         )
 
@@ -0,0 +1,186 @@
+"""
+Rule-Based Path Fixer
+
+Some Windows path findings have a mechanical fix that does not need a
+language model. The fixer walks the tokens of a Python file and rewrites
+only the string literals the static analysis flagged, on the line and with
+the value of the finding, leaving every other character of the file
+(spacing, comments, quote style) as it was:
+
+- mixed slashes become backslashes
+- a fixed path written without an r prefix, such as "C:/data\\logs", is
+  written back as a raw string, r"C:\\data\\logs"
+
+Findings whose fix would change what the path means (illegal characters,
+reserved device names, UNC paths, missing drive letters, missing folders,
+paths built from user input) are left for OpenCode, and so are literals
+holding a real escape such as \\n, \\x41 or \\u00e9, as making them raw
+would change their value.
+"""
+
+import ast
+import io
+import re
+import tokenize
+
+from detect_static_analysis import collect_static_errors, format_path_violation
+
+
+# Rules the fixer can repair without OpenCode; the fixes for illegal
+# characters and reserved names would pick a new name, which is OpenCode's
+# call (glob patterns use *, for one)
+FIXABLE_RULES = ("mixed_slashes",)
+
+_NON_CODE_TOKENS = (tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT)
+_STRING_LITERAL = re.compile(
+    r"(?P<prefix>[A-Za-z]*)(?P<quote>['\"])(?P<body>.*)(?P=quote)\Z", re.S
+)
+# Only literals that start like a Windows path are rewritten: a drive letter
+# and a slash, or the two backslashes of a UNC path
+_WINDOWS_PATH_START = re.compile(r"[A-Za-z]:[\\/]|\\\\[^\\]")
+# An escaped backslash, or an escape that gives a character other than a
+# backslash; any other backslash (\d, or a malformed \U) is kept literally
+_ESCAPE = re.compile(
+    r"\\\\|\\(?:[abfnrtv0-7]|x[0-9A-Fa-f]{2}|u[0-9A-Fa-f]{4}"
+    r"|U[0-9A-Fa-f]{8}|N\{[^}]*\})"
+)
+
+
+def _intended_value(prefix: str, quote: str, body: str) -> str | None:
+    """Gets the path a literal was meant to hold, or None if it is not a path."""
+    if prefix.lower() not in ("", "r", "u"):
+        # Bytes and f-strings are left alone
+        return None
+    if "r" in prefix.lower():
+        value = body
+    else:
+        # Escaped quotes and line continuations are not paths
+        if "\\" + quote in body or "\\\n" in body:
+            return None
+        # Real escapes such as \n or \u00e9 may be meant, so only OpenCode can
+        # tell what such a literal should hold
+        if any(escape.group() != "\\\\" for escape in _ESCAPE.finditer(body)):
+            return None
+        # Every backslash was meant literally; "\\" was already one backslash
+        value = body.replace("\\\\", "\\")
+    if not _WINDOWS_PATH_START.match(value):
+        return None
+    return value
+
+
+def _flagged_rules(value: str, rows: range, findings: set[str]) -> list[str]:
+    """Gets the rules in FIXABLE_RULES a finding on one of rows reports for value."""
+    return [
+        rule
+        for rule in FIXABLE_RULES
+        if any(
+            f"Line {row}: {format_path_violation(rule, value)}" in findings
+            for row in rows
+        )
+    ]
+
+
+def _fix_value(value: str, rules: list[str]) -> str:
+    """Applies the fix for each of rules."""
+    if "mixed_slashes" in rules:
+        value = value.replace("/", "\\")
+    return value
+
+
+def _literal(prefix: str, quote: str, value: str, raw: bool) -> str:
+    """Writes a path back as a literal, raw if wanted and a raw string can hold it."""
+    r = next((c for c in prefix if c in "rR"), "r")
+    prefix = "".join(c for c in prefix if c not in "rRuU")
+    # A raw string cannot end in a backslash or hold its own quote character
+    if raw and "\\" in value and not value.endswith("\\") and quote not in value:
+        return prefix + r + quote + value + quote
+    escaped = value.replace("\\", "\\\\").replace(quote, "\\" + quote)
+    return prefix + quote + escaped + quote
+
+
+def fix_path_literals(
+    code: str, findings: list[str] | None = None
+) -> tuple[str, list[str]]:
+    """
+    Rewrites the Windows path literals flagged in Python code.
+
+    findings are the code's collect_static_errors, found here when not
+    given. Returns the new code and a "Line N: old -> new" note for each
+    literal changed. Code that cannot be tokenized is returned unchanged.
+    """
+    if findings is None:
+        findings = collect_static_errors(code)
+    findings = set(findings)
+    line_starts = [0]
+    for line in io.StringIO(code):
+        line_starts.append(line_starts[-1] + len(line))
+
+    edits = []
+    # Findings give the line a call starts on, which can be above its literal
+    statement_row = None
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.NEWLINE:
+                statement_row = None
+            elif statement_row is None and token.type not in _NON_CODE_TOKENS:
+                statement_row = token.start[0]
+            if token.type != tokenize.STRING:
+                continue
+            match = _STRING_LITERAL.match(token.string)
+            if not match or match["body"].startswith(match["quote"] * 2):
+                # Triple-quoted strings are docstrings and text, not paths
+                continue
+            prefix, quote, body = match["prefix"], match["quote"], match["body"]
+            value = _intended_value(prefix, quote, body)
+            if value is None:
+                continue
+            rows = range(statement_row, token.start[0] + 1)
+            rules = _flagged_rules(value, rows, findings)
+            if not rules:
+                continue
+            # A backslash that is not part of an escaped pair needs the r prefix
+            is_raw = "r" in prefix.lower()
+            lone_backslash = not is_raw and "\\" in body.replace("\\\\", "")
+            fixed = _fix_value(value, rules)
+            new = _literal(prefix, quote, fixed, is_raw or lone_backslash)
+            if new != token.string:
+                (start_row, start_col), (end_row, end_col) = token.start, token.end
+                edits.append(
+                    (
+                        line_starts[start_row - 1] + start_col,
+                        line_starts[end_row - 1] + end_col,
+                        new,
+                        f"Line {start_row}: {token.string} -> {new}",
+                    )
+                )
+    except (tokenize.TokenError, SyntaxError):
+        return code, []
+
+    for start, end, new, _ in reversed(edits):
+        code = code[:start] + new + code[end:]
+    return code, [note for _, _, _, note in edits]
+
+
+def _parses(code: str) -> bool:
+    try:
+        ast.parse(code)
+        return True
+    except SyntaxError:
+        return False
+
+
+def auto_fix(code: str, root: str = "") -> tuple[str, list[str], list[str]]:
+    """
+    Applies the rule-based fixes and re-checks the result.
+
+    Returns the fixed code, the notes for each change, and the static
+    findings still left in the fixed code for OpenCode to handle.
+    """
+    fixed, notes = fix_path_literals(code, collect_static_errors(code, root))
+    # A rewrite must never turn parsing code into code that does not parse
+    if notes and not _parses(fixed) and _parses(code):
+        fixed, notes = code, []
+    return fixed, notes, collect_static_errors(fixed, root)
+
+
+__all__ = ["FIXABLE_RULES", "fix_path_literals", "auto_fix"]
@@ -0,0 +1,651 @@
+"""
+Sandbox Script Worker
+
+A long-lived Python process inside the sandbox venv that runs scripts for
+dynamic analysis. Each script runs exactly once, and its stdout, stderr and
+any uncaught exception come back as one structured record, so a failing
+script no longer has to be run a second time to find out why it failed.
+
+The parent and the worker talk over the worker's stdin and stdout using
+length-prefixed JSON frames: a 4-byte big-endian length followed by that
+many bytes of UTF-8 JSON. The worker moves the protocol off file
+descriptors 0 and 1 at startup, so nothing a script prints or reads can
+corrupt a frame.
+
+A request is {"id", "script", "args", "cwd", "stdin", "cpu_limit",
+"virtual_fs", "timeout"} and a reply is
+{"id", "stdout", "stderr", "exit_code", "exception", "accesses",
+"max_rss_kb"}, where exception is None or {"type", "message", "filename",
+"lineno", "traceback"}, and accesses lists every path the script opened,
+listed, created or changed into as {"event", "path", "lineno"}, recorded by
+an audit hook (sys.addaudithook) so the parent can check each of them.
+
+When a request carries a virtual_fs manifest, the script runs against an
+in-memory Windows filesystem seeded from it (see virtual_winfs), and each
+access also records whether its folder exists in that tree.
+
+Scripts must not see what the scripts before them did, such as replacing
+os.listdir or builtins.input. On POSIX systems the worker stays warm with
+its imports done and forks a fresh child for every script, so anything a
+script changes dies with its child. Where fork is not available, the
+script runs in the worker itself, and the attributes of every loaded
+module and os.environ are put back the way they were after it finishes.
+
+On POSIX systems the worker can also be held to an address-space cap
+(RLIMIT_AS) for its whole life and a CPU-seconds budget (RLIMIT_CPU) per
+script. The parent enforces a wall-clock timeout per script on every
+platform. A forking worker kills a child that runs past it and carries on;
+otherwise the parent kills the worker, and it is started again.
+
+This file only uses the standard library, because the worker side runs
+under the venv's Python with nothing installed.
+"""
+
+import io
+import json
+import ntpath
+import os
+import signal
+import struct
+import subprocess
+import sys
+import threading
+from typing import Any, BinaryIO, Optional
+
+from virtual_winfs import VirtualWindowsFS
+
+
+HEADER = struct.Struct(">I")
+DEFAULT_MAX_JOBS = 100
+DEFAULT_MAX_GROWTH_MB = 256
+# A forking worker times scripts out itself; the parent only steps in if it hangs
+FORK_TIMEOUT_GRACE = 5.0
+MAX_ACCESSES = 10_000
+TRACED_EVENTS = frozenset({"open", "os.listdir", "os.scandir", "os.chdir", "os.mkdir"})
+# Imported by the worker up front, so forked scripts find them already loaded
+WARM_MODULES = ("glob", "pathlib", "runpy", "shutil", "tempfile", "traceback")
+
+
+def write_frame(stream: BinaryIO, message: dict) -> None:
+    """Write one length-prefixed JSON frame and flush it."""
+    data = json.dumps(message).encode("utf-8")
+    stream.write(HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def read_frame(stream: BinaryIO) -> Optional[dict]:
+    """Read one length-prefixed JSON frame, or None at end of stream."""
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    (size,) = HEADER.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        return None
+    return json.loads(data.decode("utf-8"))
+
+
+def _max_rss_kb() -> Optional[int]:
+    """Get this process's peak memory in KB, or None where it is not available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+# ----- Worker Side -----
+class CPULimitExceeded(BaseException):
+    """Raised inside a script that used up its CPU-seconds budget."""
+
+
+def _raise_cpu_limit(signum: int, frame: Any) -> None:
+    raise CPULimitExceeded("Script used up its CPU time limit")
+
+
+def _set_cpu_limit(seconds: Optional[float]) -> None:
+    """Give the next script a CPU budget on top of what the worker has used."""
+    try:
+        import resource
+    except ImportError:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    # RLIMIT_CPU counts the whole process, so the soft limit moves with usage
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _set_memory_limit(limit_mb: int) -> None:
+    """Cap the worker's address space so runaway scripts hit MemoryError."""
+    try:
+        import resource
+    except ImportError:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    soft = limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _exception_record(e: BaseException, script: str) -> dict:
+    """Describe an exception raised by a script, without the worker's own frames."""
+    import traceback
+
+    import virtual_winfs
+
+    internal = {os.path.abspath(__file__), os.path.abspath(virtual_winfs.__file__)}
+    frames = [
+        frame
+        for frame in traceback.extract_tb(e.__traceback__)
+        if os.path.abspath(frame.filename) not in internal
+        and "runpy" not in os.path.basename(frame.filename)
+    ]
+    filename, lineno = script, None
+    if isinstance(e, SyntaxError):
+        filename, lineno = e.filename or script, e.lineno
+    else:
+        # Points at the deepest frame that belongs to the script itself
+        for frame in frames:
+            if os.path.abspath(frame.filename) == os.path.abspath(script):
+                filename, lineno = frame.filename, frame.lineno
+
+    lines = ["Traceback (most recent call last):\n"] if frames else []
+    lines += traceback.format_list(frames)
+    lines += traceback.format_exception_only(type(e), e)
+    return {
+        "type": type(e).__name__,
+        "message": str(e),
+        "filename": filename,
+        "lineno": lineno,
+        "traceback": "".join(lines),
+    }
+
+
+class PathTracer:
+    """
+    Records the paths a script touches, through one audit hook per worker.
+
+    Audit hooks cannot be removed, so the hook stays installed for the
+    worker's life and only records while a job has set a script to trace.
+    """
+
+    def __init__(self):
+        self.script = None
+        self.fs = None
+        self.accesses = []
+        self._seen = set()
+
+    def start(self, script: str, fs: Optional[VirtualWindowsFS] = None) -> None:
+        self.script = script
+        self.fs = fs
+        self.accesses = []
+        self._seen = set()
+
+    def stop(self) -> list[dict]:
+        self.script = self.fs = None
+        return self.accesses
+
+    def hook(self, event: str, args: tuple) -> None:
+        """Audit hook: keeps this cheap for the many events it ignores."""
+        if self.script is None or event not in TRACED_EVENTS:
+            return
+        path = args[0] if args else None
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        if not isinstance(path, str):
+            # Skips file descriptors and listdir() without a path
+            return
+
+        # Finds the script line behind the call, skipping imports, which
+        # open module files on the script's behalf
+        lineno = None
+        frame = sys._getframe(1)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith("<frozen importlib"):
+                return
+            if filename == self.script:
+                lineno = frame.f_lineno
+                break
+            frame = frame.f_back
+        if lineno is None:
+            return
+
+        key = (event, path, lineno)
+        if key in self._seen or len(self.accesses) >= MAX_ACCESSES:
+            return
+        self._seen.add(key)
+        access = {"event": event, "path": path, "lineno": lineno}
+        if self.fs is not None:
+            # Files and new folders only need their parent folder to exist
+            folder = path
+            if event in ("open", "os.mkdir"):
+                folder = ntpath.dirname(path) or "."
+            access["exists"] = self.fs.isdir(folder)
+        self.accesses.append(access)
+
+
+_tracer = PathTracer()
+
+
+def _snapshot_modules() -> dict:
+    """Copy the attributes of every loaded module, keyed by module name."""
+    snapshot = {}
+    for name, module in list(sys.modules.items()):
+        try:
+            snapshot[name] = (module, dict(vars(module)))
+        except TypeError:
+            # Some entries in sys.modules are not modules and have no __dict__
+            continue
+    return snapshot
+
+
+def _restore_modules(snapshot: dict) -> None:
+    """Put back every module attribute a script added, replaced or deleted."""
+    for module, saved in snapshot.values():
+        current = vars(module)
+        for key in [key for key in current if key not in saved]:
+            del current[key]
+        for key, value in saved.items():
+            if current.get(key, current) is not value:
+                current[key] = value
+
+
+def _run_job(job: dict) -> dict:
+    """Run one script as __main__ and capture everything it did."""
+    import runpy
+
+    script = job["script"]
+    # Only needed without fork, where the next script reuses this process
+    isolate = not job.get("forked")
+    saved_state = _snapshot_modules() if isolate else None
+    saved_environ = dict(os.environ) if isolate else None
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    saved_modules = set(sys.modules)
+    saved_cwd = os.getcwd()
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code, exception = 0, None
+
+    try:
+        os.chdir(job.get("cwd") or saved_cwd)
+        sys.argv = [script] + list(job.get("args") or [])
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        # input() sees only the job's fixture text, then EOFError
+        sys.stdin = io.StringIO(job.get("stdin") or "")
+        sys.stdout, sys.stderr = stdout, stderr
+        _set_cpu_limit(job.get("cpu_limit"))
+        if job.get("virtual_fs") is not None:
+            fs = VirtualWindowsFS.from_manifest(job["virtual_fs"])
+            _tracer.start(script, fs)
+            with fs.patched():
+                runpy.run_path(script, run_name="__main__")
+        else:
+            _tracer.start(script)
+            runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=stderr)
+            exit_code = 1
+    except BaseException as e:
+        exit_code = 1
+        exception = _exception_record(e, script)
+    finally:
+        accesses = _tracer.stop()
+        _set_cpu_limit(None)
+        if isolate:
+            _restore_modules(saved_state)
+            if os.environ != saved_environ:
+                os.environ.clear()
+                os.environ.update(saved_environ)
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        # Drops the script's own modules so the next job imports them afresh;
+        # installed and standard modules stay, as extensions cannot reload
+        prefixes = (os.path.abspath(sys.prefix), os.path.abspath(sys.base_prefix))
+        for name in set(sys.modules) - saved_modules:
+            filename = getattr(sys.modules[name], "__file__", None)
+            if filename and not os.path.abspath(filename).startswith(prefixes):
+                del sys.modules[name]
+        try:
+            os.chdir(saved_cwd)
+        except OSError:
+            pass
+
+    return {
+        "id": job.get("id"),
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "exit_code": exit_code,
+        "exception": exception,
+        "accesses": accesses,
+        "max_rss_kb": _max_rss_kb(),
+    }
+
+
+def _run_job_forked(job: dict, proto_files: tuple) -> dict:
+    """Run one job in a forked child of the warm worker and return its reply."""
+    import select
+    import time
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # The child: runs the script, sends its reply up the pipe and exits
+        # without running any cleanup a script may have registered
+        code = 0
+        try:
+            os.close(read_fd)
+            for f in proto_files:
+                f.close()
+            with os.fdopen(write_fd, "wb") as out:
+                write_frame(out, _run_job({**job, "forked": True}))
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+
+    os.close(write_fd)
+    timeout = job.get("timeout")
+    deadline = time.monotonic() + timeout if timeout else None
+    data = bytearray()
+    try:
+        while True:
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and (
+                wait <= 0 or not select.select([read_fd], [], [], wait)[0]
+            ):
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                return _failure_record(
+                    job,
+                    "Timeout",
+                    f"Script did not finish within {timeout} s and was killed",
+                    -signal.SIGKILL,
+                )
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        os.close(read_fd)
+
+    _, status = os.waitpid(pid, 0)
+    reply = read_frame(io.BytesIO(bytes(data)))
+    if reply is None:
+        # The script took its process down, for example with os._exit()
+        code = os.waitstatus_to_exitcode(status)
+        return _failure_record(
+            job, "WorkerCrash", f"Script process exited with code {code}", code
+        )
+    return reply
+
+
+def worker_main(argv: list[str]) -> None:
+    """Serve jobs from the parent until it closes the pipe."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="sandbox_worker")
+    parser.add_argument("--memory-limit-mb", type=int)
+    args = parser.parse_args(argv)
+
+    # Scripts should not see WinClean's own folder on their import path
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(
+        os.path.abspath(__file__)
+    ):
+        del sys.path[0]
+
+    # Keeps private copies of the protocol pipes, then points fds 0 and 1 at
+    # the null device so scripts cannot read or write protocol frames
+    proto_in = os.fdopen(os.dup(0), "rb")
+    proto_out = os.fdopen(os.dup(1), "wb")
+    null_fd = os.open(os.devnull, os.O_RDWR)
+    os.dup2(null_fd, 0)
+    os.dup2(null_fd, 1)
+    os.close(null_fd)
+
+    if args.memory_limit_mb:
+        _set_memory_limit(args.memory_limit_mb)
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+    for name in WARM_MODULES:
+        __import__(name)
+    sys.addaudithook(_tracer.hook)
+
+    write_frame(
+        proto_out,
+        {"ready": True, "forks": hasattr(os, "fork"), "max_rss_kb": _max_rss_kb()},
+    )
+    while True:
+        job = read_frame(proto_in)
+        if job is None:
+            return
+        if hasattr(os, "fork"):
+            reply = _run_job_forked(job, (proto_in, proto_out))
+        else:
+            reply = _run_job(job)
+        write_frame(proto_out, reply)
+
+
+# ----- Parent Side -----
+class SandboxWorker:
+    """
+    Runs scripts one at a time in a persistent worker under a venv's Python.
+
+    The worker is started on first use and replaced after max_jobs scripts.
+    A worker that cannot fork is also replaced when its peak memory has grown
+    by more than max_growth_mb since it started, when a script runs past its
+    timeout, or when a script takes the whole process down; a forking worker
+    runs each script in a child and outlives all of these.
+    memory_limit_mb caps the worker's address space.
+    """
+
+    def __init__(
+        self,
+        python_executable: str,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        max_growth_mb: int = DEFAULT_MAX_GROWTH_MB,
+        memory_limit_mb: Optional[int] = None,
+    ):
+        self.python_executable = python_executable
+        self.max_jobs = max_jobs
+        self.max_growth_mb = max_growth_mb
+        self.memory_limit_mb = memory_limit_mb
+        self.process = None
+        self.jobs_done = 0
+        self._baseline_rss_kb = None
+        self._forks = False
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        """Start a fresh worker and wait for it to report ready."""
+        command = [self.python_executable, os.path.abspath(__file__)]
+        if self.memory_limit_mb:
+            command += ["--memory-limit-mb", str(self.memory_limit_mb)]
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        hello = read_frame(self.process.stdout)
+        if hello is None:
+            code = self.process.wait()
+            self.process = None
+            raise OSError(f"Sandbox worker exited with code {code} during startup")
+        self.jobs_done = 0
+        self._baseline_rss_kb = hello.get("max_rss_kb")
+        self._forks = bool(hello.get("forks"))
+
+    def _needs_recycle(self, reply: dict) -> bool:
+        """Check if the worker has run too many jobs or grown too large."""
+        if self.jobs_done >= self.max_jobs:
+            return True
+        if self._forks:
+            # Scripts grow their own child, not the worker
+            return False
+        rss, baseline = reply.get("max_rss_kb"), self._baseline_rss_kb
+        return (
+            rss is not None
+            and baseline is not None
+            and rss - baseline > self.max_growth_mb * 1024
+        )
+
+    def run(
+        self,
+        script: str,
+        args: Optional[list[str]] = None,
+        stdin: str = "",
+        timeout: Optional[float] = None,
+        cpu_limit: Optional[float] = None,
+        virtual_fs: Optional[dict] = None,
+    ) -> dict:
+        """
+        Run one script in the worker and return its result record.
+
+        A script still running after timeout seconds is killed and reported
+        with a "Timeout" exception record. Passing a
+        virtual_fs manifest ({} for the default tree) runs the script against
+        an emulated Windows filesystem instead of the real disk.
+        """
+        with self._lock:
+            if self.process is None:
+                self._start()
+            self._next_id += 1
+            job = {
+                "id": self._next_id,
+                "script": os.path.abspath(script),
+                "args": list(args or []),
+                "cwd": os.getcwd(),
+                "stdin": stdin,
+                "cpu_limit": cpu_limit,
+                "virtual_fs": virtual_fs,
+                "timeout": timeout,
+            }
+
+            timed_out = threading.Event()
+            process = self.process
+
+            def kill() -> None:
+                timed_out.set()
+                process.kill()
+
+            timer = None
+            if timeout:
+                grace = FORK_TIMEOUT_GRACE if self._forks else 0
+                timer = threading.Timer(timeout + grace, kill)
+            try:
+                write_frame(process.stdin, job)
+                if timer:
+                    timer.start()
+                reply = read_frame(process.stdout)
+            except (BrokenPipeError, OSError):
+                reply = None
+            finally:
+                if timer:
+                    timer.cancel()
+
+            if timed_out.is_set() or reply is None:
+                code = process.wait()
+                process.stdin.close()
+                process.stdout.close()
+                self.process = None
+                if timed_out.is_set():
+                    return _failure_record(
+                        job,
+                        "Timeout",
+                        f"Script did not finish within {timeout} s and was killed",
+                        code,
+                    )
+                # The script killed the worker, for example with os._exit()
+                return _failure_record(
+                    job, "WorkerCrash", f"Sandbox worker exited with code {code}", code
+                )
+
+            self.jobs_done += 1
+            if self._needs_recycle(reply):
+                self._stop()
+            return reply
+
+    def _stop(self) -> None:
+        """Close the worker's pipe and wait for it to exit."""
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+    def close(self) -> None:
+        """Stop the worker."""
+        with self._lock:
+            self._stop()
+
+    def __enter__(self) -> "SandboxWorker":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _failure_record(job: dict, kind: str, message: str, exit_code: int) -> dict:
+    """Build the result record for a script whose worker had to die."""
+    return {
+        "id": job["id"],
+        "stdout": "",
+        "stderr": "",
+        "exit_code": exit_code,
+        "exception": {
+            "type": kind,
+            "message": message,
+            "filename": job["script"],
+            "lineno": None,
+            "traceback": "",
+        },
+        "accesses": [],
+        "max_rss_kb": None,
+    }
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def get_worker(python_executable: str) -> SandboxWorker:
+    """Get the shared worker for a venv's Python, creating it if needed."""
+    with _workers_lock:
+        worker = _workers.get(python_executable)
+        if worker is None:
+            worker = _workers[python_executable] = SandboxWorker(python_executable)
+        return worker
+
+
+__all__ = [
+    "SandboxWorker",
+    "get_worker",
+    "read_frame",
+    "write_frame",
+    "DEFAULT_MAX_JOBS",
+    "DEFAULT_MAX_GROWTH_MB",
+]
+
+
+if __name__ == "__main__":
+    worker_main(sys.argv[1:])
@@ -5,7 +5,7 @@ setup(
     name="winclean",
     version="0.1.0",
     description="Windows Path Cleaning Engine",
-    py_modules=["main", "detect_static_analysis", "detect_dynamic_analysis", "OpenCode_runner", "symbolic_class"],
+    py_modules=["main", "detect_static_analysis", "detect_dynamic_analysis", "OpenCode_runner", "symbolic_class", "result_cache", "winclean_server", "venv_pool", "sandbox_worker", "dynamic_scheduler", "virtual_winfs", "path_fixer", "code_slicer"],
     entry_points={
         "console_scripts": [
             "winclean=main:main",
@@ -3,10 +3,16 @@ Z3 Symbolic Path Analyzer
 
 Uses Z3 SMT Solver to symbolically execute path building operations
 and determine if paths COULD be dangerous.
+
+Paths are tracked as tuples of constant and variable segments. Questions
+about those are decided directly by segment_path_violations, so z3 is only
+imported when a caller asks for the solver.
 """
 
 import ast
 import re
+import threading
+from collections import OrderedDict
 from typing import Any, Optional
 
 
@@ -21,15 +27,204 @@ RESERVED_NAMES = {
 }
 
 
+def find_path_violations(path_expr: Any) -> tuple[list[str], list[str]]:
+    """
+    Find every illegal character and reserved name a symbolic path COULD contain.
+
+    The path is checked in one incremental solver with a push/pop scope per
+    pattern. Reserved names are tried one separator at a time and stop at the
+    first satisfiable one, rather than as a single Or of all three, which is
+    what made the old per-rule solvers slow.
+    """
+    from z3 import Solver, Contains, StringVal, sat
+
+    solver = Solver()
+
+    def could_contain(pattern: str) -> bool:
+        solver.push()
+        solver.add(Contains(path_expr, StringVal(pattern)))
+        result = solver.check() == sat
+        solver.pop()
+        return result
+
+    # Sorted so the findings come out in the same order in every process
+    chars = [char for char in sorted(ILLEGAL_CHARS) if could_contain(char)]
+    names = [
+        name
+        for name in sorted(RESERVED_NAMES)
+        if any(could_contain(prefix + name) for prefix in ("/", "\\", ":\\"))
+    ]
+    return chars, names
+
+
+def constant_path_violations(path: str) -> tuple[list[str], list[str]]:
+    """
+    Answer the find_path_violations questions for a fully constant path.
+
+    With no free variables, "could the path contain X" is a plain substring
+    test, so this gives exactly the solver's answer without calling Z3.
+    """
+    chars = [char for char in sorted(ILLEGAL_CHARS) if char in path]
+    names = [
+        name
+        for name in sorted(RESERVED_NAMES)
+        if any(prefix + name in path for prefix in ("/", "\\", ":\\"))
+    ]
+    return chars, names
+
+
+def concat_segments(*parts: tuple) -> tuple:
+    """Concatenate segment tuples, merging neighbouring constant segments."""
+    segments = []
+    for part in parts:
+        for kind, value in part:
+            if kind == "const":
+                if not value:
+                    continue
+                if segments and segments[-1][0] == "const":
+                    segments[-1] = ("const", segments[-1][1] + value)
+                    continue
+            segments.append((kind, value))
+    return tuple(segments)
+
+
+def segment_path_violations(segments: tuple) -> tuple[list[str], list[str]]:
+    """
+    Decide the find_path_violations questions for a path given as segments.
+
+    A path made of ("const", text) and ("var", name) segments can contain a
+    pattern exactly when it already does in the constant text, or when it has
+    any free variable, since that variable could be the pattern itself. This
+    is the whole fragment the analyzer produces, so no solver is needed.
+    """
+    if any(kind == "var" for kind, _ in segments):
+        return sorted(ILLEGAL_CHARS), sorted(RESERVED_NAMES)
+    return constant_path_violations("".join(text for _, text in segments))
+
+
+def segments_to_z3(segments: tuple) -> Any:
+    """Build the Z3 string expression for a path given as segments."""
+    from z3 import Concat, String, StringVal
+
+    parts = [
+        StringVal(value) if kind == "const" else String(value)
+        for kind, value in segments
+    ]
+    if not parts:
+        return StringVal("")
+    if len(parts) == 1:
+        return parts[0]
+    return Concat(*parts)
+
+
+# Most student code builds paths from the same few shapes, so verdicts are
+# memoized by canonical shape in a bounded LRU, optionally backed on disk
+MAX_MEMOIZED_SHAPES = 4096
+_shape_verdicts = OrderedDict()  # canonical shape -> (chars, names)
+# Guards _shape_verdicts, which the analysis server uses from many threads;
+# it is not held while a shape is solved
+_shape_lock = threading.Lock()
+_shape_store = None  # optional result_cache.ResultCache shared across runs
+
+
+def canonical_path_shape(path_expr: Any) -> Optional[tuple]:
+    """
+    Reduce a symbolic path to a canonical, hashable shape.
+
+    Concatenations are flattened into a tuple of segments. Adjacent constant
+    segments are merged and kept as text, and free string variables are
+    renamed in order of first appearance, so "C:\\Users\\" + name and
+    "C:\\Users\\" + folder share one shape. Returns None for anything that
+    is not a plain concatenation of constants and variables.
+    """
+    from z3 import (
+        is_app,
+        is_const,
+        is_string_value,
+        Z3_OP_SEQ_CONCAT,
+        Z3_OP_UNINTERPRETED,
+    )
+
+    segments = []
+    variables = {}
+    stack = [path_expr]
+    while stack:
+        expr = stack.pop()
+        if is_string_value(expr):
+            text = expr.as_string()
+            if not text:
+                continue
+            if segments and segments[-1][0] == "const":
+                segments[-1] = ("const", segments[-1][1] + text)
+            else:
+                segments.append(("const", text))
+        elif is_app(expr) and expr.decl().kind() == Z3_OP_SEQ_CONCAT:
+            stack.extend(reversed(expr.children()))
+        elif is_const(expr) and expr.decl().kind() == Z3_OP_UNINTERPRETED:
+            index = variables.setdefault(expr.decl().name(), len(variables))
+            segments.append(("var", index))
+        else:
+            return None
+    return tuple(segments)
+
+
+def persist_path_shapes(cache: Optional[Any]) -> None:
+    """Keep memoized shape verdicts in a ResultCache across runs, or stop if None."""
+    global _shape_store
+    _shape_store = cache
+
+
+def memoized_path_violations(path_expr: Any) -> tuple[list[str], list[str]]:
+    """Same as find_path_violations, but solves each canonical path shape only once."""
+    shape = canonical_path_shape(path_expr)
+    if shape is None:
+        return find_path_violations(path_expr)
+
+    with _shape_lock:
+        verdict = _shape_verdicts.get(shape)
+        if verdict is not None:
+            _shape_verdicts.move_to_end(shape)
+            return verdict
+
+    key = None
+    if _shape_store is not None:
+        from result_cache import make_key
+
+        # The rule sets are part of the key so changing them invalidates old verdicts
+        key = make_key(
+            "".join(sorted(ILLEGAL_CHARS)),
+            ",".join(sorted(RESERVED_NAMES)),
+            repr(shape),
+        )
+        stored = _shape_store.get(key)
+        if stored is not None:
+            verdict = (stored[0], stored[1])
+
+    if verdict is None:
+        verdict = find_path_violations(path_expr)
+        if key is not None:
+            _shape_store.put(key, list(verdict))
+
+    with _shape_lock:
+        _shape_verdicts[shape] = verdict
+        if len(_shape_verdicts) > MAX_MEMOIZED_SHAPES:
+            _shape_verdicts.popitem(last=False)
+    return verdict
+
+
 class Z3SymbolicAnalyzer:
     """
     Uses Z3 to symbolically execute path building and detect potential issues.
     """
 
-    def __init__(self):
+    def __init__(self, use_solver: bool = False):
         self.errors = []
-        self.user_input_vars = {}  # var_name -> Z3 String
+        self.user_input_vars = {}  # var_name -> symbolic segments
+        self.constant_vars = {}  # var_name -> folded Python string
         self.solver = None
+        # The segment decision procedure covers every path this class builds;
+        # use_solver sends them through Z3 instead, e.g. to cross-check it
+        self.use_solver = use_solver
 
     def analyze(self, code: str) -> list[str]:
         """Analyze code using Z3 symbolic execution."""
@@ -64,9 +259,16 @@ class Z3SymbolicAnalyzer:
         for target in node.targets:
             if isinstance(target, ast.Name):
                 var_name = target.id
-                value = self._expr_to_symbolic(node.value, var_name)
+                # Constant values stay plain strings so they never need Z3
+                constant = self._fold_constant(node.value)
+                if constant is not None:
+                    self.constant_vars[var_name] = constant
+                    self.user_input_vars.pop(var_name, None)
+                    continue
+                value = self._expr_to_segments(node.value)
                 if value is not None:
                     self.user_input_vars[var_name] = value
+                    self.constant_vars.pop(var_name, None)
 
     def _visit_call(self, node: ast.Call) -> None:
         """Visit function call."""
@@ -98,77 +300,127 @@ class Z3SymbolicAnalyzer:
             "walk",
         ):
             for arg in node.args:
-                result = self._expr_to_symbolic(arg, None)
-                if result:
-                    self._check_symbolic_path(result, node.lineno)
+                # Fully constant paths are answered with string checks
+                constant = self._fold_constant(arg)
+                if constant is not None:
+                    self._report_violations(
+                        constant_path_violations(constant), node.lineno
+                    )
+                    continue
+                segments = self._expr_to_segments(arg)
+                if segments is not None:
+                    self._check_symbolic_path(segments, node.lineno)
 
     def _expr_to_symbolic(
         self, node: ast.AST, var_name: Optional[str]
     ) -> Optional[Any]:
         """Convert AST expression to Z3 symbolic expression."""
-        from z3 import String, StringVal, Concat
+        segments = self._expr_to_segments(node)
+        if segments is None:
+            return None
+        return segments_to_z3(segments)
 
+    def _expr_to_segments(self, node: ast.AST) -> Optional[tuple]:
+        """Convert AST expression to a tuple of constant and variable segments."""
         if isinstance(node, ast.Constant) and isinstance(node.value, str):
-            return StringVal(node.value)
+            return concat_segments((("const", node.value),))
 
         if isinstance(node, ast.Name):
             name = node.id
             if name in self.user_input_vars:
                 return self.user_input_vars[name]
+            if name in self.constant_vars:
+                return concat_segments((("const", self.constant_vars[name]),))
             # Unknown variable - create symbolic
-            return String(name)
+            return (("var", name),)
 
         if isinstance(node, ast.JoinedStr):
             return self._visit_joined_str(node)
 
         if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
-            left = self._expr_to_symbolic(node.left, None)
-            right = self._expr_to_symbolic(node.right, None)
-            if left and right:
-                return Concat(left, right)
+            left = self._expr_to_segments(node.left)
+            right = self._expr_to_segments(node.right)
+            if left is not None and right is not None:
+                return concat_segments(left, right)
 
         if isinstance(node, ast.Call):
             func_name = self._get_func_name(node.func)
             if func_name == "str":
                 if node.args:
-                    return self._expr_to_symbolic(node.args[0], None)
+                    return self._expr_to_segments(node.args[0])
             if func_name in ("join", "path.join"):
                 return self._visit_path_join(node)
 
         return None
 
-    def _visit_joined_str(self, node: ast.JoinedStr) -> Optional[Any]:
-        """Visit f-string."""
-        from z3 import String, StringVal, Concat
+    def _fold_constant(self, node: ast.AST) -> Optional[str]:
+        """Fold an expression built only from string constants into a Python string."""
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+
+        if isinstance(node, ast.Name):
+            return self.constant_vars.get(node.id)
+
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                if isinstance(value, ast.FormattedValue):
+                    # Conversions and format specs could change the text
+                    if value.conversion != -1 or value.format_spec is not None:
+                        return None
+                    value = value.value
+                part = self._fold_constant(value)
+                if part is None:
+                    return None
+                parts.append(part)
+            return "".join(parts)
+
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left = self._fold_constant(node.left)
+            right = self._fold_constant(node.right)
+            if left is not None and right is not None:
+                return left + right
 
+        if isinstance(node, ast.Call):
+            func_name = self._get_func_name(node.func)
+            if func_name == "str" and len(node.args) == 1:
+                return self._fold_constant(node.args[0])
+            if func_name in ("join", "path.join") and node.args:
+                # Matches _visit_path_join, which joins the parts with "/"
+                parts = [self._fold_constant(arg) for arg in node.args]
+                if all(part is not None for part in parts):
+                    return "/".join(parts)
+
+        return None
+
+    def _visit_joined_str(self, node: ast.JoinedStr) -> Optional[tuple]:
+        """Visit f-string."""
         parts = []
         for value in node.values:
             if isinstance(value, ast.Constant) and isinstance(value.value, str):
-                parts.append(StringVal(value.value))
+                parts.append((("const", value.value),))
             elif isinstance(value, ast.FormattedValue):
-                expr = self._expr_to_symbolic(value.value, None)
-                if expr:
+                expr = self._expr_to_segments(value.value)
+                if expr is not None:
                     parts.append(expr)
         if parts:
-            return Concat(*parts)
+            return concat_segments(*parts)
         return None
 
-    def _visit_path_join(self, node: ast.Call) -> Optional[Any]:
+    def _visit_path_join(self, node: ast.Call) -> Optional[tuple]:
         """Visit os.path.join call."""
-        from z3 import String, StringVal, Concat
-
         args = node.args
         if not args:
             return None
 
         result = None
         for arg in args:
-            part = self._expr_to_symbolic(arg, None)
-            if part:
+            part = self._expr_to_segments(arg)
+            if part is not None:
                 if result is None:
                     result = part
                 else:
-                    result = Concat(result, StringVal("/"), part)
+                    result = concat_segments(result, (("const", "/"),), part)
         return result
 
     def _get_func_name(self, node: ast.AST) -> str:
@@ -197,55 +449,58 @@ class Z3SymbolicAnalyzer:
                     return True
         return False
 
-    def _create_symbolic_input(self, var_name: str) -> Any:
-        """Create a Z3 symbolic string representing user input."""
-        from z3 import String
+    def _create_symbolic_input(self, var_name: str) -> tuple:
+        """Create a symbolic string representing user input."""
+        return (("var", var_name),)
 
-        return String(var_name)
+    def _check_symbolic_path(self, segments: tuple, lineno: int) -> None:
+        """Check if symbolic path COULD be dangerous."""
+        if self.use_solver:
+            violations = memoized_path_violations(segments_to_z3(segments))
+        else:
+            violations = segment_path_violations(segments)
+        self._report_violations(violations, lineno)
 
-    def _check_symbolic_path(self, path_expr, lineno: int) -> None:
-        """Check if symbolic path COULD be dangerous using Z3."""
-        from z3 import Solver, String, Contains, StringVal, Or, sat, unsat
-
-        solver = Solver()
+    def _report_violations(
+        self, violations: tuple[list[str], list[str]], lineno: int
+    ) -> None:
+        """Record the illegal characters and reserved names a path may contain."""
+        chars, names = violations
 
         # Check for illegal characters
-        for char in ILLEGAL_CHARS:
-            solver.push()
-            solver.add(Contains(path_expr, StringVal(char)))
-            if solver.check() == sat:
-                self.errors.append(
-                    f"Line {lineno}: Path MAY contain illegal character '{char}' "
-                    f"(symbolic analysis)"
-                )
-            solver.pop()
+        for char in chars:
+            self.errors.append(
+                f"Line {lineno}: Path MAY contain illegal character '{char}' "
+                f"(symbolic analysis)"
+            )
 
         # Check for reserved names
-        for reserved in RESERVED_NAMES:
-            solver.push()
-            solver.add(
-                Or(
-                    Contains(path_expr, StringVal(f"/{reserved}")),
-                    Contains(path_expr, StringVal(f"\\{reserved}")),
-                    Contains(path_expr, StringVal(f":\\{reserved}")),
-                )
+        for reserved in names:
+            self.errors.append(
+                f"Line {lineno}: Path MAY contain reserved name '{reserved}' "
+                f"(symbolic analysis)"
             )
-            if solver.check() == sat:
-                self.errors.append(
-                    f"Line {lineno}: Path MAY contain reserved name '{reserved}' "
-                    f"(symbolic analysis)"
-                )
-            solver.pop()
 
 
-def check_with_z3(code: str) -> list[str]:
+def check_with_z3(code: str, use_solver: bool = False) -> list[str]:
     """Check code using Z3 symbolic analysis."""
     try:
-        analyzer = Z3SymbolicAnalyzer()
+        analyzer = Z3SymbolicAnalyzer(use_solver)
         return analyzer.analyze(code)
     except ImportError:
         return ["Z3 not available - install with: pip install z3-solver"]
 
 
 # Export for use
-__all__ = ["check_with_z3", "Z3SymbolicAnalyzer"]
+__all__ = [
+    "check_with_z3",
+    "canonical_path_shape",
+    "concat_segments",
+    "constant_path_violations",
+    "find_path_violations",
+    "memoized_path_violations",
+    "persist_path_shapes",
+    "segment_path_violations",
+    "segments_to_z3",
+    "Z3SymbolicAnalyzer",
+]
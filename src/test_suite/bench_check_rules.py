@@ -0,0 +1,116 @@
+"""
+Benchmark Compiled Windows Path Rules
+
+This script generates a million synthetic paths, a mix of clean paths and
+paths breaking each Windows rule, and times the per-path cost of:
+
+- the previous rule checks, which rebuilt the illegal character and reserved
+  name sets and rescanned the string for every rule on every call
+- classify_windows_path, which decides every rule from one regex pass
+- FileSystem_Analyzer._check, the classifier plus message building and the
+  folder existence check for paths that break no rule
+- validate_windows_paths, the bulk API, with NumPy when it is installed and
+  with the compiled classifier otherwise
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detect_static_analysis import (
+    FileSystem_Analyzer,
+    classify_windows_path,
+    validate_windows_paths,
+)
+
+
+COUNT = 1_000_000
+TEMPLATES = [
+    "C:\\Users\\student{i}\\Documents",
+    "C:\\Users\\student{i}\\COM1",
+    "C:\\Users\\student{i}\\report>.txt",
+    "C:\\Users/student{i}\\Desktop",
+    "\\\\server{i}\\share\\data",
+    "Users\\student{i}\\Downloads",
+    "D:/projects/{i}/src/main.py",
+    "plain string number {i}",
+]
+
+
+def make_paths(count: int) -> list[str]:
+    """Build count synthetic paths, cycling through the templates."""
+    return [TEMPLATES[i % len(TEMPLATES)].format(i=i) for i in range(count)]
+
+
+def previous_rules(folder: str, require_drive: bool = True) -> str | None:
+    """The rule checks as _check ran them before they were compiled."""
+    if not any(c in folder for c in "/\\:"):
+        return None
+    folder = folder.strip()
+    if folder.startswith("\\\\"):
+        return "unc"
+    illegal_chars = set('<>"|?*')
+    if any(c in illegal_chars for c in folder):
+        return "illegal_chars"
+    if "/" in folder and "\\" in folder:
+        return "mixed_slashes"
+    if require_drive and ":" not in folder and not folder.startswith("/"):
+        return "missing_drive"
+    reserved = {
+        "CON",
+        "PRN",
+        "AUX",
+        "NUL",
+        *(f"COM{i}" for i in range(1, 10)),
+        *(f"LPT{i}" for i in range(1, 10)),
+    }
+    if os.path.basename(folder).upper() in reserved:
+        return "reserved_name"
+    return ""
+
+
+def time_per_path(label: str, func, paths: list[str]) -> None:
+    start = time.perf_counter()
+    for path in paths:
+        func(path)
+    elapsed = time.perf_counter() - start
+    per_path = elapsed / len(paths) * 1e9
+    print(f"  {label:<32} {elapsed:>7.2f} s  {per_path:>7.0f} ns/path")
+
+
+def time_bulk(label: str, paths: list[str], use_numpy: bool) -> None:
+    start = time.perf_counter()
+    validate_windows_paths(paths, use_numpy=use_numpy)
+    elapsed = time.perf_counter() - start
+    per_path = elapsed / len(paths) * 1e9
+    print(f"  {label:<32} {elapsed:>7.2f} s  {per_path:>7.0f} ns/path")
+
+
+def bench_rules():
+    """Time each way of checking the rules on the same synthetic paths."""
+    paths = make_paths(COUNT)
+    analyzer = FileSystem_Analyzer(os.getcwd())
+
+    def full_check(path: str) -> None:
+        analyzer._check(path, 1)
+        analyzer.errors.clear()
+
+    print("=" * 60)
+    print(f"WINDOWS PATH RULES ON {COUNT:,} PATHS")
+    print("=" * 60)
+    time_per_path("previous rule checks", previous_rules, paths)
+    time_per_path("classify_windows_path", classify_windows_path, paths)
+    time_per_path("FileSystem_Analyzer._check", full_check, paths)
+    time_bulk("validate_windows_paths (Python)", paths, use_numpy=False)
+    try:
+        import numpy  # noqa: F401
+
+        time_bulk("validate_windows_paths (NumPy)", paths, use_numpy=True)
+    except ImportError:
+        print("  validate_windows_paths (NumPy)   skipped, NumPy is not installed")
+
+
+if __name__ == "__main__":
+    bench_rules()
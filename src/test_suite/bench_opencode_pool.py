@@ -0,0 +1,137 @@
+"""
+Benchmark Pooled and Streamed OpenCode Sessions
+
+This script fixes a batch of generated buggy scripts through the fake ACP
+agent in fake_acp_agent.py, so it runs offline, and times:
+
+- one agent per file, spawned, initialized and prompted one after another,
+  the way run_opencode_acp handles a single file
+- OpenCodePool, which keeps a pool of agents alive and prompts them
+  concurrently
+- waiting for a whole reply against stream_fix, which stops the agent as
+  soon as a valid code block has streamed in
+
+The agent's --startup and --delay stand in for OpenCode's start-up time and
+model latency, and --tail for the explanation a model writes after the code.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OpenCode_runner import OpenCodePool, build_fix_prompt, extract_code, stream_fix
+
+
+FILES = 40
+POOL_SIZE = 8
+AGENT = [
+    sys.executable,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_acp_agent.py"),
+    "--startup",
+    "0.2",
+    "--delay",
+    "0.3",
+]
+STREAMED_FIXES = 10
+STREAMING_AGENT = AGENT + ["--chunk-delay", "0.005", "--tail", "2000"]
+
+
+def make_files(folder: str, count: int) -> dict[str, str]:
+    """Write count buggy scripts and return them mapped to their findings."""
+    files = {}
+    for i in range(count):
+        path = os.path.join(folder, f"student{i}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'import os\nos.listdir("C:\\\\Users/student{i}\\\\COM1")\n')
+        files[path] = "Line 2: Mixed slashes in path"
+    return files
+
+
+def make_prompts(files: dict[str, str]) -> dict[str, str]:
+    prompts = {}
+    for path, analysis in files.items():
+        with open(path, encoding="utf-8") as f:
+            prompts[path] = build_fix_prompt(f.read(), analysis)
+    return prompts
+
+
+async def one_agent_per_file(prompts: dict[str, str]) -> dict[str, str]:
+    fixes = {}
+    for path, prompt in prompts.items():
+        async with OpenCodePool(size=1, command=AGENT) as pool:
+            fixes[path] = extract_code(await pool.prompt(prompt))
+    return fixes
+
+
+async def pooled_agents(prompts: dict[str, str]) -> dict[str, str]:
+    async with OpenCodePool(size=POOL_SIZE, command=AGENT) as pool:
+        replies = await asyncio.gather(*(pool.prompt(p) for p in prompts.values()))
+    return {path: extract_code(reply) for path, reply in zip(prompts, replies)}
+
+
+def bench_pool():
+    """Time fixing the same files with and without a pool of agents."""
+    with tempfile.TemporaryDirectory() as folder:
+        prompts = make_prompts(make_files(folder, FILES))
+
+        print("=" * 60)
+        print(f"FIXING {FILES} FILES THROUGH THE FAKE ACP AGENT")
+        print("=" * 60)
+
+        start = time.perf_counter()
+        sequential = asyncio.run(one_agent_per_file(prompts))
+        elapsed = time.perf_counter() - start
+        print(f"  {'one agent per file':<32} {elapsed:>7.2f} s")
+
+        start = time.perf_counter()
+        pooled = asyncio.run(pooled_agents(prompts))
+        elapsed = time.perf_counter() - start
+        print(f"  {f'pool of {POOL_SIZE} agents':<32} {elapsed:>7.2f} s")
+
+        assert pooled == sequential, "pooled fixes differ from sequential fixes"
+
+
+async def whole_replies(prompts: list[str]) -> list[str]:
+    async with OpenCodePool(size=1, command=STREAMING_AGENT) as pool:
+        return [extract_code(await pool.prompt(prompt)) for prompt in prompts]
+
+
+async def streamed_fixes(prompts: list[str]) -> list[dict]:
+    async with OpenCodePool(size=1, command=STREAMING_AGENT) as pool:
+        return [await stream_fix(pool, prompt) for prompt in prompts]
+
+
+def bench_streaming():
+    """Time whole replies against fixes that stop at the first valid code block."""
+    with tempfile.TemporaryDirectory() as folder:
+        prompts = list(make_prompts(make_files(folder, STREAMED_FIXES)).values())
+
+        print("=" * 60)
+        print(f"STREAMING {STREAMED_FIXES} FIXES FROM ONE AGENT")
+        print("=" * 60)
+
+        start = time.perf_counter()
+        whole = asyncio.run(whole_replies(prompts))
+        elapsed = time.perf_counter() - start
+        print(f"  {'whole reply':<32} {elapsed:>7.2f} s")
+
+        start = time.perf_counter()
+        streamed = asyncio.run(streamed_fixes(prompts))
+        elapsed = time.perf_counter() - start
+        print(f"  {'stream_fix':<32} {elapsed:>7.2f} s")
+
+        ttft = sum(r["ttft"] for r in streamed) / len(streamed)
+        to_fix = sum(r["time_to_fix"] for r in streamed) / len(streamed)
+        print(f"  {'mean time to first token':<32} {ttft:>7.2f} s")
+        print(f"  {'mean time to valid fix':<32} {to_fix:>7.2f} s")
+
+        assert [r["code"] for r in streamed] == whole, "streamed fixes differ"
+
+
+if __name__ == "__main__":
+    bench_pool()
+    bench_streaming()
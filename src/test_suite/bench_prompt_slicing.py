@@ -0,0 +1,92 @@
+"""
+Benchmark Prompt Slicing
+
+This script builds a large script with one flagged function among hundreds
+of unrelated ones, and fixes it through the fake ACP agent in
+fake_acp_agent.py, so it runs offline. It compares:
+
+- the prompt with the whole file, as run_opencode_prompt_sync sent it before
+- the prompt with only the flagged slices from code_slicer, with the fixed
+  slices spliced back into the file
+
+for prompt size and for the time until a valid fix has streamed in. The
+fake agent streams the code back in chunks at a fixed rate, so the reply
+time grows with the amount of code sent, as a model's would.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detect_static_analysis import collect_static_errors
+from OpenCode_runner import OpenCodePool, build_fix_prompt, fix_code, stream_fix
+
+
+HELPERS = 300
+AGENT = [
+    sys.executable,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_acp_agent.py"),
+    "--delay",
+    "0.3",
+    "--chunk-size",
+    "64",
+    "--chunk-delay",
+    "0.002",
+]
+
+
+def make_script(helpers: int) -> str:
+    """Build a script with many helpers and one function with a path bug."""
+    parts = ["import os\nimport sys\n\nname = input('Student name: ')\n"]
+    for i in range(helpers):
+        parts.append(
+            f"\n\ndef helper_{i}(values):\n"
+            f"    total = 0\n"
+            f"    for value in values:\n"
+            f"        total += value * {i}\n"
+            f"    return total\n"
+        )
+    parts.append(
+        "\n\ndef list_home():\n"
+        "    home = f'C:\\\\Users\\\\{name}'\n"
+        "    return os.listdir(home)\n"
+    )
+    return "".join(parts)
+
+
+async def fix_both_ways(code: str, findings: str) -> tuple[dict, dict]:
+    async with OpenCodePool(size=1, command=AGENT) as pool:
+        whole = await stream_fix(pool, build_fix_prompt(code, findings))
+        sliced = await fix_code(pool, code, findings)
+    return whole, sliced
+
+
+def bench_slicing():
+    """Compare whole-file and sliced prompts on the same flagged script."""
+    code = make_script(HELPERS)
+    findings = "\n".join(collect_static_errors(code))
+
+    print("=" * 60)
+    print(f"FIXING ONE FUNCTION IN A {len(code.splitlines()):,}-LINE SCRIPT")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    whole, sliced = asyncio.run(fix_both_ways(code, findings))
+    elapsed = time.perf_counter() - start
+
+    whole_prompt = len(build_fix_prompt(code, findings))
+    print(f"  {'whole file prompt':<32} {whole_prompt:>9,} chars")
+    print(f"  {'sliced prompt':<32} {sliced['prompt_chars']:>9,} chars")
+    print(f"  {'whole file time to valid fix':<32} {whole['time_to_fix']:>9.2f} s")
+    print(f"  {'sliced time to valid fix':<32} {sliced['time_to_fix']:>9.2f} s")
+    print(f"  {'total, both runs':<32} {elapsed:>9.2f} s")
+
+    assert sliced["sliced"], "the script was sent whole"
+    assert sliced["code"] == whole["code"] == code, "the fix does not match"
+
+
+if __name__ == "__main__":
+    bench_slicing()
@@ -0,0 +1,56 @@
+"""
+Benchmark sys.argv Path Detection Scaling
+
+This script generates synthetic Python files of growing size, up to 50,000
+lines, and times WinClean's check_with_z3 on each of them. Every few lines
+passes sys.argv straight into a path operation, so the "sys.argv used in
+path operation" rule fires throughout the file.
+
+With a single traversal the time per line should stay roughly flat as the
+file grows. A quadratic search shows up as the time per line growing with
+the file size.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detect_static_analysis import check_with_z3
+
+
+SIZES = [1_000, 5_000, 10_000, 25_000, 50_000]
+
+
+def make_synthetic_code(lines: int) -> str:
+    """Build a script with the given number of lines of generated statements."""
+    body = ["import os", "import sys"]
+    for i in range(lines - len(body)):
+        if i % 10 == 0:
+            body.append(f"os.path.exists(sys.argv.__getitem__({i % 3 + 1}))")
+        else:
+            body.append(f"value_{i} = {i} * 2")
+    return "\n".join(body)
+
+
+def bench_scaling():
+    """Time check_with_z3 on each synthetic file size."""
+    print("=" * 60)
+    print("SYS.ARGV PATH DETECTION SCALING")
+    print("=" * 60)
+    print(f"  {'lines':>8}  {'findings':>8}  {'seconds':>8}  {'us/line':>8}")
+
+    for size in SIZES:
+        code = make_synthetic_code(size)
+        start = time.perf_counter()
+        errors = check_with_z3(code)
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {size:>8}  {len(errors):>8}  {elapsed:>8.3f}  "
+            f"{elapsed / size * 1e6:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    bench_scaling()
@@ -0,0 +1,184 @@
+"""
+Fake ACP Agent
+
+A stand-in for `opencode acp` that speaks just enough of the Agent Client
+Protocol (newline-delimited JSON-RPC over stdio) to exercise OpenCode_runner
+offline: initialize, session/new, session/set_config_option, session/prompt
+and session/cancel.
+
+Every prompt is answered by streaming back the code found under "CODE TO
+FIX:" inside a ```python fenced block, split into small message chunks, then
+ending the turn. Each session offers a "model" config option, and the model
+selected is named in the explanation after the code. Point WinClean at it
+with:
+
+    WINCLEAN_ACP_AGENT="python test_suite/fake_acp_agent.py --delay 0.5"
+
+Options:
+    --delay SECONDS        think time before the first chunk of each reply
+    --chunk-size CHARS     characters per streamed message chunk
+    --chunk-delay SECONDS  pause between chunks
+    --startup SECONDS      start-up time before the agent answers initialize
+    --tail CHARS           explanation text streamed after the code block
+    --no-models            offer no model option, like an agent with one model
+    --decoy                stream a valid but unrelated code block first
+    --ignore-cancel        keep streaming a reply after it is cancelled
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+
+CODE_MARKER = "CODE TO FIX:\n"
+DEFAULT_MODEL = "fake/default"
+END_MARKERS = ("\nTASK:", "\nFINAL CODE:")
+
+_write_lock = threading.Lock()
+
+
+def send(message: dict) -> None:
+    """Writes one JSON-RPC message to stdout."""
+    with _write_lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+
+def code_to_fix(prompt: str) -> str:
+    """Finds the code the prompt asks to fix, or the whole prompt."""
+    start = prompt.find(CODE_MARKER)
+    if start < 0:
+        return prompt
+    code = prompt[start + len(CODE_MARKER) :]
+    for marker in END_MARKERS:
+        end = code.find(marker)
+        if end >= 0:
+            code = code[:end]
+    return code.strip() + "\n"
+
+
+class FakeAgent:
+    """Answers ACP requests; prompts are streamed from their own threads."""
+
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.sessions = 0
+        self.cancelled = {}
+        self.models = {}
+
+    def handle(self, message: dict) -> None:
+        method = message.get("method")
+        params = message.get("params") or {}
+        if method == "initialize":
+            time.sleep(self.options.startup)
+            self.reply(message, {"protocolVersion": 1, "agentCapabilities": {}})
+        elif method == "session/new":
+            self.sessions += 1
+            session_id = f"fake-session-{self.sessions}"
+            self.cancelled[session_id] = threading.Event()
+            self.models[session_id] = DEFAULT_MODEL
+            option = {
+                "id": "model",
+                "name": "Model",
+                "category": "model",
+                "type": "select",
+                "currentValue": DEFAULT_MODEL,
+                "options": [{"value": DEFAULT_MODEL, "name": "Default"}],
+            }
+            options = [] if self.options.no_models else [option]
+            self.reply(message, {"sessionId": session_id, "configOptions": options})
+        elif method == "session/set_config_option":
+            self.models[params.get("sessionId")] = params.get("value")
+            self.reply(message, {"configOptions": []})
+        elif method == "session/prompt":
+            threading.Thread(
+                target=self.prompt, args=(message, params), daemon=True
+            ).start()
+        elif method == "session/cancel":
+            event = self.cancelled.get(params.get("sessionId"))
+            if event is not None:
+                event.set()
+        elif "id" in message:
+            send(
+                {
+                    "jsonrpc": "2.0",
+                    "id": message["id"],
+                    "error": {"code": -32601, "message": f"Unknown method {method}"},
+                }
+            )
+
+    def reply(self, message: dict, result: dict) -> None:
+        send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+    def prompt(self, message: dict, params: dict) -> None:
+        session_id = params["sessionId"]
+        cancelled = self.cancelled.setdefault(session_id, threading.Event())
+        cancelled.clear()
+        text = "".join(
+            block.get("text", "")
+            for block in params.get("prompt", [])
+            if block.get("type") == "text"
+        )
+        decoy = "First, a sketch:\n\n```python\npass\n```\n\n"
+        answer = (
+            (decoy if self.options.decoy else "")
+            + "Here is the corrected code:\n\n```python\n"
+            + code_to_fix(text)
+            + "```\n\nThe paths now use raw strings and valid Windows names.\n"
+            + f"Model: {self.models.get(session_id, DEFAULT_MODEL)}\n"
+            + "x" * self.options.tail
+        )
+
+        if self.options.ignore_cancel:
+            cancelled = threading.Event()
+        stop_reason = "end_turn"
+        if cancelled.wait(self.options.delay):
+            stop_reason = "cancelled"
+        else:
+            size = max(1, self.options.chunk_size)
+            for i in range(0, len(answer), size):
+                if cancelled.is_set():
+                    stop_reason = "cancelled"
+                    break
+                chunk = {"type": "text", "text": answer[i : i + size]}
+                send(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "session/update",
+                        "params": {
+                            "sessionId": session_id,
+                            "update": {
+                                "sessionUpdate": "agent_message_chunk",
+                                "content": chunk,
+                            },
+                        },
+                    }
+                )
+                if self.options.chunk_delay:
+                    time.sleep(self.options.chunk_delay)
+        self.reply(message, {"stopReason": stop_reason})
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Fake ACP agent for offline tests")
+    parser.add_argument("acp", nargs="?", help="Ignored, accepted like `opencode acp`")
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--startup", type=float, default=0.0)
+    parser.add_argument("--tail", type=int, default=0)
+    parser.add_argument("--no-models", action="store_true")
+    parser.add_argument("--decoy", action="store_true")
+    parser.add_argument("--ignore-cancel", action="store_true")
+    agent = FakeAgent(parser.parse_args(argv))
+
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
+            agent.handle(json.loads(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Test Bulk Path Validation
+
+validate_windows_paths must give every path the same flags whether NumPy
+or the compiled classifier does the work, including for paths NumPy would
+store differently, such as ones ending in a NUL or far longer than the rest.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detect_static_analysis import validate_windows_paths
+
+
+pytest.importorskip("numpy")
+
+PATHS = [
+    "C:\\Users\\Public",
+    "C:/Users\\Public",
+    "\\\\server\\share",
+    "Users\\Public",
+    "/tmp/logs",
+    "C:\\logs\\a|b.txt",
+    "C:\\Users\\COM1",
+    "D:\\con",
+    "nul/CON\x00",
+    "C:\\CON\x00\x00",
+    "C:\\a\x00b",
+    "  C:\\padded\\path  ",
+    "not a path",
+    "",
+    "C:\\" + "deep\\" * 200 + "file.txt",
+]
+
+
+def random_paths(count: int) -> list[str]:
+    """Builds paths from the characters the rules look at."""
+    rng = random.Random(18)
+    pieces = ["C:", "\\", "/", "a", "CON", "nul", "lpt1", "|", "?", " ", "\x00", "\t"]
+    return ["".join(rng.choices(pieces, k=rng.randint(0, 8))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("require_drive", [True, False])
+@pytest.mark.parametrize(
+    "paths", [PATHS, random_paths(5000)], ids=["hand-picked", "random"]
+)
+def test_numpy_and_python_flags_agree(paths, require_drive):
+    with_numpy = validate_windows_paths(paths, require_drive, use_numpy=True)
+    without_numpy = validate_windows_paths(paths, require_drive, use_numpy=False)
+    assert list(map(int, with_numpy.flags)) == list(without_numpy.flags)
+    assert with_numpy.counts() == without_numpy.counts()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
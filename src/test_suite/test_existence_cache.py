@@ -0,0 +1,130 @@
+"""
+Test Folder Existence Checks
+
+Static findings are cached, so collect_static_findings must keep every
+folder existence check apart from the error messages, and
+resolve_existence_checks must answer them against the disk as it is now,
+in the order the analyzer found them. ExistenceCache itself must answer
+sibling lookups from one listing, expire answers after its ttl and forget
+only the paths it is told have changed, which is also all a dynamic run's
+traced paths may drop.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import detect_static_analysis
+from detect_dynamic_analysis import traced_path_errors
+from detect_static_analysis import (
+    ExistenceCache,
+    collect_static_findings,
+    get_existence_cache,
+    resolve_existence_checks,
+)
+
+
+@pytest.fixture
+def scandirs(monkeypatch):
+    """Records the folders listed with os.scandir."""
+    listed = []
+    scandir = os.scandir
+
+    def counting_scandir(path):
+        listed.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(detect_static_analysis.os, "scandir", counting_scandir)
+    return listed
+
+
+def test_existence_checks_are_kept_out_of_errors(tmp_path):
+    missing, made = tmp_path / "missing", tmp_path / "made"
+    code = (
+        "import os\n"
+        f"os.listdir({str(missing)!r})\n"
+        "os.listdir('C:/a\\\\b')\n"
+        f"os.listdir({str(made)!r})\n"
+    )
+    findings = collect_static_findings(code)
+    assert all(isinstance(error, str) for error in findings["errors"])
+    assert [folder for _, _, folder in findings["existence_checks"]] == [
+        str(missing),
+        str(made),
+    ]
+
+    get_existence_cache().invalidate()
+    assert resolve_existence_checks(findings) == [
+        f"Line 2: Folder does not exist -> {missing}",
+        "Line 3: Path 'C:/a\\b' mixes slash styles",
+        f"Line 4: Folder does not exist -> {made}",
+    ]
+    made.mkdir()
+    get_existence_cache().invalidate()
+    assert resolve_existence_checks(findings) == [
+        f"Line 2: Folder does not exist -> {missing}",
+        "Line 3: Path 'C:/a\\b' mixes slash styles",
+    ]
+
+
+def test_siblings_are_answered_by_one_listing(tmp_path, scandirs):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "file").write_text("")
+    cache = ExistenceCache()
+    assert cache.isdir(str(tmp_path / "a"))
+    assert cache.isdir(str(tmp_path / "b"))
+    assert not cache.isdir(str(tmp_path / "file"))
+    assert not cache.isdir(str(tmp_path / "missing"))
+    assert scandirs == [os.path.normcase(str(tmp_path))]
+
+
+def test_answers_expire_after_ttl(tmp_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(detect_static_analysis.time, "monotonic", lambda: now[0])
+    cache = ExistenceCache(ttl=5.0)
+    folder = tmp_path / "later"
+    assert not cache.isdir(str(folder))
+    folder.mkdir()
+    now[0] += 4.9
+    assert not cache.isdir(str(folder))
+    now[0] += 0.2
+    assert cache.isdir(str(folder))
+
+
+def test_invalidate_forgets_only_that_path(tmp_path, monkeypatch, scandirs):
+    one, other = tmp_path / "one" / "sub", tmp_path / "other" / "sub"
+    cache = ExistenceCache()
+    assert not cache.isdir(str(one))
+    assert not cache.isdir(str(other))
+    one.mkdir(parents=True)
+    other.mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    # A relative path forgets the answer stored under the absolute one
+    cache.invalidate(os.path.join("one", "sub"))
+    assert cache.isdir(str(one))
+    assert not cache.isdir(str(other))
+    assert scandirs.count(os.path.normcase(str(one.parent))) == 2
+    cache.invalidate()
+    assert cache.isdir(str(other))
+
+
+def test_traced_paths_invalidate_only_themselves(tmp_path, monkeypatch):
+    cache = ExistenceCache()
+    monkeypatch.setattr(detect_static_analysis, "_existence_cache", cache)
+    made, untouched = tmp_path / "made", tmp_path / "elsewhere" / "untouched"
+    assert not cache.isdir(str(made))
+    assert not cache.isdir(str(untouched))
+    made.mkdir()
+    untouched.mkdir(parents=True)
+    result = {"accesses": [{"event": "os.listdir", "path": str(made), "lineno": 3}]}
+    assert traced_path_errors(result, str(tmp_path)) == []
+    # Folders the script did not touch keep their answers until the ttl
+    assert not cache.isdir(str(untouched))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,71 @@
+"""
+Test WinClean Startup Import Budget
+
+Runs a static path command check under `python -X importtime` and makes sure
+it stays cheap to start: the heavy engines (z3, acp, asyncio, the dynamic
+analyzer and the OpenCode runner) must not be imported at all, and the
+WinClean modules that are imported must fit in the import-time budget.
+"""
+
+import os
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_US = 50_000
+RUNS = 3
+HEAVY_MODULES = ["z3", "acp", "asyncio", "detect_dynamic_analysis", "OpenCode_runner"]
+WINCLEAN_MODULES = ["main", "detect_static_analysis"]
+
+
+def run_path_command_check() -> dict[str, int]:
+    """Run a clean path command check and return each import's cumulative time in us."""
+    # This folder exists on every platform, so the check finds nothing to fix
+    command = f"cd {os.path.dirname(os.path.abspath(__file__))}"
+    code = (
+        "import sys; "
+        f"sys.argv = ['winclean', '--mode', 'static', '--path-command', {command!r}]; "
+        "import main; main.main()"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_path_command_skips_heavy_imports():
+    """A static path command check never imports the heavy engines."""
+    times = run_path_command_check()
+    loaded = [name for name in HEAVY_MODULES if name in times]
+    assert not loaded, f"Heavy modules imported for a path command: {loaded}"
+
+
+def test_path_command_import_budget():
+    """The WinClean modules for a path command check import within the budget."""
+    # Takes the fastest of a few runs so a busy machine does not fail the test
+    best = min(
+        sum(times.get(name, 0) for name in WINCLEAN_MODULES)
+        for times in (run_path_command_check() for _ in range(RUNS))
+    )
+    assert best < IMPORT_BUDGET_US, (
+        f"WinClean imports took {best} us, budget is {IMPORT_BUDGET_US} us"
+    )
+
+
+if __name__ == "__main__":
+    times = run_path_command_check()
+    for name in WINCLEAN_MODULES + HEAVY_MODULES:
+        print(f"  {name:<25} {times.get(name, 0):>8} us")
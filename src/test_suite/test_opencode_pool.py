@@ -0,0 +1,225 @@
+"""
+Test the OpenCode Pool and Streamed Fixes
+
+The model is part of every fix cache key, so the pool must really ask the
+agent for it, or fall back to the agent's default and say so, and fixes
+must be cached under the model that answered. Files with the same code and
+findings share one prompt, and a streamed slice fix must only stop the
+agent once a block that splices back into the file has arrived. The pool must also run
+at most `size` prompts at a time, respawn agents that exit, keep or replace
+sessions as asked, and never let a cancelled turn's late reply leak into
+the next one. These tests run against test_suite/fake_acp_agent.py, which
+names the model it was switched to at the end of each reply.
+"""
+
+import asyncio
+import os
+import shlex
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import OpenCode_runner
+from detect_static_analysis import collect_static_errors
+from OpenCode_runner import (
+    OpenCodePool,
+    cached_fix,
+    fix_cache_key,
+    fix_code,
+    fix_files_sync,
+    store_fix,
+)
+from result_cache import ResultCache
+
+pytest.importorskip("acp")
+
+AGENT = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_acp_agent.py")]
+PROMPT = "CODE TO FIX:\nx = 1\nTASK:"
+SCRIPT = """import os
+
+
+def helper(values):
+    return sum(values)
+
+
+def list_home():
+    return os.listdir("C:\\\\Users\\\\COM1")
+"""
+
+
+def ask(model, *options: str) -> str:
+    async def run() -> str:
+        async with OpenCodePool(
+            size=1, command=AGENT + list(options), model=model
+        ) as pool:
+            return await pool.prompt(PROMPT)
+
+    return asyncio.run(run())
+
+
+def test_model_is_selected_for_each_session():
+    assert ask("provider/chosen").endswith("Model: provider/chosen\n")
+
+
+def test_no_model_keeps_the_agent_default():
+    assert ask(None).endswith("Model: fake/default\n")
+
+
+def test_agent_without_model_option_keeps_its_default(capsys):
+    assert ask("provider/chosen", "--no-models").endswith("Model: fake/default\n")
+    assert "no model option to select provider/chosen" in capsys.readouterr().err
+
+
+@pytest.fixture
+def fix_cache(tmp_path, monkeypatch):
+    """Use an empty fix cache, and the fake agent for pools made inside."""
+    monkeypatch.setattr(
+        OpenCode_runner, "_fix_cache", ResultCache(str(tmp_path / "fixes.sqlite3"))
+    )
+    monkeypatch.setenv("WINCLEAN_ACP_AGENT", shlex.join(AGENT))
+
+
+def test_cached_fix_round_trip(fix_cache):
+    key = fix_cache_key("x = 1  \r\n", "Line 1: finding", "provider/chosen")
+    # Line endings and trailing spaces never change a fix
+    assert key == fix_cache_key("x = 1\n", "Line 1: finding", "provider/chosen")
+    assert key != fix_cache_key("x = 1\n", "Line 1: finding", "provider/other")
+    assert cached_fix(key) is None
+    store_fix(key, "x = (", False)
+    # A fix that did not parse is asked for again
+    assert cached_fix(key) is None
+    store_fix(key, "x = 2", True)
+    assert cached_fix(key) == "x = 2"
+    assert cached_fix(key, refresh=True) is None
+
+
+def write_scripts(tmp_path, codes: dict[str, str]) -> dict[str, str]:
+    findings = {}
+    for name, code in codes.items():
+        path = tmp_path / name
+        path.write_text(code, encoding="utf-8")
+        findings[str(path)] = "Line 1: needs a fix"
+    return findings
+
+
+def test_fix_files_prompts_once_per_distinct_file(fix_cache, tmp_path, monkeypatch):
+    files = write_scripts(
+        tmp_path, {"a.py": "a = 1\n", "copy.py": "a = 1\r\n", "b.py": "b = 1\n"}
+    )
+    prompts = []
+
+    async def counting_fix_code(pool, code, analysis):
+        prompts.append(code)
+        return await fix_code(pool, code, analysis)
+
+    monkeypatch.setattr(OpenCode_runner, "fix_code", counting_fix_code)
+    fixes = fix_files_sync(files, size=2)
+    assert sorted(prompts) == ["a = 1\n", "b = 1\n"]
+    assert list(fixes.values()) == ["a = 1\n", "a = 1\n", "b = 1\n"]
+
+    prompts.clear()
+    assert fix_files_sync(files, size=2) == fixes
+    assert prompts == []
+    fix_files_sync(files, size=2, refresh=True)
+    assert len(prompts) == 2
+
+
+def test_default_model_fixes_are_cached_as_the_agent_default(
+    fix_cache, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("WINCLEAN_ACP_AGENT", shlex.join(AGENT + ["--no-models"]))
+    files = write_scripts(tmp_path, {"a.py": "a = 1\n"})
+    assert list(fix_files_sync(files, model="provider/chosen").values()) == ["a = 1\n"]
+    analysis = "Line 1: needs a fix"
+    assert cached_fix(fix_cache_key("a = 1\n", analysis, "provider/chosen")) is None
+    assert cached_fix(fix_cache_key("a = 1\n", analysis, None)) == "a = 1\n"
+
+
+def test_slice_fix_skips_blocks_that_do_not_splice():
+    """A valid block that is not the slices does not end the turn."""
+    findings = "\n".join(collect_static_errors(SCRIPT))
+
+    async def run() -> dict:
+        async with OpenCodePool(size=1, command=AGENT + ["--decoy"]) as pool:
+            return await fix_code(pool, SCRIPT, findings)
+
+    result = asyncio.run(run())
+    assert result["sliced"] and result["stopped_early"]
+    assert result["code"] == SCRIPT
+
+
+def code_prompt(name: str) -> str:
+    return f"CODE TO FIX:\n{name} = 1\nTASK:"
+
+
+def test_pool_runs_size_prompts_at_a_time():
+    async def run() -> tuple[list[str], float]:
+        async with OpenCodePool(size=2, command=AGENT + ["--delay", "0.5"]) as pool:
+            start = time.perf_counter()
+            replies = await asyncio.gather(
+                *(pool.prompt(code_prompt(f"v{i}")) for i in range(4))
+            )
+            return replies, time.perf_counter() - start
+
+    replies, elapsed = asyncio.run(run())
+    for i, reply in enumerate(replies):
+        assert f"v{i} = 1" in reply
+    # Two rounds of two prompts, not one round of four or four of one
+    assert 0.9 < elapsed < 1.9
+
+
+def test_exited_agent_is_respawned():
+    async def run() -> tuple[str, int, int]:
+        async with OpenCodePool(size=1, command=AGENT) as pool:
+            connection = pool._free.get_nowait()
+            first_pid = connection.proc.pid
+            connection.proc.kill()
+            await connection.proc.wait()
+            pool._free.put_nowait(connection)
+            reply = await pool.prompt(PROMPT)
+            return reply, first_pid, pool._free.get_nowait().proc.pid
+
+    reply, first_pid, second_pid = asyncio.run(run())
+    assert "x = 1" in reply
+    assert first_pid != second_pid
+
+
+@pytest.mark.parametrize("reuse, last_session", [(True, 1), (False, 2)])
+def test_reuse_sessions(reuse, last_session):
+    async def run() -> str:
+        async with OpenCodePool(size=1, command=AGENT, reuse_sessions=reuse) as pool:
+            await pool.prompt(PROMPT)
+            await pool.prompt(PROMPT)
+            return pool._free.get_nowait().session_id
+
+    assert asyncio.run(run()) == f"fake-session-{last_session}"
+
+
+@pytest.mark.parametrize("reuse", [True, False])
+def test_late_chunks_of_a_given_up_turn_are_dropped(reuse):
+    """A turn that ignores its cancel cannot add to the next reply."""
+    options = ["--ignore-cancel", "--chunk-size", "4", "--chunk-delay", "0.02"]
+
+    async def run() -> tuple[str, str]:
+        async with OpenCodePool(
+            size=1,
+            command=AGENT + options,
+            timeout=0.1,
+            reuse_sessions=reuse,
+            cancel_grace=0.1,
+        ) as pool:
+            first = await pool.prompt(code_prompt("first"))
+            pool.timeout = 10
+            return first, await pool.prompt(code_prompt("second"))
+
+    first, second = asyncio.run(run())
+    assert "first = 1" not in first
+    assert "first" not in second
+    assert "second = 1" in second
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,66 @@
+"""
+Test Batch Path Commands
+
+validate_path_commands must finish even when its worker dies while the
+commands come from a source that never ends, such as an open stdin, and
+`--path-commands` must exit non-zero when any command fails.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import detect_dynamic_analysis
+import main
+from detect_dynamic_analysis import validate_path_commands
+
+
+@pytest.mark.skipif(os.name == "nt", reason="fakes the worker with a shell script")
+def test_dead_worker_with_open_source_does_not_hang(tmp_path):
+    """A worker that dies mid-run is reported without waiting for more input."""
+    dead_python = tmp_path / "python"
+    dead_python.write_text("#!/bin/sh\nread line\nexit 3\n")
+    dead_python.chmod(0o755)
+    stdin_open = threading.Event()
+
+    def commands():
+        yield "cd C:\\Users"
+        # Like an open stdin with nothing more to read
+        stdin_open.wait()
+
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.extend(
+            validate_path_commands(commands(), str(dead_python))
+        ),
+        daemon=True,
+    )
+    thread.start()
+    thread.join(10)
+    stdin_open.set()
+    assert not thread.is_alive()
+    assert [r["status"] for r in results] == ["WorkerError"]
+
+
+def test_failed_commands_set_the_exit_status(tmp_path, monkeypatch):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("cd C:\\missing\n")
+    monkeypatch.setattr(
+        detect_dynamic_analysis, "dynamic_batch_analyzer", lambda *args: 1
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["winclean", "--mode", "dynamic", "--path-commands", str(commands)],
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        main.main()
+    assert exit_info.value.code == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
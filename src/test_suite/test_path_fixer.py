@@ -0,0 +1,90 @@
+"""
+Test the Rule-Based Path Fixer on String Escapes
+
+Making a literal raw only keeps its value when every backslash in it was
+meant literally: escaped backslashes, and escapes Python does not know such
+as \\d. Literals with a real escape (\\n, \\x41, \\u00e9) must be left for
+OpenCode, as rewriting them would change the string. Only literals the
+static analysis flagged for mixed slashes are rewritten at all, and only
+the findings those rewrites resolve are kept from OpenCode.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detect_static_analysis import collect_static_errors
+from OpenCode_runner import apply_rule_fixes
+from path_fixer import fix_path_literals
+
+
+@pytest.mark.parametrize(
+    "literal",
+    [
+        r'"C:/Users\\caf\u00e9"',
+        r'"C:/data\\\x41.txt"',
+        r'"C:/new\next"',
+        r'"C:/logs\\COM1\n"',
+    ],
+)
+def test_literals_with_real_escapes_are_left_alone(literal):
+    code = f"print({literal})\n"
+    assert fix_path_literals(code) == (code, [])
+
+
+@pytest.mark.parametrize(
+    "literal, fixed",
+    [
+        (r'"C:/data\logs"', r'r"C:\data\logs"'),
+        (r'"C:/Users\\student"', r'"C:\\Users\\student"'),
+        (r'r"C:/Users\data"', r'r"C:\Users\data"'),
+    ],
+)
+def test_flagged_literal_backslashes_are_made_raw(literal, fixed):
+    fixed_code, _ = fix_path_literals(f"print({literal})\n")
+    assert fixed_code == f"print({fixed})\n"
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        'import glob\nglob.glob("C:\\\\logs\\\\*.txt")\n',
+        'print("C:\\\\logs\\\\a|b.txt")\n',
+        'import os\nos.listdir("C:\\\\Users\\\\COM1")\n',
+        'import os\nos.listdir("C:\\data\\logs")\n',
+        'path = "C:/data\\\\logs"\n',
+    ],
+    ids=["glob", "illegal", "reserved", "not-raw", "not-checked"],
+)
+def test_unflagged_literals_are_left_alone(code):
+    assert fix_path_literals(code) == (code, [])
+
+
+def test_only_the_flagged_literal_is_fixed():
+    code = 'path = "C:/data\\\\logs"\n' "print(\n" '    "C:/data\\\\logs",\n' ")\n"
+    fixed_code, notes = fix_path_literals(code)
+    assert fixed_code == code.replace('    "C:/', '    "C:\\\\')
+    assert notes == ['Line 3: "C:/data\\\\logs" -> "C:\\\\data\\\\logs"']
+
+
+def test_findings_the_rules_did_not_fix_are_kept(tmp_path):
+    # The fixed path exists, so the only static finding is the mixed slashes
+    (tmp_path / "C:\\data\\logs").mkdir()
+    code = 'import os\nos.listdir("C:/data\\\\logs")\n'
+    static = collect_static_errors(code, str(tmp_path))
+    assert static == ["Line 2: Path 'C:/data\\logs' mixes slash styles"]
+
+    fixed, findings, notes = apply_rule_fixes(code, static[0], str(tmp_path))
+    assert fixed == 'import os\nos.listdir("C:\\\\data\\\\logs")\n'
+    assert notes and findings == ""
+
+    runtime = "Line 2: FileNotFoundError: [Errno 2] No such file or directory"
+    analysis = "\n".join(static + [runtime])
+    assert apply_rule_fixes(code, analysis, str(tmp_path)) == (fixed, runtime, notes)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
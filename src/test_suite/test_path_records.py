@@ -0,0 +1,123 @@
+"""
+Test Path Records
+
+read_path_records must pull one command out of each line, CSV row or JSONL
+object (from the chosen column), turning unreadable records into error
+records instead of stopping, and validate_path_records must add each
+command's path and errors. `--paths-from` exits non-zero when any record
+is flagged.
+"""
+
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from detect_static_analysis import read_path_records, validate_path_records
+
+
+def records(text: str, fmt: str, column: str | None = None) -> list[dict]:
+    return list(read_path_records(io.StringIO(text), fmt, column))
+
+
+def test_lines_skip_blank_lines():
+    assert records("cd logs\n\n  \ndir C:\\a\n", "lines") == [
+        {"record": 1, "command": "cd logs"},
+        {"record": 4, "command": "dir C:\\a"},
+    ]
+
+
+@pytest.mark.parametrize("column", [None, "0", "command"])
+def test_csv_first_column(column):
+    text = "command,note\ncd logs,first\ndir C:\\a,second\n"
+    assert records(text, "csv", column) == [
+        {"record": 1, "command": "cd logs"},
+        {"record": 2, "command": "dir C:\\a"},
+    ]
+
+
+@pytest.mark.parametrize("column", ["1", "command"])
+def test_csv_selected_column(column):
+    text = "note,command\nfirst,cd logs\nshort\n"
+    assert records(text, "csv", column) == [
+        {"record": 1, "command": "cd logs"},
+        {"record": 2, "error": "Row has no column 1"},
+    ]
+
+
+def test_csv_unknown_column():
+    with pytest.raises(ValueError, match="not in the CSV header"):
+        records("command\ncd logs\n", "csv", "path")
+
+
+def test_jsonl_selected_key_and_error_records():
+    text = "\n".join(
+        [
+            json.dumps({"cmd": "cd logs"}),
+            "{not json",
+            json.dumps({"command": "cd logs"}),
+            json.dumps(["cd logs"]),
+            "",
+            json.dumps({"cmd": "dir C:\\a"}),
+        ]
+    )
+    result = records(text, "jsonl", "cmd")
+    assert result[0] == {"record": 1, "command": "cd logs"}
+    assert result[1]["record"] == 2
+    assert result[1]["error"].startswith("Invalid JSON")
+    assert result[2:] == [
+        {"record": 3, "error": "No string field 'cmd'"},
+        {"record": 4, "error": "No string field 'cmd'"},
+        {"record": 6, "command": "dir C:\\a"},
+    ]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="Unknown path record format"):
+        records("cd logs\n", "xml")
+
+
+def test_validate_path_records(tmp_path):
+    (tmp_path / "logs").mkdir()
+    stream = io.StringIO("cd logs\ncd C:/a\\b\n")
+    validated = list(validate_path_records(read_path_records(stream), str(tmp_path)))
+    assert validated[0] == {
+        "record": 1,
+        "command": "cd logs",
+        "path": "logs",
+        "errors": [],
+    }
+    assert validated[1]["path"] == "C:/a\\b"
+    assert validated[1]["errors"] == ["Path 'C:/a\\b' mixes slash styles"]
+    # Error records pass through unchanged
+    error = {"record": 3, "error": "Invalid JSON"}
+    assert list(validate_path_records([dict(error)])) == [error]
+
+
+@pytest.mark.parametrize("commands, status", [("cd logs\n", None), ("cd C:/a\\b\n", 1)])
+def test_flagged_records_set_the_exit_status(
+    tmp_path, monkeypatch, capsys, commands, status
+):
+    (tmp_path / "logs").mkdir()
+    source = tmp_path / "commands.txt"
+    source.write_text(commands)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        sys, "argv", ["winclean", "--mode", "static", "--paths-from", str(source)]
+    )
+    if status is None:
+        main.main()
+    else:
+        with pytest.raises(SystemExit) as exit_info:
+            main.main()
+        assert exit_info.value.code == status
+    assert json.loads(capsys.readouterr().out)["command"] == commands.strip()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
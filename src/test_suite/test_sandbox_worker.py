@@ -0,0 +1,94 @@
+"""
+Test Sandbox Worker Isolation
+
+One warm worker runs many submissions, so what a script changes must not
+leak into the scripts after it. The first script here replaces os.listdir
+and builtins.input and sets an environment variable; the second must see
+none of that, both through a worker (which forks a child per script where
+it can) and through the in-process path used where fork is not available.
+The worker's audit hook must also report the paths a script touches, with
+the script line that touched them.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_worker import SandboxWorker, _run_job
+
+
+PATCHER = """
+import builtins
+import os
+
+os.listdir = lambda path=".": ["fake"]
+builtins.input = lambda *args: "C:\\\\evil"
+os.environ["WINCLEAN_LEAKED"] = "1"
+print("patched")
+"""
+CHECKER = """
+import os
+
+print(os.listdir(".") == ["fake"])
+print(input())
+print(os.environ.get("WINCLEAN_LEAKED"))
+"""
+CLEAN_OUTPUT = "False\nstudent\nNone\n"
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    patcher, checker = tmp_path / "patcher.py", tmp_path / "checker.py"
+    patcher.write_text(PATCHER, encoding="utf-8")
+    checker.write_text(CHECKER, encoding="utf-8")
+    return str(patcher), str(checker)
+
+
+def test_worker_scripts_are_independent(scripts):
+    """A script run after another in the same worker sees a clean process."""
+    patcher, checker = scripts
+    with SandboxWorker(sys.executable) as worker:
+        alone = worker.run(checker, stdin="student\n", timeout=30)
+        assert worker.run(patcher, timeout=30)["stdout"] == "patched\n"
+        after = worker.run(checker, stdin="student\n", timeout=30)
+        assert worker.jobs_done == 3
+    assert alone["stdout"] == after["stdout"] == CLEAN_OUTPUT
+
+
+def test_in_process_jobs_restore_patched_modules(scripts):
+    """Without fork, module attributes and os.environ are put back after a job."""
+    patcher, checker = scripts
+    listdir = os.listdir
+    assert _run_job({"id": 1, "script": patcher})["stdout"] == "patched\n"
+    assert os.listdir is listdir
+    assert "WINCLEAN_LEAKED" not in os.environ
+    after = _run_job({"id": 2, "script": checker, "stdin": "student\n"})
+    assert after["stdout"] == CLEAN_OUTPUT
+
+
+def test_worker_traces_paths_with_their_lines(tmp_path):
+    """open() and os.listdir() calls are recorded with the line that made them."""
+    data = tmp_path / "data.txt"
+    data.write_text("x", encoding="utf-8")
+    script = tmp_path / "touch.py"
+    script.write_text(
+        "import os\n"
+        f"os.listdir({str(tmp_path)!r})\n"
+        "\n"
+        f"with open({str(data)!r}) as f:\n"
+        "    f.read()\n",
+        encoding="utf-8",
+    )
+    with SandboxWorker(sys.executable) as worker:
+        result = worker.run(str(script), timeout=30)
+    assert result["exception"] is None
+    accesses = [(a["event"], a["path"], a["lineno"]) for a in result["accesses"]]
+    assert ("os.listdir", str(tmp_path), 2) in accesses
+    assert ("open", str(data), 4) in accesses
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
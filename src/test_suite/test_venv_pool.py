@@ -0,0 +1,115 @@
+"""
+Test the Sandbox Venv Pool Across Processes
+
+Two WinClean processes sharing one pool folder must never lease the same
+environment, and returning one must leave it as it was created. The
+environments here are faked (a Python file, a package and a snapshot), so
+no real venv has to be created.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from venv_pool import SNAPSHOT_FILE, SandboxVenv, VenvPool
+
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEASE_IN_CHILD = (
+    "import sys; from venv_pool import VenvPool; "
+    "pool = VenvPool(sys.argv[1], size=int(sys.argv[2])); "
+    "lease = pool.lease(); print(lease.__enter__().path)"
+)
+
+
+def fake_pool(pool_dir: str, size: int) -> None:
+    """Make every slot of a pool look created, so leasing it is instant."""
+    for i in range(size):
+        venv = SandboxVenv(os.path.join(pool_dir, f"env-{i}"))
+        os.makedirs(os.path.dirname(venv.python), exist_ok=True)
+        open(venv.python, "w").close()
+        with open(os.path.join(venv.path, SNAPSHOT_FILE), "w") as f:
+            json.dump({}, f)
+
+
+def lease_in_child(pool_dir: str, size: int, timeout: float = 10) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", LEASE_IN_CHILD, pool_dir, str(size)],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_other_process_leases_a_different_venv(tmp_path):
+    """A second process skips the environment the first one has leased."""
+    fake_pool(str(tmp_path), 2)
+    with VenvPool(str(tmp_path), size=2).lease() as venv:
+        other = lease_in_child(str(tmp_path), 2)
+        assert other != venv.path
+        assert os.path.isdir(venv.path)
+
+
+def test_lock_is_held_for_the_whole_lease(tmp_path):
+    """An environment cannot be locked by anyone else until its lease ends."""
+    fake_pool(str(tmp_path), 1)
+    path = os.path.join(str(tmp_path), "env-0")
+    with VenvPool(str(tmp_path), size=1).lease():
+        other = SandboxVenv(path)
+        assert not other.lock(blocking=False)
+    assert other.lock(blocking=False)
+    other.unlock()
+
+
+def fake_site(path: str) -> tuple[SandboxVenv, str]:
+    """Make a snapshotted environment holding one package in site-packages."""
+    venv = SandboxVenv(path)
+    site = os.path.join(path, "lib", "python3", "site-packages")
+    if os.name == "nt":
+        site = os.path.join(path, "Lib", "site-packages")
+    os.makedirs(os.path.join(site, "pkg"))
+    with open(os.path.join(site, "pkg", "__init__.py"), "w") as f:
+        f.write("VERSION = 1\n")
+    venv.snapshot()
+    return venv, site
+
+
+def test_reset_removes_added_packages_only(tmp_path, monkeypatch):
+    """New packages and bytecode caches are cleaned up without recreating."""
+    venv, site = fake_site(str(tmp_path / "env-0"))
+    created = []
+    monkeypatch.setattr(venv, "create", lambda: created.append(True))
+    os.makedirs(os.path.join(site, "added"))
+    os.makedirs(os.path.join(site, "pkg", "__pycache__"))
+    open(os.path.join(site, "pkg", "__pycache__", "x.pyc"), "w").close()
+    venv.reset()
+    assert sorted(os.listdir(site)) == ["pkg"]
+    assert created == []
+
+
+@pytest.mark.parametrize("change", ["edit", "remove"])
+def test_reset_recreates_changed_packages(tmp_path, monkeypatch, change):
+    """A package that was there from the start and changed forces a rebuild."""
+    venv, site = fake_site(str(tmp_path / "env-0"))
+    created = []
+    monkeypatch.setattr(venv, "create", lambda: created.append(True))
+    module = os.path.join(site, "pkg", "__init__.py")
+    if change == "edit":
+        with open(module, "a") as f:
+            f.write("VERSION = 2\n")
+    else:
+        os.remove(module)
+    venv.reset()
+    assert created == [True]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
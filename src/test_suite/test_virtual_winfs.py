@@ -0,0 +1,77 @@
+"""
+Test the Virtual Windows Filesystem Stays Off the Disk
+
+While patched() is active, a script must only change the emulated tree.
+Each test runs from an empty temporary folder and checks afterwards that
+nothing was written there, and that the change landed in the tree instead.
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from virtual_winfs import VirtualWindowsFS
+
+
+HOME = "C:\\Users\\student"
+
+
+@pytest.fixture
+def vfs(tmp_path, monkeypatch):
+    """An empty tree, run from an empty real folder that must stay empty."""
+    monkeypatch.chdir(tmp_path)
+    vfs = VirtualWindowsFS.from_manifest({"dirs": [HOME]})
+    yield vfs
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_path_touch_stays_virtual(vfs):
+    with vfs.patched():
+        Path(HOME + "\\touched.txt").touch()
+        assert os.listdir(HOME) == ["touched.txt"]
+    assert vfs.isdir(HOME)
+
+
+def test_os_rename_and_replace_stay_virtual(vfs):
+    with vfs.patched():
+        with open(HOME + "\\old.txt", "w") as f:
+            f.write("data")
+        os.rename(HOME + "\\old.txt", HOME + "\\new.txt")
+        with open(HOME + "\\other.txt", "w") as f:
+            f.write("other")
+        with pytest.raises(FileExistsError):
+            os.rename(HOME + "\\other.txt", HOME + "\\new.txt")
+        os.replace(HOME + "\\other.txt", HOME + "\\new.txt")
+        assert os.listdir(HOME) == ["new.txt"]
+        with open(HOME + "\\new.txt") as f:
+            assert f.read() == "other"
+
+
+def test_os_open_stays_virtual(vfs):
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+    with vfs.patched():
+        fd = os.open(HOME + "\\made.txt", flags)
+        os.write(fd, b"thrown away")
+        os.close(fd)
+        with pytest.raises(FileExistsError):
+            os.open(HOME + "\\made.txt", flags)
+        with pytest.raises(FileNotFoundError):
+            os.open(HOME + "\\missing.txt", os.O_RDONLY)
+        assert os.path.isfile(HOME + "\\made.txt")
+
+
+def test_shutil_and_unmodelled_calls_stay_virtual(vfs):
+    with vfs.patched():
+        os.makedirs(HOME + "\\a\\b")
+        with open(HOME + "\\a\\b\\f.txt", "w") as f:
+            f.write("x")
+        shutil.copy2(HOME + "\\a\\b\\f.txt", HOME + "\\a\\g.txt")
+        shutil.rmtree(HOME + "\\a")
+        assert os.listdir(HOME) == []
+        with pytest.raises(OSError):
+            os.symlink(HOME, "link")
@@ -0,0 +1,102 @@
+"""
+Test the WinClean Server
+
+Starts a server on a temporary socket and checks that a request that is not
+a JSON object gets an error reply instead of dropping the connection,
+that a second server refuses to take over the socket of a running one,
+that clients without the server's key are turned away, and that
+invalidate_paths makes a cached analysis see a newly created folder.
+"""
+
+import json
+import os
+import stat
+import sys
+import threading
+from multiprocessing import AuthenticationError
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import detect_static_analysis
+from result_cache import ResultCache
+from winclean_server import WinCleanClient, WinCleanServer, authkey_path
+
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="uses a Unix socket")
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a server on a temporary socket for the length of one test."""
+    address = str(tmp_path / "winclean.sock")
+    server = WinCleanServer(address)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    # The socket file appears once the listener is bound
+    for _ in range(500):
+        if os.path.exists(address):
+            break
+        threading.Event().wait(0.01)
+    yield address
+    server.stop()
+    thread.join(5)
+
+
+def test_non_object_request_gets_an_error(server):
+    """A JSON array is answered with an error and the connection stays usable."""
+    with WinCleanClient(server) as client:
+        client.conn.send_bytes(json.dumps([1, 2]).encode())
+        reply = json.loads(client.conn.recv_bytes())
+        assert "expected a JSON object" in reply["error"]
+        assert client.call("ping") == "pong"
+
+
+def test_second_server_refuses_a_live_socket(server):
+    """Starting a server on a live server's socket fails and leaves it running."""
+    with pytest.raises(RuntimeError, match="already running"):
+        WinCleanServer(server).serve_forever()
+    with WinCleanClient(server) as client:
+        assert client.call("ping") == "pong"
+
+
+def test_client_without_the_key_is_refused(server):
+    """Only clients holding the key from the 0600 key file are served."""
+    mode = os.stat(authkey_path(server)).st_mode
+    assert stat.S_IMODE(mode) == 0o600
+    with pytest.raises(AuthenticationError):
+        WinCleanClient(server, authkey=b"not the key")
+    with WinCleanClient(server) as client:
+        assert client.call("ping") == "pong"
+
+
+def test_invalidate_paths_refreshes_cached_findings(server, tmp_path, monkeypatch):
+    """A cache hit after invalidate_paths reports the folder as it is now."""
+    cache = ResultCache(str(tmp_path / "static.sqlite3"))
+    monkeypatch.setattr(detect_static_analysis, "_result_cache", cache)
+    hits = []
+    get = cache.get
+
+    def counting_get(key):
+        value = get(key)
+        if value is not None:
+            hits.append(key)
+        return value
+
+    monkeypatch.setattr(cache, "get", counting_get)
+    folder = tmp_path / "made_later"
+    script = tmp_path / "script.py"
+    script.write_text(f"import os\nos.listdir({str(folder)!r})\n", encoding="utf-8")
+    with WinCleanClient(server) as client:
+        before = client.analyze_folder_access(str(script))
+        assert any("Folder does not exist" in error for error in before)
+        folder.mkdir()
+        client.invalidate_paths(str(folder))
+        assert client.analyze_folder_access(str(script)) == []
+    # The second analysis was served from the result cache
+    assert len(hits) == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
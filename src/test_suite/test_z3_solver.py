@@ -0,0 +1,103 @@
+"""
+Test the Opt-In Z3 Solver
+
+The segment rules answer symbolic path questions by default, and `--solver
+z3` sends them through Z3 instead. Both must report the same findings, and
+only the Z3 run may open the on-disk cache of Z3 verdicts. The in-memory
+cache of verdicts by path shape is shared by the server's threads, so it is
+also hammered from several threads at once.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+import symbolic_class
+
+SCRIPT = 'import os\nname = input()\nopen("C:\\\\Users\\\\" + name + "\\\\notes.txt")\n'
+
+
+def scan(folder: str, cache_dir: str, solver: str) -> str:
+    """Run a static --scan-dir with the given solver and return its output."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "main.py",
+            "--mode",
+            "static",
+            "--scan-dir",
+            folder,
+            "--solver",
+            solver,
+        ],
+        cwd=SRC_DIR,
+        env={**os.environ, "WINCLEAN_CACHE_DIR": cache_dir},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_z3_solver_matches_segment_rules(tmp_path):
+    """--solver z3 reports the same findings as the default segment rules."""
+    pytest.importorskip("z3")
+    folder = tmp_path / "submissions"
+    folder.mkdir()
+    (folder / "student.py").write_text(SCRIPT, encoding="utf-8")
+
+    segments = scan(str(folder), str(tmp_path / "segments"), "segments")
+    z3 = scan(str(folder), str(tmp_path / "z3"), "z3")
+
+    assert "Path MAY contain reserved 'CON'" in segments
+    assert z3 == segments
+    assert not (tmp_path / "segments" / "z3_shapes.sqlite3").exists()
+    assert (tmp_path / "z3" / "z3_shapes.sqlite3").exists()
+
+
+class YieldingVerdicts(OrderedDict):
+    """An LRU that lets other threads run right after each lookup."""
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        time.sleep(0)
+        return value
+
+
+def test_shape_verdicts_survive_many_threads(monkeypatch):
+    """The bounded LRU of shape verdicts stays consistent under concurrent use."""
+    # Shapes stand in for z3 expressions, so only the LRU itself is exercised
+    monkeypatch.setattr(symbolic_class, "canonical_path_shape", lambda expr: expr)
+    monkeypatch.setattr(symbolic_class, "find_path_violations", lambda expr: ([], []))
+    monkeypatch.setattr(symbolic_class, "MAX_MEMOIZED_SHAPES", 4)
+    monkeypatch.setattr(symbolic_class, "_shape_verdicts", YieldingVerdicts())
+    errors = []
+
+    def hammer(offset: int) -> None:
+        try:
+            for i in range(2000):
+                shape = (("const", str((i + offset) % 7)),)
+                symbolic_class.memoized_path_violations(shape)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(symbolic_class._shape_verdicts) == 4
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,300 @@
+"""
+Sandbox Venv Pool
+
+Creating a virtual environment with `python -m venv` takes seconds, which
+dominates a dynamic check of a small script. The pool creates a fixed number
+of sandbox environments once, under the WinClean cache folder, and leases
+them out one run at a time.
+
+When an environment is first created its site-packages and scripts folders
+are snapshotted into a small manifest: each entry with a signature of its
+files' sizes and modification times. Returning a leased environment resets
+it by deleting anything the run added beyond that snapshot, which is far
+cheaper than recreating the environment. A run that upgraded, removed or
+edited a package that was there from the start cannot be undone that way,
+so the environment is then recreated.
+
+Every environment has a lock file next to it that is held for the whole
+lease, so several WinClean processes (two CLI runs, or a CLI run and the
+server) can share one pool folder without creating, resetting or deleting
+an environment another process is using.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from result_cache import DEFAULT_CACHE_DIR
+
+
+DEFAULT_POOL_DIR = os.path.join(DEFAULT_CACHE_DIR, "venvs")
+SNAPSHOT_FILE = ".winclean_snapshot.json"
+
+
+def venv_python(venv_path: str) -> str:
+    """Get the Python executable inside a virtual environment."""
+    if os.name == "nt":
+        return os.path.join(venv_path, "Scripts", "python.exe")
+    return os.path.join(venv_path, "bin", "python")
+
+
+def _tracked_dirs(venv_path: str) -> list[str]:
+    """Get the folders a run can install into: site-packages and bin/Scripts."""
+    if os.name == "nt":
+        dirs = [
+            os.path.join(venv_path, "Lib", "site-packages"),
+            os.path.join(venv_path, "Scripts"),
+        ]
+    else:
+        lib = os.path.join(venv_path, "lib")
+        dirs = [
+            os.path.join(lib, name, "site-packages")
+            for name in (sorted(os.listdir(lib)) if os.path.isdir(lib) else [])
+        ]
+        dirs.append(os.path.join(venv_path, "bin"))
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def _signature(path: str) -> object:
+    """
+    Summarize a file or folder so that changing any file in it changes the result.
+
+    Files get [size, mtime]; folders get a hash of that for every file below
+    them. __pycache__ folders are left out, as Python writes them whenever
+    a package is imported.
+    """
+    st = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path):
+        return [st.st_size, st.st_mtime_ns]
+    digest = hashlib.sha1()
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for name in sorted(filenames):
+            full = os.path.join(dirpath, name)
+            st = os.lstat(full)
+            rel = os.path.relpath(full, path)
+            digest.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _lock_file(f, blocking: bool) -> bool:
+    """Take an exclusive lock on an open file, returning False if it is held."""
+    if os.name == "nt":
+        import msvcrt
+
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(0.05)
+
+    import fcntl
+
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        return True
+    except OSError:
+        return False
+
+
+class SandboxVenv:
+    """One pooled environment: its folder, its Python and its snapshot."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.python = venv_python(path)
+        # Lives outside the environment folder, which create() deletes
+        self.lock_path = path + ".lock"
+        self._lock = None
+
+    def lock(self, blocking: bool = True) -> bool:
+        """Lock the environment against other processes, False if one holds it."""
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        f = open(self.lock_path, "a+")
+        if not _lock_file(f, blocking):
+            f.close()
+            return False
+        self._lock = f
+        return True
+
+    def unlock(self) -> None:
+        """Release the lock taken by lock(); closing the file releases it."""
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def is_ready(self) -> bool:
+        """Check if the environment was fully created and snapshotted."""
+        return os.path.exists(self.python) and os.path.exists(
+            os.path.join(self.path, SNAPSHOT_FILE)
+        )
+
+    def create(self) -> None:
+        """Create the environment from scratch and snapshot its clean state."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        result = subprocess.run(
+            [sys.executable, "-m", "venv", self.path],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise OSError(f"Failed to create venv at {self.path}: {result.stderr}")
+        self.snapshot()
+
+    def snapshot(self) -> None:
+        """Record the entries of every tracked folder, with signatures, as clean."""
+        manifest = {
+            os.path.relpath(d, self.path): {
+                entry: _signature(os.path.join(d, entry)) for entry in os.listdir(d)
+            }
+            for d in _tracked_dirs(self.path)
+        }
+        with open(os.path.join(self.path, SNAPSHOT_FILE), "w") as f:
+            json.dump(manifest, f)
+
+    def reset(self) -> None:
+        """
+        Delete anything added to the tracked folders since the snapshot.
+
+        If anything from the snapshot was changed or removed, the environment
+        is recreated instead, as its original files are gone.
+        """
+        with open(os.path.join(self.path, SNAPSHOT_FILE)) as f:
+            manifest = json.load(f)
+        changed = False
+        for rel_dir, clean_entries in manifest.items():
+            folder = os.path.join(self.path, rel_dir)
+            # Snapshots from before signatures were kept only list names
+            if not os.path.isdir(folder) or not isinstance(clean_entries, dict):
+                changed = True
+                continue
+            entries = os.listdir(folder)
+            changed = changed or not set(clean_entries) <= set(entries)
+            for entry in entries:
+                target = os.path.join(folder, entry)
+                if entry in clean_entries:
+                    if not changed:
+                        changed = _signature(target) != clean_entries[entry]
+                elif os.path.isdir(target) and not os.path.islink(target):
+                    shutil.rmtree(target, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(target)
+                    except OSError:
+                        pass
+        if changed:
+            print(
+                f"Recreating pooled virtual environment at {self.path}, "
+                "as a run changed its packages...",
+                file=sys.stderr,
+            )
+            self.create()
+
+
+class VenvPool:
+    """
+    A fixed set of sandbox environments leased out one run at a time.
+
+    Environments are created lazily the first time they are needed, or all at
+    once with warm(). Leases are shared between the threads of one process
+    through a queue, and between processes using the same pool folder
+    through each environment's lock file.
+    """
+
+    def __init__(self, pool_dir: str = DEFAULT_POOL_DIR, size: Optional[int] = None):
+        self.pool_dir = pool_dir
+        self.size = max(1, size or os.cpu_count() or 1)
+        self._free = queue.Queue()
+        for i in range(self.size):
+            self._free.put(SandboxVenv(os.path.join(pool_dir, f"env-{i}")))
+        self._create_lock = threading.Lock()
+
+    def _ensure_ready(self, venv: SandboxVenv) -> None:
+        """Create the environment if an earlier run never finished creating it."""
+        if venv.is_ready():
+            return
+        with self._create_lock:
+            if not venv.is_ready():
+                # Goes to stderr so batch modes can keep stdout machine-readable
+                print(
+                    f"Creating pooled virtual environment at {venv.path}...",
+                    file=sys.stderr,
+                )
+                venv.create()
+
+    def warm(self) -> None:
+        """Create every environment in the pool up front."""
+        venvs = [self._free.get() for _ in range(self.size)]
+        try:
+            for venv in venvs:
+                venv.lock()
+                try:
+                    self._ensure_ready(venv)
+                finally:
+                    venv.unlock()
+        finally:
+            for venv in venvs:
+                self._free.put(venv)
+
+    def _acquire(self) -> SandboxVenv:
+        """Take a free environment that no other process has locked."""
+        tries = 0
+        while True:
+            venv = self._free.get()
+            if venv.lock(blocking=False):
+                return venv
+            self._free.put(venv)
+            tries += 1
+            # Every environment is leased by another process, so wait a little
+            if tries % self.size == 0:
+                time.sleep(0.05)
+
+    @contextmanager
+    def lease(self) -> Iterator[SandboxVenv]:
+        """Borrow a ready environment, blocking until one is free."""
+        venv = self._acquire()
+        try:
+            self._ensure_ready(venv)
+            yield venv
+        finally:
+            try:
+                if venv.is_ready():
+                    venv.reset()
+            except OSError:
+                # A broken environment is rebuilt on its next lease
+                shutil.rmtree(venv.path, ignore_errors=True)
+            venv.unlock()
+            self._free.put(venv)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> VenvPool:
+    """Get the process-wide pool under the WinClean cache folder."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = VenvPool()
+        return _default_pool
+
+
+__all__ = [
+    "venv_python",
+    "SandboxVenv",
+    "VenvPool",
+    "get_default_pool",
+    "DEFAULT_POOL_DIR",
+]
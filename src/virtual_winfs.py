@@ -0,0 +1,724 @@
+"""
+Virtual Windows Filesystem
+
+An in-memory stand-in for a Windows disk, used to run dynamic analysis with
+Windows path semantics on any platform and without touching the real disk.
+It models:
+
+- drive letters ("C:\\...") and UNC shares ("\\\\server\\share\\...")
+- both slash styles, "." and "..", and the current directory and drive
+- case-insensitive names, with trailing dots and spaces ignored
+- reserved device names (CON, PRN, AUX, NUL, COM1-9, LPT1-9), with or
+  without an extension
+- illegal characters (<>:"|?* and control characters)
+
+A tree is seeded from a manifest such as:
+
+    {"cwd": "C:\\Users\\student",
+     "dirs": ["C:\\Users\\student\\Documents", "\\\\server\\share"],
+     "files": {"C:\\Users\\student\\notes.txt": "hello"}}
+
+patched() swaps every path-taking function of os, plus io.open,
+builtins.open and shutil.rmtree, for the virtual ones while a script runs.
+pathlib and the rest of shutil go through those, so Path objects and file
+copies see the same tree. Functions the tree does not model, such as links,
+ownership and extended attributes, raise instead of reaching the disk.
+Absolute POSIX paths inside the Python install, and os.devnull, still reach
+the real disk, so imports and libraries keep working. A call that names a
+real and a virtual path at once goes to the tree.
+
+os.open creates and truncates files in the tree like open() does, but hands
+back a descriptor for os.devnull, so bytes written through os.write are
+thrown away and os.read sees an empty file.
+
+The errors raised match the ones Windows raises for the same call, with its
+WinError code in the message and on the exception's winerror attribute.
+
+This file only uses the standard library, because it runs inside the
+sandbox worker under the venv's Python.
+"""
+
+import builtins
+import errno
+import io
+import ntpath
+import os
+import stat
+import sys
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+
+ILLEGAL_CHARS = frozenset('<>:"|?*') | frozenset(chr(i) for i in range(32))
+RESERVED_NAMES = frozenset(
+    {"CON", "PRN", "AUX", "NUL"}
+    | {f"COM{i}" for i in range(1, 10)}
+    | {f"LPT{i}" for i in range(1, 10)}
+)
+# Path-taking os functions the tree does not model; they raise for virtual paths
+UNSUPPORTED_OS_FUNCTIONS = (
+    "chflags",
+    "chown",
+    "chroot",
+    "getxattr",
+    "lchflags",
+    "lchmod",
+    "lchown",
+    "link",
+    "listxattr",
+    "mkfifo",
+    "mknod",
+    "pathconf",
+    "readlink",
+    "removexattr",
+    "setxattr",
+    "startfile",
+    "statvfs",
+    "symlink",
+)
+DEFAULT_MANIFEST = {
+    "cwd": "C:\\Users\\student",
+    "dirs": [
+        "C:\\Program Files",
+        "C:\\Users\\Public\\Documents",
+        "C:\\Users\\student\\Desktop",
+        "C:\\Users\\student\\Documents",
+        "C:\\Users\\student\\Downloads",
+        "C:\\Windows\\System32",
+    ],
+    "files": {},
+}
+
+
+def _winerror(
+    exc_type: type, code: int, winerror: int, message: str, path: str
+) -> OSError:
+    """Build the exception Windows raises, including its WinError code."""
+    e = exc_type(code, f"[WinError {winerror}] {message}", path)
+    e.winerror = winerror
+    return e
+
+
+def _key(name: str) -> str:
+    """Windows ignores case and trailing dots and spaces in names."""
+    return name.rstrip(" .").casefold()
+
+
+def is_reserved_name(name: str) -> bool:
+    """Check if a path component names a device, such as "COM1" or "nul.txt"."""
+    return name.split(".")[0].rstrip(" ").upper() in RESERVED_NAMES
+
+
+class _Dir:
+    __slots__ = ("name", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.children = {}
+
+
+class _File:
+    __slots__ = ("name", "data")
+
+    def __init__(self, name: str, data: bytes = b""):
+        self.name = name
+        self.data = bytes(data)
+
+
+class _DeviceFile:
+    """A reserved device name: reads are empty and writes are thrown away."""
+
+
+class _VirtualBuffer(io.BytesIO):
+    """An open virtual file, written back to its tree node when closed."""
+
+    def __init__(self, node: _File, data: bytes, writable: bool):
+        super().__init__(data)
+        self._node = node
+        self._writable = writable
+
+    def close(self) -> None:
+        if not self.closed and self._writable and self._node is not None:
+            self._node.data = self.getvalue()
+        super().close()
+
+
+class _DirEntry:
+    """The parts of os.DirEntry that scripts use."""
+
+    def __init__(self, folder: str, node: Any):
+        self.name = node.name
+        self.path = ntpath.join(folder, node.name)
+        self._is_dir = isinstance(node, _Dir)
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        return self._is_dir
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        return not self._is_dir
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<DirEntry {self.name!r}>"
+
+
+class _ScandirIterator:
+    """An iterator over directory entries that also works in a with block."""
+
+    def __init__(self, entries: list):
+        self._entries = iter(entries)
+
+    def __iter__(self) -> "_ScandirIterator":
+        return self
+
+    def __next__(self) -> _DirEntry:
+        return next(self._entries)
+
+    def close(self) -> None:
+        self._entries = iter(())
+
+    def __enter__(self) -> "_ScandirIterator":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class VirtualWindowsFS:
+    """An in-memory Windows directory tree with os-style file functions."""
+
+    def __init__(self, cwd: str = "C:\\"):
+        self.drives = {}
+        self.cwd = ntpath.normpath(cwd)
+        self.makedirs(self.cwd, exist_ok=True)
+        self._real = {}  # (module, name) -> the real function
+        self._real_prefixes = tuple(
+            {os.path.abspath(p) for p in (sys.prefix, sys.base_prefix, sys.exec_prefix)}
+        )
+
+    @classmethod
+    def from_manifest(cls, manifest: Optional[dict] = None) -> "VirtualWindowsFS":
+        """Build a tree from a manifest of folders and files, or the default tree."""
+        manifest = manifest or DEFAULT_MANIFEST
+        fs = cls(manifest.get("cwd") or "C:\\")
+        for folder in manifest.get("dirs") or []:
+            fs.makedirs(folder, exist_ok=True)
+        for path, content in (manifest.get("files") or {}).items():
+            fs.makedirs(ntpath.dirname(ntpath.normpath(path)), exist_ok=True)
+            data = content.encode("utf-8") if isinstance(content, str) else content
+            fs._create_file(path, bytes(data))
+        return fs
+
+    # ----- Path Resolution -----
+    def _split(self, path: Any) -> tuple[str, list[str]]:
+        """Resolve a path against the current directory into a drive and names."""
+        path = os.fsdecode(os.fspath(path))
+        full = ntpath.normpath(ntpath.join(self.cwd, path))
+        drive, rest = ntpath.splitdrive(full)
+        if not drive:
+            # A path like "\\Users" is on the current drive
+            drive = ntpath.splitdrive(self.cwd)[0]
+        names = [name for name in rest.replace("/", "\\").split("\\") if name]
+
+        valid_drive = (len(drive) == 2 and drive[0].isalpha()) or drive.startswith(
+            "\\\\"
+        )
+        if not valid_drive or any(c in ILLEGAL_CHARS for n in names for c in n):
+            raise _winerror(
+                OSError,
+                errno.EINVAL,
+                123,
+                "The filename, directory name, or volume label syntax is incorrect",
+                path,
+            )
+        return drive, names
+
+    def _lookup(self, path: Any) -> Any:
+        """Find the node for a path, or None if it does not exist."""
+        drive, names = self._split(path)
+        node = self.drives.get(_key(drive))
+        for name in names:
+            if not isinstance(node, _Dir):
+                return None
+            if is_reserved_name(name):
+                return _DeviceFile()
+            node = node.children.get(_key(name))
+        return node
+
+    def _parent(self, path: Any) -> tuple[_Dir, str]:
+        """Find the folder that should hold path, and the name inside it."""
+        drive, names = self._split(path)
+        if not names:
+            raise _winerror(
+                PermissionError, errno.EACCES, 5, "Access is denied", os.fspath(path)
+            )
+        node = self.drives.get(_key(drive))
+        for name in names[:-1]:
+            node = node.children.get(_key(name)) if isinstance(node, _Dir) else None
+        if not isinstance(node, _Dir):
+            raise _winerror(
+                FileNotFoundError,
+                errno.ENOENT,
+                3,
+                "The system cannot find the path specified",
+                os.fspath(path),
+            )
+        return node, names[-1]
+
+    def _dir(self, path: Any) -> _Dir:
+        """Find a folder, raising what Windows raises if it is not one."""
+        node = self._lookup(path)
+        if node is None:
+            drive, _ = self._split(path)
+            if drive.startswith("\\") and _key(drive) not in self.drives:
+                raise _winerror(
+                    FileNotFoundError,
+                    errno.ENOENT,
+                    53,
+                    "The network path was not found",
+                    os.fspath(path),
+                )
+            raise _winerror(
+                FileNotFoundError,
+                errno.ENOENT,
+                3,
+                "The system cannot find the path specified",
+                os.fspath(path),
+            )
+        if not isinstance(node, _Dir):
+            raise _winerror(
+                NotADirectoryError,
+                errno.ENOTDIR,
+                267,
+                "The directory name is invalid",
+                os.fspath(path),
+            )
+        return node
+
+    def _create_file(self, path: Any, data: bytes = b"") -> _File:
+        folder, name = self._parent(path)
+        node = folder.children.get(_key(name))
+        if isinstance(node, _Dir):
+            raise _winerror(
+                PermissionError, errno.EACCES, 5, "Access is denied", os.fspath(path)
+            )
+        if node is None:
+            node = folder.children[_key(name)] = _File(name.rstrip(" ."), data)
+        return node
+
+    def _is_real(self, path: Any) -> bool:
+        """Check if a path is in the Python install, which stays on the real disk."""
+        if isinstance(path, int):
+            return True
+        path = os.fsdecode(os.fspath(path))
+        if path == os.devnull:
+            return True
+        return os.path.isabs(path) and os.path.abspath(path).startswith(
+            self._real_prefixes
+        )
+
+    def _file(self, path: Any) -> Any:
+        """Find a file or folder, raising what Windows raises if there is none."""
+        node = self._lookup(path)
+        if node is None:
+            raise _winerror(
+                FileNotFoundError,
+                errno.ENOENT,
+                2,
+                "The system cannot find the file specified",
+                os.fspath(path),
+            )
+        return node
+
+    # ----- File Functions -----
+    def getcwd(self) -> str:
+        return self.cwd
+
+    def chdir(self, path: Any) -> None:
+        sys.audit("os.chdir", path)
+        self._dir(path)
+        self.cwd = ntpath.normpath(ntpath.join(self.cwd, os.fsdecode(os.fspath(path))))
+
+    def listdir(self, path: Any = ".") -> list[str]:
+        sys.audit("os.listdir", path)
+        folder = self._dir(path)
+        return [node.name for _, node in sorted(folder.children.items())]
+
+    def scandir(self, path: Any = ".") -> _ScandirIterator:
+        sys.audit("os.scandir", path)
+        folder = self._dir(path)
+        base = os.fsdecode(os.fspath(path))
+        return _ScandirIterator(
+            [_DirEntry(base, node) for _, node in sorted(folder.children.items())]
+        )
+
+    def mkdir(self, path: Any, mode: int = 0o777, *, dir_fd: Any = None) -> None:
+        sys.audit("os.mkdir", path, mode, dir_fd if dir_fd is not None else -1)
+        folder, name = self._parent(path)
+        if _key(name) in folder.children or is_reserved_name(name):
+            raise _winerror(
+                FileExistsError,
+                errno.EEXIST,
+                183,
+                "Cannot create a file when that file already exists",
+                os.fspath(path),
+            )
+        folder.children[_key(name)] = _Dir(name.rstrip(" ."))
+
+    def makedirs(self, path: Any, mode: int = 0o777, exist_ok: bool = False) -> None:
+        drive, names = self._split(path)
+        node = self.drives.setdefault(_key(drive), _Dir(drive))
+        created = False
+        for name in names:
+            child = node.children.get(_key(name))
+            if child is None:
+                child = node.children[_key(name)] = _Dir(name.rstrip(" ."))
+                created = True
+            elif not isinstance(child, _Dir):
+                raise _winerror(
+                    FileExistsError,
+                    errno.EEXIST,
+                    183,
+                    "Cannot create a file when that file already exists",
+                    os.fspath(path),
+                )
+            node = child
+        if not created and not exist_ok:
+            raise _winerror(
+                FileExistsError,
+                errno.EEXIST,
+                183,
+                "Cannot create a file when that file already exists",
+                os.fspath(path),
+            )
+
+    def remove(self, path: Any, *, dir_fd: Any = None) -> None:
+        folder, name = self._parent(path)
+        node = folder.children.get(_key(name))
+        if node is None:
+            raise _winerror(
+                FileNotFoundError,
+                errno.ENOENT,
+                2,
+                "The system cannot find the file specified",
+                os.fspath(path),
+            )
+        if isinstance(node, _Dir):
+            raise _winerror(
+                PermissionError, errno.EACCES, 5, "Access is denied", os.fspath(path)
+            )
+        del folder.children[_key(name)]
+
+    def _move(self, src: Any, dst: Any, overwrite: bool) -> None:
+        """Move a node to a new name, as os.rename and os.replace do."""
+        src_folder, src_name = self._parent(src)
+        node = src_folder.children.get(_key(src_name))
+        if node is None:
+            self._file(src)
+        dst_folder, dst_name = self._parent(dst)
+        existing = dst_folder.children.get(_key(dst_name))
+        if existing is node:
+            # Only the case of the name changes
+            del src_folder.children[_key(src_name)]
+        elif existing is not None and not overwrite:
+            raise _winerror(
+                FileExistsError,
+                errno.EEXIST,
+                183,
+                "Cannot create a file when that file already exists",
+                os.fspath(dst),
+            )
+        elif (
+            isinstance(existing, _Dir)
+            or (existing is not None and isinstance(node, _Dir))
+            or is_reserved_name(dst_name)
+            or self._contains(node, dst_folder)
+        ):
+            raise _winerror(
+                PermissionError, errno.EACCES, 5, "Access is denied", os.fspath(dst)
+            )
+        else:
+            del src_folder.children[_key(src_name)]
+        node.name = dst_name.rstrip(" .")
+        dst_folder.children[_key(dst_name)] = node
+
+    def _contains(self, node: Any, folder: _Dir) -> bool:
+        """Check if folder is node itself or somewhere inside it."""
+        if folder is node:
+            return True
+        if not isinstance(node, _Dir):
+            return False
+        return any(self._contains(child, folder) for child in node.children.values())
+
+    def rename(self, src: Any, dst: Any, **dir_fds: Any) -> None:
+        sys.audit("os.rename", src, dst, -1, -1)
+        self._move(src, dst, overwrite=False)
+
+    def replace(self, src: Any, dst: Any, **dir_fds: Any) -> None:
+        sys.audit("os.rename", src, dst, -1, -1)
+        self._move(src, dst, overwrite=True)
+
+    def renames(self, old: Any, new: Any) -> None:
+        head = ntpath.dirname(os.fsdecode(os.fspath(new)))
+        if head and not self.isdir(head):
+            self.makedirs(head)
+        self.rename(old, new)
+        head = ntpath.dirname(os.fsdecode(os.fspath(old)))
+        if head:
+            try:
+                self.removedirs(head)
+            except OSError:
+                pass
+
+    def removedirs(self, name: Any) -> None:
+        self.rmdir(name)
+        head = ntpath.dirname(os.fsdecode(os.fspath(name)))
+        while head and ntpath.splitdrive(head)[1].strip("\\/"):
+            try:
+                self.rmdir(head)
+            except OSError:
+                break
+            head = ntpath.dirname(head)
+
+    def utime(self, path: Any, times: Any = None, **kwargs: Any) -> None:
+        sys.audit("os.utime", path, times, kwargs.get("ns"), -1)
+        # Timestamps are not modelled, so only the path has to exist
+        self._file(path)
+
+    def chmod(self, path: Any, mode: int, **kwargs: Any) -> None:
+        sys.audit("os.chmod", path, mode, -1)
+        self._file(path)
+
+    def access(self, path: Any, mode: int, **kwargs: Any) -> bool:
+        try:
+            return self._lookup(path) is not None
+        except OSError:
+            return False
+
+    def truncate(self, path: Any, length: int) -> None:
+        sys.audit("os.truncate", path, length)
+        node = self._file(path)
+        if isinstance(node, _Dir):
+            raise _winerror(
+                PermissionError, errno.EACCES, 5, "Access is denied", os.fspath(path)
+            )
+        if isinstance(node, _File):
+            node.data = node.data[:length].ljust(length, b"\0")
+
+    def os_open(
+        self, path: Any, flags: int, mode: int = 0o777, *, dir_fd: Any = None
+    ) -> int:
+        """os.open: applies the flags to the tree, then opens os.devnull."""
+        sys.audit("open", path, None, flags)
+        node = self._lookup(path)
+        if isinstance(node, _Dir):
+            raise _winerror(
+                PermissionError, errno.EACCES, 5, "Access is denied", os.fspath(path)
+            )
+        if node is None:
+            if not flags & os.O_CREAT:
+                self._parent(path)
+                self._file(path)
+            self._create_file(path)
+        elif flags & os.O_CREAT and flags & os.O_EXCL:
+            raise _winerror(
+                FileExistsError, errno.EEXIST, 80, "The file exists", os.fspath(path)
+            )
+        elif flags & os.O_TRUNC and isinstance(node, _File):
+            node.data = b""
+        return self._real[(os, "open")](os.devnull, os.O_RDWR)
+
+    def rmtree(
+        self, path: Any, ignore_errors: bool = False, onerror: Any = None, **kwargs
+    ) -> None:
+        """shutil.rmtree: removes a folder and everything in it."""
+        sys.audit("shutil.rmtree", path, None)
+        try:
+            folder, name = self._parent(path)
+            self._dir(path)
+            del folder.children[_key(name)]
+        except OSError:
+            if ignore_errors:
+                return
+            if onerror is not None:
+                onerror(os.rmdir, path, sys.exc_info())
+                return
+            raise
+
+    def unsupported(self, path: Any = None, *args: Any, **kwargs: Any) -> Any:
+        """Stands in for the os functions the tree does not model."""
+        raise _winerror(
+            OSError, errno.ENOTSUP, 50, "The request is not supported", path
+        )
+
+    def rmdir(self, path: Any, *, dir_fd: Any = None) -> None:
+        folder, name = self._parent(path)
+        node = self._dir(path)
+        if node.children:
+            raise _winerror(
+                OSError, errno.ENOTEMPTY, 145, "The directory is not empty", path
+            )
+        del folder.children[_key(name)]
+
+    def stat(self, path: Any, *, dir_fd: Any = None, follow_symlinks: bool = True):
+        node = self._lookup(path)
+        if node is None:
+            raise _winerror(
+                FileNotFoundError,
+                errno.ENOENT,
+                2,
+                "The system cannot find the file specified",
+                os.fspath(path),
+            )
+        if isinstance(node, _Dir):
+            mode, size = stat.S_IFDIR | 0o777, 0
+        elif isinstance(node, _DeviceFile):
+            mode, size = stat.S_IFCHR | 0o666, 0
+        else:
+            mode, size = stat.S_IFREG | 0o666, len(node.data)
+        # A distinct inode per node, so os.path.samefile tells files apart
+        return os.stat_result((mode, id(node), 0, 1, 0, 0, size, 0, 0, 0))
+
+    def isdir(self, path: Any) -> bool:
+        """Check for a folder without raising, as os.path.isdir does."""
+        try:
+            return isinstance(self._lookup(path), _Dir)
+        except OSError:
+            return False
+
+    def open(
+        self,
+        file: Any,
+        mode: str = "r",
+        buffering: int = -1,
+        encoding: Optional[str] = None,
+        errors: Optional[str] = None,
+        newline: Optional[str] = None,
+        closefd: bool = True,
+        opener: Any = None,
+    ) -> Any:
+        sys.audit("open", file, mode, 0)
+        writing = any(c in mode for c in "wax+")
+        node = self._lookup(file)
+
+        if isinstance(node, _DeviceFile):
+            buffer = _VirtualBuffer(None, b"", False)
+        elif isinstance(node, _Dir):
+            raise _winerror(
+                PermissionError, errno.EACCES, 5, "Access is denied", os.fspath(file)
+            )
+        elif "x" in mode and node is not None:
+            raise _winerror(
+                FileExistsError, errno.EEXIST, 80, "The file exists", os.fspath(file)
+            )
+        elif node is None and ("r" in mode or not writing):
+            # Tells a missing file apart from a missing folder, as Windows does
+            self._parent(file)
+            raise _winerror(
+                FileNotFoundError,
+                errno.ENOENT,
+                2,
+                "The system cannot find the file specified",
+                os.fspath(file),
+            )
+        else:
+            node = node or self._create_file(file)
+            data = b"" if "w" in mode else node.data
+            buffer = _VirtualBuffer(node, data, writing)
+            if "a" in mode:
+                buffer.seek(0, io.SEEK_END)
+
+        if "b" in mode:
+            return buffer
+        return io.TextIOWrapper(
+            buffer, encoding=encoding or "utf-8", errors=errors, newline=newline
+        )
+
+    # ----- Patching -----
+    def _wrap(self, target: tuple, virtual: Any, paths: int = 1) -> Any:
+        """Send a call to the real disk if all its paths are real, else to the tree."""
+        real = self._real[target]
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if len(args) >= paths and all(self._is_real(a) for a in args[:paths]):
+                return real(*args, **kwargs)
+            return virtual(*args, **kwargs)
+
+        wrapper.__name__ = getattr(real, "__name__", target[1])
+        return wrapper
+
+    def _targets(self) -> dict:
+        """Map every (module, name) to patch to its virtual function and path count."""
+        import shutil
+
+        targets = {
+            (os, "listdir"): (self.listdir, 1),
+            (os, "scandir"): (self.scandir, 1),
+            (os, "mkdir"): (self.mkdir, 1),
+            (os, "makedirs"): (self.makedirs, 1),
+            (os, "remove"): (self.remove, 1),
+            (os, "unlink"): (self.remove, 1),
+            (os, "rmdir"): (self.rmdir, 1),
+            (os, "removedirs"): (self.removedirs, 1),
+            (os, "rename"): (self.rename, 2),
+            (os, "renames"): (self.renames, 2),
+            (os, "replace"): (self.replace, 2),
+            (os, "stat"): (self.stat, 1),
+            (os, "lstat"): (self.stat, 1),
+            (os, "utime"): (self.utime, 1),
+            (os, "chmod"): (self.chmod, 1),
+            (os, "access"): (self.access, 1),
+            (os, "truncate"): (self.truncate, 1),
+            (os, "open"): (self.os_open, 1),
+            (io, "open"): (self.open, 1),
+            (builtins, "open"): (self.open, 1),
+            (shutil, "rmtree"): (self.rmtree, 1),
+        }
+        for name in UNSUPPORTED_OS_FUNCTIONS:
+            if hasattr(os, name):
+                targets[(os, name)] = (self.unsupported, 2 if "link" in name else 1)
+        return targets
+
+    @contextmanager
+    def patched(self) -> Iterator["VirtualWindowsFS"]:
+        """Send os, io, builtins and shutil file calls here until the block ends."""
+        targets = self._targets()
+        saved = {target: getattr(*target) for target in targets}
+        saved_cwd = (os.getcwd, os.chdir)
+        # Python 3.10 and older pathlib keeps its own copies of the os functions
+        import pathlib
+
+        accessor = getattr(pathlib, "_NormalAccessor", None)
+        saved_accessor = {}
+        try:
+            for target, (virtual, paths) in targets.items():
+                self._real[target] = saved[target]
+                setattr(*target, self._wrap(target, virtual, paths))
+            if accessor is not None:
+                for (module, name), _ in targets.items():
+                    if module is os and name in vars(accessor):
+                        saved_accessor[name] = vars(accessor)[name]
+                        setattr(accessor, name, staticmethod(getattr(os, name)))
+            # The current directory is always virtual
+            os.getcwd, os.chdir = self.getcwd, self.chdir
+            yield self
+        finally:
+            for target, real in saved.items():
+                setattr(*target, real)
+            for name, real in saved_accessor.items():
+                setattr(accessor, name, real)
+            os.getcwd, os.chdir = saved_cwd
+
+
+__all__ = [
+    "VirtualWindowsFS",
+    "DEFAULT_MANIFEST",
+    "ILLEGAL_CHARS",
+    "RESERVED_NAMES",
+    "is_reserved_name",
+]
@@ -0,0 +1,335 @@
+"""
+WinClean Server
+
+A long-running daemon that keeps WinClean's analyzers and caches warm so that
+editors and shells can check every path command without starting Python,
+importing the analyzers and re-reading caches each time.
+
+The server listens on a Unix socket (a named pipe on Windows) and speaks
+length-prefixed JSON messages through multiprocessing.connection. Each
+request is {"id": ..., "method": ..., "params": {...}} and each reply is
+{"id": ..., "result": ...} or {"id": ..., "error": "..."}.
+
+Connections are authenticated with a random key the server writes, readable
+only by its user, next to its socket (see authkey_path), so other users who
+can reach the socket cannot make the server read files for them.
+
+Start it with `winclean serve`, then talk to it with WinCleanClient.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, Optional
+
+
+def default_address() -> str:
+    """Get the default socket path, or pipe name on Windows."""
+    if os.name == "nt":
+        return r"\\.\pipe\winclean"
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "winclean"
+    )
+    return os.path.join(runtime_dir, "winclean.sock")
+
+
+def _address_family(address: str) -> str:
+    """Pick the multiprocessing.connection family for an address."""
+    return "AF_PIPE" if address.startswith("\\\\") else "AF_UNIX"
+
+
+def authkey_path(address: str) -> str:
+    """Get the file holding the key for a server, next to its socket."""
+    if _address_family(address) == "AF_PIPE":
+        # A named pipe has no folder, so its key goes in the user's own one
+        key_dir = os.path.join(
+            os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "winclean"
+        )
+        return os.path.join(key_dir, address.rsplit("\\", 1)[-1] + ".key")
+    return address + ".key"
+
+
+def _write_authkey(address: str) -> bytes:
+    """Make a fresh key for a server and save it where only this user can read it."""
+    authkey = secrets.token_bytes(32)
+    path = authkey_path(address)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Written to a new file created 0600 and renamed over the old key, so
+    # the key is never readable by others, not even for a moment
+    temp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(authkey)
+    os.replace(temp, path)
+    return authkey
+
+
+def read_authkey(address: str) -> bytes:
+    """Read the key of the server on address, raising OSError if it has none."""
+    with open(authkey_path(address), "rb") as f:
+        return f.read()
+
+
+# ----- Request Handlers -----
+def _validate_windows_path(path: str, root: str = "") -> list[str]:
+    from detect_static_analysis import validate_windows_path
+
+    return validate_windows_path(path, root)
+
+
+def _validate_command(command: str, root: str = "") -> list[str]:
+    from detect_static_analysis import (
+        extract_path_from_command,
+        validate_windows_path,
+    )
+
+    return validate_windows_path(extract_path_from_command(command), root)
+
+
+def _analyze_file(
+    path: str, root: str = "", use_cache: bool = True, use_solver: bool = False
+) -> list[str]:
+    from detect_static_analysis import analyze_file
+
+    return analyze_file(path, root, use_cache, use_solver)
+
+
+def _analyze_folder_access(
+    input_path: str, root: str = "", use_cache: bool = True, use_solver: bool = False
+) -> list[str]:
+    """Same checks as analyze_folder_access, returned instead of printed."""
+    if os.path.isfile(input_path):
+        return _analyze_file(input_path, root, use_cache, use_solver)
+    return _validate_command(input_path, root)
+
+
+def _invalidate_paths(path: Optional[str] = None) -> None:
+    """
+    Forget cached folder existence, for one path or all of them.
+
+    The result cache holds no existence answers, as they are checked again
+    on every analysis, so this is all a cached file needs to be up to date.
+    """
+    from detect_static_analysis import get_existence_cache
+
+    get_existence_cache().invalidate(path)
+
+
+HANDLERS = {
+    "ping": lambda: "pong",
+    "validate_windows_path": _validate_windows_path,
+    "validate_command": _validate_command,
+    "analyze_file": _analyze_file,
+    "analyze_folder_access": _analyze_folder_access,
+    "invalidate_paths": _invalidate_paths,
+}
+
+
+def handle_request(request: dict) -> dict:
+    """Run one request and build its reply."""
+    reply = {"id": request.get("id")}
+    handler = HANDLERS.get(request.get("method"))
+    if handler is None:
+        reply["error"] = f"Unknown method: {request.get('method')}"
+        return reply
+    try:
+        reply["result"] = handler(**(request.get("params") or {}))
+    except Exception as e:
+        reply["error"] = f"{type(e).__name__}: {e}"
+    return reply
+
+
+# ----- Server -----
+def _server_running(address: str) -> bool:
+    """Check if a server is answering on address, as opposed to a stale socket file."""
+    try:
+        authkey = read_authkey(address)
+    except OSError:
+        authkey = secrets.token_bytes(32)
+    try:
+        Client(address, family=_address_family(address), authkey=authkey).close()
+    except AuthenticationError:
+        # Something answered, just not with the key on disk
+        return True
+    except (OSError, EOFError):
+        return False
+    return True
+
+
+class WinCleanServer:
+    """Accepts client connections and answers their requests on worker threads."""
+
+    def __init__(self, address: Optional[str] = None):
+        self.address = address or default_address()
+        self.listener = None
+        self.authkey = None
+        self._stopping = threading.Event()
+
+    def serve_forever(self) -> None:
+        """
+        Listen until a client sends a shutdown request.
+
+        Raises RuntimeError if another server is already answering on the
+        address, rather than taking its socket over.
+        """
+        family = _address_family(self.address)
+        if _server_running(self.address):
+            raise RuntimeError(
+                f"A WinClean server is already running on {self.address}"
+            )
+        if family == "AF_UNIX":
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+            # A socket file left behind by a crashed server would block the bind
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+
+        # Warms up the analyzers before the first request arrives
+        import detect_static_analysis  # noqa: F401
+
+        self.authkey = _write_authkey(self.address)
+        self.listener = Listener(self.address, family=family, authkey=self.authkey)
+        print(f"WinClean server listening on {self.address}")
+        try:
+            while True:
+                try:
+                    conn = self.listener.accept()
+                except (AuthenticationError, EOFError, ConnectionError):
+                    # A client without the key, or one that left mid-handshake
+                    continue
+                if self._stopping.is_set():
+                    conn.close()
+                    break
+                threading.Thread(
+                    target=self._serve_connection, args=(conn,), daemon=True
+                ).start()
+        finally:
+            # Closing the listener also removes the socket file
+            self.listener.close()
+            self.listener = None
+            try:
+                os.unlink(authkey_path(self.address))
+            except OSError:
+                pass
+
+    def stop(self) -> None:
+        """Ask serve_forever to stop accepting connections."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        # A blocked accept() does not notice the listener closing, so a
+        # throwaway connection wakes it up to see the stop flag
+        try:
+            Client(
+                self.address,
+                family=_address_family(self.address),
+                authkey=self.authkey,
+            ).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+
+    def _serve_connection(self, conn: Any) -> None:
+        """Answer requests on one connection until the client disconnects."""
+        with conn:
+            while True:
+                try:
+                    request = json.loads(conn.recv_bytes())
+                except (EOFError, OSError):
+                    return
+                except ValueError as e:
+                    reply = {"error": f"Bad request: {e}"}
+                    conn.send_bytes(json.dumps(reply).encode())
+                    continue
+                if not isinstance(request, dict):
+                    reply = {"error": "Bad request: expected a JSON object"}
+                    conn.send_bytes(json.dumps(reply).encode())
+                    continue
+
+                if request.get("method") == "shutdown":
+                    conn.send_bytes(json.dumps({"id": request.get("id")}).encode())
+                    self.stop()
+                    return
+                conn.send_bytes(json.dumps(handle_request(request)).encode())
+
+
+# ----- Client -----
+class WinCleanClient:
+    """
+    A thin client for a running WinClean server.
+
+    Keep one client open for many requests; each request is then a single
+    round trip over the already connected socket. The server's key is read
+    from authkey_path unless one is given.
+    """
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None):
+        self.address = address or default_address()
+        self.conn = Client(
+            self.address,
+            family=_address_family(self.address),
+            authkey=authkey or read_authkey(self.address),
+        )
+        self._next_id = 0
+
+    def call(self, method: str, **params: Any) -> Any:
+        """Send one request and return its result, raising RuntimeError on errors."""
+        self._next_id += 1
+        request = {"id": self._next_id, "method": method, "params": params}
+        self.conn.send_bytes(json.dumps(request).encode())
+        reply = json.loads(self.conn.recv_bytes())
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply.get("result")
+
+    def validate_windows_path(self, path: str, root: str = "") -> list[str]:
+        return self.call("validate_windows_path", path=path, root=root)
+
+    def validate_command(self, command: str, root: str = "") -> list[str]:
+        return self.call("validate_command", command=command, root=root)
+
+    def analyze_folder_access(self, input_path: str, root: str = "") -> list[str]:
+        return self.call("analyze_folder_access", input_path=input_path, root=root)
+
+    def invalidate_paths(self, path: Optional[str] = None) -> None:
+        """Tell the server a folder (or anything) may have been created or removed."""
+        self.call("invalidate_paths", path=path)
+
+    def shutdown(self) -> None:
+        """Ask the server to stop."""
+        self.call("shutdown")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "WinCleanClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def serve_main(argv: list[str]) -> None:
+    """Entry point for `winclean serve`."""
+    parser = argparse.ArgumentParser(
+        prog="winclean serve", description="Run the WinClean analysis server"
+    )
+    parser.add_argument(
+        "--address",
+        help=f"Socket path or pipe name to listen on (default: {default_address()})",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        WinCleanServer(args.address).serve_forever()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    serve_main(sys.argv[1:])